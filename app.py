@@ -1,14 +1,24 @@
 import streamlit as st
 import time
 import os
-import sqlite3
 import shutil
+import threading
 from dotenv import load_dotenv
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langgraph.checkpoint.sqlite import SqliteSaver
-from src.agents.architect import create_architect_agent, SYSTEM_PROMPT
+from src.agents.architect import SYSTEM_PROMPT
+from src.config import MAX_TOOL_CONCURRENCY
 
 from src.utils.session_manager import SessionManager
+from src.utils.usage import UsageBuffer, estimate_cost, extract_usage
+from src.utils.checkpoint_gc import CheckpointCollector, collect_garbage
+from src.utils.analytics import AnalyticsStore, is_failure
+from src.utils.tracing import TraceStore, TracingCallbackHandler, export_chrome_trace
+from src.utils.file_preview import read_preview
+from src.tools.generate_schematic import list_modules, render_module
+from src.utils.file_index import get_file_index, release_all_file_indexes, release_file_index
+from src.utils import agent_registry
+from src.utils.chat_history import (ChatHistoryCache, get_clean_content, latest_checkpoint_id,
+                                    output_icon, page_groups, tool_call_summary)
 
 # Load environment
 load_dotenv()
@@ -31,11 +41,10 @@ if "processed_msg_ids" not in st.session_state:
 if "selected_model" not in st.session_state:
     st.session_state.selected_model = "gemini-2.5-flash"
 
-# Pricing Constants (Per 1M Tokens)
-PRICING = {
-    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
-    "gemini-3-pro-preview": {"input": 2.00, "output": 12.00}
-}
+# Sessions listed per page on the home page
+SESSIONS_PER_PAGE = 20
+# Sessions read per step of "Import past sessions" (one progress update each)
+IMPORT_BATCH_SIZE = 50
 
 def update_token_usage(usage_metadata, model_name, msg_id=None):
     if not usage_metadata: return
@@ -47,18 +56,7 @@ def update_token_usage(usage_metadata, model_name, msg_id=None):
     if msg_id:
         st.session_state.processed_msg_ids.add(msg_id)
     
-    in_t = usage_metadata.get("input_tokens", 0)
-    out_t = usage_metadata.get("output_tokens", 0)
-    total_t = usage_metadata.get("total_tokens", 0)
-    
-    # Attempt to extract cache info (provider dependent)
-    cached_t = 0
-    # Check for cache_read (Google style via LangChain)
-    if "input_token_details" in usage_metadata:
-        details = usage_metadata["input_token_details"]
-        if isinstance(details, dict):
-            # Try both keys just in case
-            cached_t = details.get("cache_read", 0) or details.get("cache_read_input_tokens", 0)
+    in_t, out_t, total_t, cached_t = extract_usage(usage_metadata)
     
     st.session_state.token_usage["input_tokens"] += in_t
     st.session_state.token_usage["output_tokens"] += out_t
@@ -66,26 +64,58 @@ def update_token_usage(usage_metadata, model_name, msg_id=None):
     st.session_state.token_usage["cached_tokens"] += cached_t
     
     # Calculate Cost based on Model
-    rates = PRICING.get(model_name, PRICING["gemini-2.5-flash"]) # Default to 2.5 rates if unknown
-    
-    cost_input = (in_t / 1_000_000) * rates["input"]
-    cost_output = (out_t / 1_000_000) * rates["output"]
+    cost = estimate_cost(model_name, in_t, out_t)
     
-    st.session_state.token_usage["total_cost"] += (cost_input + cost_output)
+    st.session_state.token_usage["total_cost"] += cost
     
-    # Persist to DB
+    # Persist to DB (buffered; written in batches off the streaming loop)
     if st.session_state.current_session:
-        session_manager.update_session_stats(
-            st.session_state.current_session,
-            st.session_state.token_usage["input_tokens"],
-            st.session_state.token_usage["output_tokens"],
-            st.session_state.token_usage["cached_tokens"],
-            st.session_state.token_usage["total_cost"]
-        )
-
-# Initialize Manager
-session_manager = SessionManager(base_dir=os.path.join(os.path.dirname(__file__), 'workspace'), 
-                               db_path=os.path.join(os.path.dirname(__file__), 'state.db'))
+        usage_buffer.add(st.session_state.current_session, in_t, out_t, cached_t, cost)
+
+# Initialize Manager (cached so its pooled connections survive reruns)
+@st.cache_resource
+def get_session_manager(base_dir, db_path):
+    return SessionManager(base_dir=base_dir, db_path=db_path)
+
+session_manager = get_session_manager(os.path.join(os.path.dirname(__file__), 'workspace'), 
+                                      os.path.join(os.path.dirname(__file__), 'state.db'))
+
+# Token usage deltas are buffered and flushed to the session metadata in batches
+@st.cache_resource
+def get_usage_buffer(_session_manager):
+    return UsageBuffer(_session_manager.add_session_stats)
+
+usage_buffer = get_usage_buffer(session_manager)
+
+# Per-message usage and per-tool events for cross-session analytics
+@st.cache_resource
+def get_analytics_store(db_path):
+    return AnalyticsStore(db_path)
+
+analytics_store = get_analytics_store(session_manager.db_path)
+
+# Spans of every tool run and LLM call (local trace store)
+@st.cache_resource
+def get_trace_store(db_path):
+    return TraceStore(db_path)
+
+trace_store = get_trace_store(session_manager.db_path)
+
+# Checkpoint retention/compaction runs in the background for the life of the server
+@st.cache_resource
+def get_checkpoint_collector(db_path):
+    return CheckpointCollector(db_path).start()
+
+get_checkpoint_collector(session_manager.db_path)
+
+# Workspace directories are reconciled with session_metadata off the UI path, at most every 10 minutes
+@st.cache_resource(ttl=600)
+def reconcile_sessions_in_background(_session_manager):
+    thread = threading.Thread(target=_session_manager.reconcile_sessions, name="session-reconcile", daemon=True)
+    thread.start()
+    return thread
+
+reconcile_sessions_in_background(session_manager)
 
 # --- Session Logic ---
 if "current_session" not in st.session_state:
@@ -110,20 +140,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Helper to parse message content
-def get_clean_content(msg):
-    content = msg.content
-    if isinstance(content, list):
-        text_blocks = []
-        for block in content:
-            if isinstance(block, dict):
-                if block.get("type") == "text":
-                    text_blocks.append(block.get("text", ""))
-            elif isinstance(block, str):
-                text_blocks.append(block)
-        return "\n".join(text_blocks)
-    return str(content)
-
 # --- UI Functions ---
 
 def render_home():
@@ -165,42 +181,96 @@ def render_home():
 
     with col2:
         st.subheader("📂 Load Previous Session")
-        sessions = session_manager.get_all_sessions()
+        # One indexed query per page; the workspace is reconciled in the background
+        f1, f2 = st.columns([0.6, 0.4])
+        name_filter = f1.text_input("Filter", placeholder="Search sessions", label_visibility="collapsed")
+        sort_by = f2.selectbox("Sort", ["recent", "cost"], label_visibility="collapsed",
+                               format_func=lambda s: "Newest first" if s == "recent" else "Highest cost")
+        page = st.session_state.get("home_page", 0)
+        if (name_filter, sort_by) != st.session_state.get("home_query"):
+            st.session_state.home_query = (name_filter, sort_by)
+            page = 0
+        sessions, total = session_manager.list_sessions(limit=SESSIONS_PER_PAGE, offset=page * SESSIONS_PER_PAGE,
+                                                        sort_by=sort_by, name_filter=name_filter)
+        if not sessions and page > 0:
+            # The page emptied (e.g. after deletes): show the last one instead
+            page = max(0, (total - 1) // SESSIONS_PER_PAGE)
+            sessions, total = session_manager.list_sessions(limit=SESSIONS_PER_PAGE, offset=page * SESSIONS_PER_PAGE,
+                                                            sort_by=sort_by, name_filter=name_filter)
         if sessions:
-            for sess in sessions:
+            for meta in sessions:
+                sess = meta["session_id"]
                 c1, c2 = st.columns([0.8, 0.2])
-                if c1.button(f"📄 {sess}", key=f"load_{sess}", use_container_width=True):
+                if c1.button(f"📄 {sess} · ${meta['total_cost'] or 0:.3f}", key=f"load_{sess}", use_container_width=True):
                     st.session_state.current_session = sess
                     st.rerun()
                 if c2.button("🗑️", key=f"del_{sess}"):
+                    usage_buffer.discard(sess)
+                    discard_aggregate(sess)
+                    analytics_store.delete_session(sess)
+                    trace_store.delete_session(sess)
+                    release_file_index(session_manager.get_workspace_path(sess))
                     session_manager.delete_session(sess)
                     if st.session_state.current_session == sess:
                         st.session_state.current_session = None
                     st.rerun()
+
+            pages = -(-total // SESSIONS_PER_PAGE)
+            if pages > 1:
+                p1, p2, p3 = st.columns([0.25, 0.5, 0.25])
+                if p1.button("◀ Prev", disabled=page == 0, use_container_width=True):
+                    st.session_state.home_page = page - 1
+                    st.rerun()
+                p2.caption(f"Page {page + 1} of {pages} ({total} sessions)")
+                if p3.button("Next ▶", disabled=page >= pages - 1, use_container_width=True):
+                    st.session_state.home_page = page + 1
+                    st.rerun()
+            st.session_state.home_page = page
         else:
             st.info("No previous sessions found.")
             
     st.divider()
+    with st.expander("📊 Usage Analytics", expanded=False):
+        if st.button("Import past sessions", help="Backfill analytics from stored chat histories"):
+            # One page at a time, so a large history never sits in memory at once and progress stays visible
+            progress = st.progress(0.0, text="Importing sessions...")
+            offset, total = 0, None
+            while total is None or offset < total:
+                sessions, total = session_manager.list_sessions(limit=IMPORT_BATCH_SIZE, offset=offset)
+                if not sessions:
+                    break
+                for meta in sessions:
+                    _, messages = load_session(meta["session_id"], session_manager.db_path)
+                    analytics_store.ingest_messages(meta["session_id"], messages, meta["model_name"])
+                offset += len(sessions)
+                progress.progress(min(offset / total, 1.0), text=f"Imported {offset} of {total} sessions")
+            progress.empty()
+        st.caption("Cost per tool (LLM cost of the calls that invoked it)")
+        st.dataframe(analytics_store.cost_per_tool(), use_container_width=True)
+        st.caption("Prompt cache hit ratio per model")
+        st.dataframe(analytics_store.cache_hit_ratio_per_model(), use_container_width=True)
+        st.caption("Slowest tools")
+        st.dataframe(analytics_store.slowest_tools(), use_container_width=True)
+
+    if st.button("🧹 Compact Database", type="secondary"):
+        result = collect_garbage(session_manager.db_path)
+        st.success(f"Removed {result['checkpoints_deleted']} old checkpoints and "
+                   f"{result['orphans_deleted']} orphaned writes.")
     if st.button("🗑️ Clear All History", type="secondary"):
+        # Close the shared checkpoint connection before the DB file is removed
+        agent_registry.release(session_manager.db_path)
+        usage_buffer.discard()
+        discard_aggregate()
+        analytics_store.close()
+        trace_store.close()
+        release_all_file_indexes()
         session_manager.clear_all_sessions()
         st.rerun()
 
-# Helper to build a tree structure from file paths
+# Helper to build a tree structure from file paths (served from the watched file index)
 def build_file_tree(root_path):
-    tree = {"files": [], "dirs": {}}
     relevant_extensions = ('.v', '.sv', '.rpt', '.txt', '.log', '.gds', '.sdc', '.lef', '.def', '.lib')
-    
-    if os.path.exists(root_path):
-        for item in sorted(os.listdir(root_path)):
-            item_path = os.path.join(root_path, item)
-            if os.path.isdir(item_path):
-                # Recursively build tree for subdirs
-                sub_tree = build_file_tree(item_path)
-                if sub_tree["files"] or sub_tree["dirs"]: # Only add if not empty
-                    tree["dirs"][item] = sub_tree
-            elif item.endswith(relevant_extensions):
-                tree["files"].append(item)
-    return tree
+    return get_file_index(root_path).tree(relevant_extensions)
 
 def render_tree_view(tree, current_path=""):
     # Render Files first (optional preference, or dirs first)
@@ -222,7 +292,25 @@ def render_tree_view(tree, current_path=""):
             render_tree_view(sub_tree, os.path.join(current_path, d))
 
 from src.utils.visualizers import render_waveform, render_gds
-from src.utils.reporter import generate_markdown_report
+
+def render_file_preview(file_path, key):
+    """Shows a file in a code block; large files are paged from the head or tail."""
+    language = "verilog" if file_path.endswith((".v", ".sv")) else "text"
+    probe = read_preview(file_path)
+    if not probe["truncated"]:
+        st.code(probe["text"], language=language)
+        return
+
+    c1, c2, c3 = st.columns([0.4, 0.3, 0.3])
+    mode = c1.radio("View", ["head", "tail"], horizontal=True, key=f"{key}_mode",
+                    format_func=lambda m: "Start" if m == "head" else "End")
+    page = c2.number_input("Page", min_value=1, value=1, step=1, key=f"{key}_page") - 1
+    c3.caption(f"Large file ({probe['size'] / 1_000_000:.1f} MB)")
+    preview = read_preview(file_path, mode=mode, page=page)
+    st.code(preview["text"], language=language)
+    if not preview["has_more"]:
+        st.caption("No more pages in this direction.")
+from src.utils.reporter import discard_aggregate, load_session, write_markdown_report
 
 def render_workspace():
     # --- Main Layout ---
@@ -279,16 +367,30 @@ def render_workspace():
         # Expert Button
         with c5:
              if st.session_state.current_session and DB_PATH:
-                 # Generate on fly (lightweight)
-                 report = generate_markdown_report(st.session_state.current_session, DB_PATH, locked_model)
+                 # Generated only when clicked (callable data needs streamlit>=1.52); streamed to a file
+                 # that is reused until the next checkpoint
+                 session_id = st.session_state.current_session
+                 def load_report():
+                     path = write_markdown_report(session_id, DB_PATH,
+                                                  session_manager.get_workspace_path(session_id), locked_model)
+                     with open(path, "rb") as f:
+                         return f.read()
                  st.download_button(
                      label="📥",
-                     data=report,
+                     data=load_report,
                      file_name=f"{st.session_state.current_session}.md",
                      mime="text/markdown",
                      help="Download Session Report",
                      key="top_dl_btn"
                  )
+                 st.download_button(
+                     label="⏱️",
+                     data=lambda: export_chrome_trace(trace_store.get_spans(session_id=session_id)),
+                     file_name=f"{session_id}.trace.json",
+                     mime="application/json",
+                     help="Download tool/LLM timing trace (open in ui.perfetto.dev or chrome://tracing)",
+                     key="top_trace_btn"
+                 )
 
     col1, col2 = st.columns([1.2, 0.8])
 
@@ -306,9 +408,7 @@ def render_workspace():
             file_path = os.path.join(CURRENT_WORKSPACE, st.session_state.selected_file)
             if os.path.exists(file_path):
                 try:
-                    with open(file_path, "r", errors='ignore') as f:
-                        content = f.read()
-                    st.code(content, language="verilog" if file_path.endswith(".v") else "text")
+                    render_file_preview(file_path, key="selected_file_preview")
                 except Exception as e:
                     st.error(f"Error reading file: {e}")
             else:
@@ -321,53 +421,51 @@ def render_workspace():
             # Tabs for different views
             tab_code, tab_wave, tab_layout, tab_schematic = st.tabs(["📝 Code", "📈 Waveform", "🗺️ Layout", "🔌 Schematic"])
             
+            # Workspace listings come from the watched index instead of rescanning the disk
+            file_index = get_file_index(CURRENT_WORKSPACE)
+
             with tab_code:
                 file_viewer_placeholder = st.empty()
                 def render_files():
                     with file_viewer_placeholder.container():
                         # Right Side: Only show root level source files (generated by write_file)
-                        if os.path.exists(CURRENT_WORKSPACE):
-                            all_files = sorted(os.listdir(CURRENT_WORKSPACE))
-                            files = [f for f in all_files if f.endswith(('.v', '.sv', '.rpt', '.txt', '.log')) and os.path.isfile(os.path.join(CURRENT_WORKSPACE, f))]
-                        else:
-                            files = []
+                        files = file_index.files(('.v', '.sv', '.rpt', '.txt', '.log'), root_only=True)
 
                         if files:
-                            sub_tabs = st.tabs(files)
-                            for i, file_name in enumerate(files):
-                                with sub_tabs[i]:
-                                    file_path = os.path.join(CURRENT_WORKSPACE, file_name)
-                                    try:
-                                        with open(file_path, "r", errors='ignore') as f:
-                                            content = f.read()
-                                        st.code(content, language="verilog" if file_name.endswith(".v") else "text")
-                                    except Exception as e:
-                                        st.error(f"Error: {e}")
+                            # Only the selected file is read (tabs would load every file on each render).
+                            # render_files runs again after each write_file event, so widget keys carry
+                            # a per-run counter and the selection is kept in session state.
+                            current = st.session_state.get("code_file")
+                            file_name = st.radio("File", files, horizontal=True, label_visibility="collapsed",
+                                                 index=files.index(current) if current in files else 0,
+                                                 key=f"code_file_{render_files.calls}")
+                            st.session_state.code_file = file_name
+                            file_path = os.path.join(CURRENT_WORKSPACE, file_name)
+                            try:
+                                render_file_preview(file_path, key=f"code_preview_{render_files.calls}")
+                            except Exception as e:
+                                st.error(f"Error: {e}")
                         else:
                             st.info("Waiting for generated files...")
+                        render_files.calls += 1
+                render_files.calls = 0
                 render_files()
 
             with tab_wave:
-                if os.path.exists(CURRENT_WORKSPACE):
-                    vcd_files = [f for f in os.listdir(CURRENT_WORKSPACE) if f.endswith(".vcd")]
-                    if vcd_files:
-                        selected_vcd = st.selectbox("Select VCD", vcd_files)
-                        if selected_vcd:
-                            render_waveform(os.path.join(CURRENT_WORKSPACE, selected_vcd))
-                    else:
-                        st.info("No VCD files found. Run simulation to generate waveforms.")
+                vcd_files = file_index.files((".vcd",), root_only=True)
+                if vcd_files:
+                    # Preselect the most recently written waveform
+                    newest = file_index.recent(1, (".vcd",))
+                    default = vcd_files.index(newest[0]) if newest and newest[0] in vcd_files else 0
+                    selected_vcd = st.selectbox("Select VCD", vcd_files, index=default)
+                    if selected_vcd:
+                        render_waveform(os.path.join(CURRENT_WORKSPACE, selected_vcd))
                 else:
-                    st.info("Workspace not ready.")
+                    st.info("No VCD files found. Run simulation to generate waveforms.")
 
             with tab_layout:
                 # Recursive search for GDS
-                gds_files = []
-                if os.path.exists(CURRENT_WORKSPACE):
-                    for root, dirs, files in os.walk(CURRENT_WORKSPACE):
-                        for file in files:
-                            if file.endswith(".gds"):
-                                rel_path = os.path.relpath(os.path.join(root, file), CURRENT_WORKSPACE)
-                                gds_files.append(rel_path)
+                gds_files = file_index.files((".gds",))
                 
                 if gds_files:
                     selected_gds = st.selectbox("Select Layout (GDS)", gds_files)
@@ -378,15 +476,26 @@ def render_workspace():
 
             with tab_schematic:
                 # Search for SVGs
-                svg_files = []
-                if os.path.exists(CURRENT_WORKSPACE):
-                    svg_files = [f for f in os.listdir(CURRENT_WORKSPACE) if f.endswith(".svg")]
+                svg_files = file_index.files((".svg",), root_only=True)
                 
                 if svg_files:
                     selected_svg = st.selectbox("Select Schematic", svg_files)
                     if selected_svg:
                         # Render with white background for visibility in dark mode
                         svg_path = os.path.join(CURRENT_WORKSPACE, selected_svg)
+
+                        # Submodules are rendered lazily, only when selected
+                        top = selected_svg.removesuffix("_schematic.svg")
+                        modules = list_modules(CURRENT_WORKSPACE, top)
+                        if len(modules) > 1:
+                            module = st.selectbox("Module", modules, key=f"schematic_module_{top}")
+                            if module != top:
+                                with st.spinner(f"Rendering {module}..."):
+                                    rendered = render_module(CURRENT_WORKSPACE, top, module)
+                                if rendered["success"]:
+                                    svg_path = rendered["svg_path"]
+                                else:
+                                    st.error(rendered["error"])
                         with open(svg_path, "r") as f:
                             svg_content = f.read()
                         
@@ -402,16 +511,25 @@ def render_workspace():
     with col1:
         st.subheader("Chat")
         
-        # Initialize Agent
+        # Initialize Agent (compiled graph + SQLite connection are reused across reruns)
         try:
-            conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-            memory = SqliteSaver(conn)
             # Pass Dynamic Model
             model_to_use = st.session_state.get("selected_model", "gemini-2.5-flash")
-            agent_graph = create_architect_agent(checkpointer=memory, model_name=model_to_use)
-            config = {"configurable": {"thread_id": st.session_state.current_session}}
+            agent_graph = agent_registry.get_agent(DB_PATH, model_to_use)
+            # max_concurrency caps how many tool calls of one AI message run in parallel for this session
+            config = {"configurable": {"thread_id": st.session_state.current_session},
+                      "max_concurrency": MAX_TOOL_CONCURRENCY}
             
-            current_state = agent_graph.get_state(config)
+            # Grouped history is cached per thread and only rebuilt when the checkpoint changes
+            thread_id = st.session_state.current_session
+            history = st.session_state.get("chat_history")
+            if history is None or history.thread_id != thread_id:
+                history = ChatHistoryCache(thread_id)
+                st.session_state.chat_history = history
+                st.session_state.history_pages = 1
+            checkpoint_id = latest_checkpoint_id(agent_registry.get_checkpointer(DB_PATH), thread_id)
+            groups = history.refresh(checkpoint_id,
+                                     lambda: agent_graph.get_state(config).values.get("messages", []))
         except Exception as e:
             st.error(f"Error loading session state: {e}")
             st.warning("Session data might be corrupted or deleted. Returning to Home.")
@@ -419,80 +537,35 @@ def render_workspace():
             st.session_state.current_session = None
             st.rerun()
         
-        # Render History with Grouping
-        if current_state.values and "messages" in current_state.values:
-            messages = current_state.values["messages"]
-            
-            # Grouping Logic
-            grouped_messages = []
-            current_group = []
-            
-            for msg in messages:
-                if isinstance(msg, SystemMessage): continue
-                
-                is_tool_related = False
-                if isinstance(msg, AIMessage) and hasattr(msg, "tool_calls") and msg.tool_calls:
-                    is_tool_related = True
-                elif hasattr(msg, "tool_call_id"): # ToolMessage
-                    is_tool_related = True
-                    
-                if is_tool_related:
-                    current_group.append(msg)
-                else:
-                    # Flush current group if exists
-                    if current_group:
-                        grouped_messages.append({"type": "group", "msgs": current_group})
-                        current_group = []
-                    # Add normal text message
-                    grouped_messages.append({"type": "single", "msg": msg})
-            
-            # Flush remaining group
-            if current_group:
-                grouped_messages.append({"type": "group", "msgs": current_group})
-                
-            # Render Groups
-            for item in grouped_messages:
+        # Render History (newest pages only)
+        if groups:
+            visible_groups, hidden_count = page_groups(groups, st.session_state.history_pages)
+            if hidden_count:
+                if st.button(f"⬆️ Show older messages ({hidden_count} more)", use_container_width=True):
+                    st.session_state.history_pages += 1
+                    st.rerun()
+
+            for item in visible_groups:
                 if item["type"] == "single":
-                    msg = item["msg"]
-                    role = "user"
-                    if isinstance(msg, AIMessage): role = "assistant"
-                    with st.chat_message(role):
-                        st.markdown(get_clean_content(msg))
-                        
+                    with st.chat_message(item["role"]):
+                        st.markdown(item["text"])
+
                 elif item["type"] == "group":
                     # Render text of FIRST message if it exists
-                    first_msg = item["msgs"][0]
-                    if isinstance(first_msg, AIMessage):
-                        clean_text = get_clean_content(first_msg)
-                        if clean_text:
-                            with st.chat_message("assistant"):
-                                st.markdown(clean_text)
-                    
+                    if item["text"]:
+                        with st.chat_message("assistant"):
+                            st.markdown(item["text"])
+
                     # Render Steps in Expander
                     with st.chat_message("assistant"):
                         with st.status("🛠️ Execution Log", expanded=False, state="complete"):
-                            for m in item["msgs"]:
-                                if isinstance(m, AIMessage) and m.tool_calls:
-                                    for tc in m.tool_calls:
-                                        t_name = tc['name']
-                                        t_args = tc['args']
-                                        # Smart Summary
-                                        summary = ""
-                                        if "filename" in t_args: summary = t_args["filename"]
-                                        elif "target_file" in t_args: summary = t_args["target_file"]
-                                        elif "design_file" in t_args: summary = t_args["design_file"]
-                                        
-                                        with st.expander(f"⚙️ **{t_name}** {summary}", expanded=False):
-                                            st.json(t_args)
-                                            
-                                elif hasattr(m, "tool_call_id"):
-                                    # Output
-                                    icon = "📄"
-                                    if "Success" in m.content or "PASSED" in m.content: icon = "✅"
-                                    elif "Error" in m.content or "FAILED" in m.content: icon = "❌"
-                                    
-                                    with st.expander(f"{icon} Output", expanded=False):
-                                        st.code(m.content[:500] + ("..." if len(m.content)>500 else ""))
+                            for step in item["steps"]:
+                                if step["kind"] == "call":
+                                    with st.expander(f"⚙️ **{step['name']}** {step['summary']}", expanded=False):
+                                        st.json(step["args"])
+                                else:
+                                    with st.expander(f"{step['icon']} Output", expanded=False):
+                                        st.code(step["preview"])
 
         else:
             st.info("👋 Hi! I'm the Architect. What hardware shall we build today?")
@@ -512,15 +585,19 @@ def render_workspace():
                 full_response = ""
                 total_time = 0
                 tool_start_times = {} # Map tool_call_id (or name) to start time
+                # Analytics events of this turn, written in one batch at the end
+                usage_events, tool_events, tool_issuers = [], [], {}
+                last_event_time = time.time()
+                tracer = TracingCallbackHandler(st.session_state.current_session, trace_store)
                 
                 try:
                     input_messages = []
-                    snapshot = agent_graph.get_state(config)
-                    if not snapshot.values or not snapshot.values.get("messages"):
+                    if not history.message_count:
                         input_messages.append(SystemMessage(content=SYSTEM_PROMPT))
                     
                     input_messages.append(("user", prompt))
                     config["recursion_limit"] = 50
+                    config["callbacks"] = [tracer]
                     
                     events = agent_graph.stream({"messages": input_messages}, config)
                     
@@ -537,6 +614,18 @@ def render_workspace():
                             if hasattr(msg, "usage_metadata") and msg.usage_metadata:
                                 update_token_usage(msg.usage_metadata, st.session_state.selected_model, msg.id)
 
+                            # LLM latency: time since the previous event (turn start or last tool output)
+                            now = time.time()
+                            in_t, out_t, _, cached_t = extract_usage(msg.usage_metadata or {})
+                            usage_events.append({
+                                "message_id": msg.id, "session_id": st.session_state.current_session,
+                                "model_name": st.session_state.selected_model, "ts": now,
+                                "input_tokens": in_t, "output_tokens": out_t, "cached_tokens": cached_t,
+                                "latency_ms": (now - last_event_time) * 1000,
+                                "tool_calls": len(getattr(msg, "tool_calls", None) or []),
+                            })
+                            last_event_time = now
+
                             if hasattr(msg, "tool_calls") and msg.tool_calls:
                                 for tool_call in msg.tool_calls:
                                     # Extract key info for the header
@@ -546,13 +635,10 @@ def render_workspace():
                                     
                                     # Track start time
                                     tool_start_times[t_id] = time.time()
+                                    tool_issuers[t_id] = (msg.id, t_name)
                                     
                                     # Smart Summary
-                                    summary = ""
-                                    if "filename" in t_args: summary = t_args["filename"]
-                                    elif "target_file" in t_args: summary = t_args["target_file"]
-                                    elif "design_file" in t_args: summary = t_args["design_file"]
-                                    elif "verilog_files" in t_args: summary = str(t_args["verilog_files"])
+                                    summary = tool_call_summary(t_args)
                                     
                                     # Render as Expander inside Status
                                     with status_container:
@@ -566,23 +652,36 @@ def render_workspace():
                             
                             # Calculate Duration
                             duration_str = ""
+                            duration = None
                             if t_id in tool_start_times:
                                 duration = time.time() - tool_start_times[t_id]
                                 total_time += duration
                                 duration_str = f"({duration:.1f}s)"
+                            last_event_time = time.time()
+
+                            if t_id in tool_issuers:
+                                issuer_id, t_name = tool_issuers[t_id]
+                                tool_events.append({
+                                    "tool_call_id": t_id, "message_id": issuer_id,
+                                    "session_id": st.session_state.current_session, "tool_name": t_name,
+                                    "latency_ms": duration * 1000 if duration is not None else None,
+                                    "success": int(not is_failure(str(content))),
+                                    "output_chars": len(str(content)),
+                                })
                             
                             # Render Output inside Status
                             with status_container:
                                 # Determine if success or fail for icon
-                                icon = "📄"
-                                if "Success" in content or "PASSED" in content: icon = "✅"
-                                elif "Error" in content or "FAILED" in content: icon = "❌"
+                                icon = output_icon(content)
                                 
                                 with st.expander(f"{icon} Output {duration_str}", expanded=False):
                                     st.code(content)
                                     
                             # Side Effects (Refresh UI)
-                            if "Successfully wrote" in content:
+                            if content.startswith("Successfully wrote to "):
+                                # Index the new file now; the watchdog event may not have arrived yet
+                                written = content[len("Successfully wrote to "):].strip()
+                                get_file_index(CURRENT_WORKSPACE).refresh(written)
                                 render_files() # Update tabs
                                 
                     status_container.update(label=f"Finished! (Total: {total_time:.1f}s)", state="complete", expanded=False)
@@ -590,8 +689,15 @@ def render_workspace():
                 except Exception as e:
                     status_container.update(label="Error", state="error")
                     st.error(f"❌ Error: {e}")
-                    
-        conn.close()
+                finally:
+                    # End of turn: persist this turn's usage even if the stream failed
+                    usage_buffer.flush()
+                    # Spans carry the tool-cache outcome the stream events don't
+                    spans = tracer.flush()
+                    cache_hits = {s["tool_call_id"]: s["cache_hit"] for s in spans if s["kind"] == "tool"}
+                    for event in tool_events:
+                        event["cache_hit"] = cache_hits.get(event["tool_call_id"])
+                    analytics_store.record(usage_events, tool_events)
 
 # --- Main Routing ---
 if "current_session" not in st.session_state or st.session_state.current_session is None:
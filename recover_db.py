@@ -1,60 +1,151 @@
 import os
 import sqlite3
 import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.utils.usage import estimate_cost, usage_from_messages
 
 DB_PATH = "state.db"
 WORKSPACE_DIR = "workspace"
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+def _ctime(path):
+    """Creation time of a path, or None if it vanished or can't be stat'ed."""
+    try:
+        return os.path.getctime(path)
+    except OSError:
+        return None
+
+def scan_workspace(workspace_dir, workers=16):
+    """
+    Lists session directories and stats them concurrently.
+
+    Directories that disappear (or can't be stat'ed) during the scan are skipped.
+
+    Returns:
+        dict: session_id -> creation time (datetime)
+    """
+    with os.scandir(workspace_dir) as it:
+        dirs = [entry.path for entry in it if entry.is_dir()]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ctimes = pool.map(_ctime, dirs)
+        return {os.path.basename(path): datetime.datetime.fromtimestamp(ctime)
+                for path, ctime in zip(dirs, ctimes) if ctime is not None}
+
+def rebuild_usage(conn, session_ids):
+    """
+    Rebuilds token totals from the latest checkpoint of each session.
+
+    The latest checkpoint holds the full message history, so one query fetches
+    everything; no agent graph is needed.
+
+    Returns:
+        dict: session_id -> usage_from_messages() totals (only sessions with checkpoints)
+    """
+    has_checkpoints = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'checkpoints'"
+    ).fetchone()
+    if not has_checkpoints:
+        return {}
 
-def recover_sessions():
-    if not os.path.exists(WORKSPACE_DIR):
+    # Same serializer the app's checkpointer writes with
+    serde = SqliteSaver(conn).serde
+    rows = conn.execute("""
+        SELECT c.thread_id, c.type, c.checkpoint FROM checkpoints c
+        JOIN (SELECT thread_id, MAX(checkpoint_id) AS checkpoint_id FROM checkpoints
+              WHERE checkpoint_ns = '' GROUP BY thread_id) latest
+          ON c.thread_id = latest.thread_id AND c.checkpoint_id = latest.checkpoint_id
+        WHERE c.checkpoint_ns = ''
+    """).fetchall()
+
+    usage = {}
+    for thread_id, type_, blob in rows:
+        if thread_id not in session_ids:
+            continue
+        try:
+            checkpoint = serde.loads_typed((type_, blob))
+        except Exception as e:
+            print(f"Skipping usage for {thread_id} (unreadable checkpoint: {e})")
+            continue
+        usage[thread_id] = usage_from_messages(checkpoint.get("channel_values", {}).get("messages", []))
+    return usage
+
+def recover_sessions(db_path=DB_PATH, workspace_dir=WORKSPACE_DIR, workers=16):
+    """
+    Bulk recovery of session_metadata from the workspace and the checkpoint tables.
+
+    Every session directory gets a row; sessions with checkpoints get accurate token
+    totals and cost (model taken from the provider's response metadata when present).
+    All rows are upserted in a single transaction.
+    """
+    if not os.path.exists(workspace_dir):
         print("No workspace directory found.")
         return
 
+    sessions = scan_workspace(workspace_dir, workers)
+
     # Connect to DB (creates it if missing)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Ensure Table Exists
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS session_metadata (
-            session_id TEXT PRIMARY KEY,
-            model_name TEXT,
-            created_at TIMESTAMP,
-            input_tokens INTEGER DEFAULT 0,
-            output_tokens INTEGER DEFAULT 0,
-            cached_tokens INTEGER DEFAULT 0,
-            total_tokens INTEGER DEFAULT 0,
-            total_cost REAL DEFAULT 0.0
-        )
-    """)
-    
-    # Scan Directories
-    restored_count = 0
-    for item in os.listdir(WORKSPACE_DIR):
-        item_path = os.path.join(WORKSPACE_DIR, item)
-        if os.path.isdir(item_path):
-            session_id = item
-            
-            # Check if exists
-            cursor.execute("SELECT 1 FROM session_metadata WHERE session_id = ?", (session_id,))
-            if cursor.fetchone():
-                print(f"Skipping {session_id} (already exists)")
+    conn = sqlite3.connect(db_path)
+    try:
+        # Ensure Table Exists
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_metadata (
+                session_id TEXT PRIMARY KEY,
+                model_name TEXT,
+                created_at TIMESTAMP,
+                input_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                cached_tokens INTEGER DEFAULT 0,
+                total_tokens INTEGER DEFAULT 0,
+                total_cost REAL DEFAULT 0.0
+            )
+        """)
+
+        usage = rebuild_usage(conn, sessions)
+
+        restored, bare = [], []
+        for session_id, created_at in sessions.items():
+            u = usage.get(session_id)
+            if u is None:
+                bare.append((session_id, DEFAULT_MODEL, created_at))
                 continue
-                
-            # Insert
-            print(f"Restoring {session_id}...")
-            # Use directory modification time or now
-            timestamp = datetime.datetime.fromtimestamp(os.path.getctime(item_path))
-            
-            cursor.execute("""
-                INSERT INTO session_metadata (session_id, model_name, created_at)
-                VALUES (?, ?, ?)
-            """, (session_id, "gemini-2.5-flash", timestamp))
-            restored_count += 1
-            
-    conn.commit()
-    conn.close()
-    print(f"Recovery Complete. Restored {restored_count} sessions.")
+            model = u["model_name"] or DEFAULT_MODEL
+            restored.append((
+                session_id, model, created_at,
+                # total_tokens follows SessionManager's convention (input + output + cached)
+                u["input_tokens"], u["output_tokens"], u["cached_tokens"],
+                u["input_tokens"] + u["output_tokens"] + u["cached_tokens"],
+                estimate_cost(model, u["input_tokens"], u["output_tokens"])
+            ))
+
+        with conn:
+            # Sessions with checkpoints: totals are rebuilt; an existing row keeps its model and created_at
+            conn.executemany("""
+                INSERT INTO session_metadata
+                    (session_id, model_name, created_at, input_tokens, output_tokens, cached_tokens, total_tokens, total_cost)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE SET
+                    input_tokens = excluded.input_tokens, output_tokens = excluded.output_tokens,
+                    cached_tokens = excluded.cached_tokens, total_tokens = excluded.total_tokens,
+                    total_cost = excluded.total_cost
+            """, restored)
+            # Sessions without checkpoints: bare metadata, existing rows untouched
+            conn.executemany("""
+                INSERT OR IGNORE INTO session_metadata (session_id, model_name, created_at) VALUES (?, ?, ?)
+            """, bare)
+    finally:
+        conn.close()
+
+    print(f"Recovery Complete. {len(sessions)} sessions scanned, "
+          f"{len(restored)} with usage rebuilt from checkpoints, {len(bare)} without checkpoints.")
 
 if __name__ == "__main__":
-    recover_sessions()
+    parser = argparse.ArgumentParser(description="Rebuild session metadata from the workspace and checkpoints.")
+    parser.add_argument("--db", default=DB_PATH, help="Path to state.db")
+    parser.add_argument("--workspace", default=WORKSPACE_DIR, help="Workspace directory")
+    parser.add_argument("--workers", type=int, default=16, help="Threads used to stat session directories")
+    args = parser.parse_args()
+    recover_sessions(args.db, args.workspace, args.workers)
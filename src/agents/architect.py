@@ -5,6 +5,7 @@ from langgraph.prebuilt import create_react_agent
 from langchain_core.messages import SystemMessage
 from src.tools.wrappers import architect_tools
 from src.config import DEFAULT_MODEL
+from src.utils.compaction import compaction_prompt
 
 load_dotenv()
 
@@ -17,18 +18,21 @@ Your goal is to design, verify, and synthesize hardware based on user specificat
 You have access to a workspace and a set of tools:
 1.  `write_file` / `read_file`: Manage Verilog source code.
 2.  `edit_file_tool`: Surgically replace text in a file (Use for small fixes).
-3.  `linter_tool`: Check syntax.
+    `multi_edit_tool`: Several replacements in one file in one call (prefer it over repeated `edit_file_tool` calls).
+3.  `linter_tool`: Check syntax of several files in one call (e.g. `['design.v', 'tb.v']`).
 4.  `simulation_tool`: Run testbenches.
 5.  `synthesis_tool`: Run synthesis.
 6.  `ppa_tool`: Check area/timing/power.
 7.  `waveform_tool`: Inspect VCD files for debugging.
+8.  `read_output_tool`: Page through a long tool output that was truncated (use the handle it gives you).
+9.  `describe_module_tool`: Ports, parameters and hierarchy of a module (cheaper than `read_file` when you only need its interface).
 
 **Workflow Guidelines:**
 1.  **Plan:** Break down the request.
 2.  **Implement:** Write the RTL (`design.v`) and Testbench (`tb.v`).
 3.  **Verify:**
-    *   Run `linter_tool` on both files. Fix errors if any.
-    *   Run `simulation_tool`.
+    *   Run `linter_tool` once on both files together. Fix errors if any.
+    *   Run `simulation_tool` with the testbench as `top_module`. `verilog_files` can be omitted: the files it instantiates are found automatically (the same holds for `synthesis_tool` and `cocotb_tool`).
     *   **CRITICAL**: You MUST include the following block in your testbench to enable waveform debugging:
         ```verilog
         initial begin
@@ -46,6 +50,7 @@ You have access to a workspace and a set of tools:
 *   **Formal Verification / SBY**: If the user asks for "Formal", "Proofs", or "SBY", use `sby_tool`. You will need to write a `.sby` configuration file and a formal property file (or embed properties in `design.v`).
 
 **Important:**
+*   Independent tool calls (e.g. `simulation_tool` and `synthesis_tool`) can be issued together in ONE turn; they run in parallel.
 *   Always use standard Verilog-2001 or SystemVerilog.
 *   Ensure testbenches are self-checking (print "TEST PASSED").
 *   If a tool fails, analyze the error and try to fix it. Do not give up immediately.
@@ -62,10 +67,13 @@ def create_architect_agent(checkpointer=None, model_name=DEFAULT_MODEL):
     llm = ChatGoogleGenerativeAI(model=model_name, google_api_key=os.environ.get("GOOGLE_API_KEY"))
 
     # Create the ReAct agent using the prebuilt helper
-    # This automatically handles tool calling and message history
+    # This automatically handles tool calling and message history.
+    # The prompt callable compacts old tool outputs before every model call (the
+    # checkpointed history stays complete), so per-turn cost stays flat in long sessions.
     agent_graph = create_react_agent(
         model=llm,
         tools=architect_tools,
+        prompt=compaction_prompt,
         checkpointer=checkpointer
     )
     
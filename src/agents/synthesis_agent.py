@@ -1,6 +1,7 @@
 import os
 from src.state.state import DesignState
 from src.tools.run_synthesis import run_synthesis
+from src.tools.verilog_index import get_verilog_index
 
 def synthesis_node(state: DesignState) -> DesignState:
     """
@@ -24,17 +25,15 @@ def synthesis_node(state: DesignState) -> DesignState:
         f.write(state["verilog_code"])
         
     # Run Synthesis
-    # We need to know the top module name.
-    # We can extract it from the spec or code, or just assume "top" or "dut".
-    # For the counter example, it was "counter".
-    # We should probably extract it using regex or ask the LLM.
-    # For now, let's try to regex it from the code.
-    import re
-    match = re.search(r"module\s+(\w+)", state["verilog_code"])
-    top_module = match.group(1) if match else "top"
+    # The top module is the root of design.v's instantiation hierarchy (not simply the
+    # first module in the file), taken from the workspace Verilog index.
+    index = get_verilog_index(base_path)
+    top_module = index.design_top(files=["design.v"]) or "top"
+    # Only the sources the top actually instantiates go into config.mk
+    design_files = [os.path.join(base_path, f) for f in index.files_for(top_module)] or [design_file]
     
     result = run_synthesis(
-        verilog_files=[design_file],
+        verilog_files=design_files,
         top_module=top_module,
         cwd=base_path
     )
@@ -10,3 +10,54 @@ DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "gemini-2.5-flash")
 
 def get_model_name():
     return DEFAULT_MODEL
+
+# Pricing Constants (USD per 1M tokens). Unknown models are billed at DEFAULT_MODEL rates.
+PRICING = {
+    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+    "gemini-3-pro-preview": {"input": 2.00, "output": 12.00}
+}
+
+# Max tool calls (and tool subprocesses) a single session may run at once.
+# Independent tool calls from one AI message are dispatched concurrently up to this cap.
+MAX_TOOL_CONCURRENCY = int(os.environ.get("MAX_TOOL_CONCURRENCY", "4"))
+
+# Tool-result memoization: fingerprint input files by "stat" (mtime+size) or "hash" (sha256 of contents).
+TOOL_CACHE_MODE = os.environ.get("TOOL_CACHE_MODE", "stat")
+TOOL_CACHE_SIZE = int(os.environ.get("TOOL_CACHE_SIZE", "256"))
+
+# Context compaction: once the estimated prompt exceeds CONTEXT_TOKEN_BUDGET tokens, older tool
+# outputs are compacted. The last CONTEXT_KEEP_TURNS user turns are always sent verbatim, and the
+# compaction boundary advances in blocks of CONTEXT_COMPACT_STEP messages to keep the prefix stable.
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "60000"))
+CONTEXT_KEEP_TURNS = int(os.environ.get("CONTEXT_KEEP_TURNS", "2"))
+CONTEXT_COMPACT_STEP = int(os.environ.get("CONTEXT_COMPACT_STEP", "8"))
+
+# Tool results longer than this many tokens (~4 chars each) are cut to head + tail; the full
+# text is saved under <workspace>/.tool_outputs/ and can be paged with read_output_tool.
+TOOL_OUTPUT_TOKEN_LIMIT = int(os.environ.get("TOOL_OUTPUT_TOKEN_LIMIT", "2000"))
+# Spilled outputs kept per workspace; writing a new one removes the least recently used beyond this.
+TOOL_OUTPUT_MAX_FILES = int(os.environ.get("TOOL_OUTPUT_MAX_FILES", "200"))
+
+# Token accounting: per-message usage deltas are buffered in memory and written to the session
+# metadata at most every USAGE_FLUSH_INTERVAL seconds, at the end of each turn, or once
+# USAGE_FLUSH_MAX_PENDING messages are pending (whichever comes first).
+USAGE_FLUSH_INTERVAL = float(os.environ.get("USAGE_FLUSH_INTERVAL", "5"))
+USAGE_FLUSH_MAX_PENDING = int(os.environ.get("USAGE_FLUSH_MAX_PENDING", "20"))
+
+# Checkpoint retention: keep the newest CHECKPOINT_KEEP_LAST checkpoints per thread in state.db
+# (only the latest is needed to resume). The background collector runs every CHECKPOINT_GC_INTERVAL
+# seconds (0 disables it) and frees up to CHECKPOINT_VACUUM_PAGES pages per incremental vacuum.
+CHECKPOINT_KEEP_LAST = int(os.environ.get("CHECKPOINT_KEEP_LAST", "20"))
+CHECKPOINT_GC_INTERVAL = float(os.environ.get("CHECKPOINT_GC_INTERVAL", "600"))
+CHECKPOINT_VACUUM_PAGES = int(os.environ.get("CHECKPOINT_VACUUM_PAGES", "2000"))
+
+# Schematic renderer: "netlistsvg" (resident Node process), "python" (in-process layered layout,
+# no Node needed), or "auto" (netlistsvg when Node is installed, falling back to python on failure).
+SCHEMATIC_RENDERER = os.environ.get("SCHEMATIC_RENDERER", "auto")
+# Seconds the resident netlistsvg process may take to start or to answer one render request;
+# past that it is killed (and "auto" falls back to the python layout).
+SCHEMATIC_RENDER_TIMEOUT = float(os.environ.get("SCHEMATIC_RENDER_TIMEOUT", "60"))
+
+# Lint backends, run in order after the in-process structural pre-check (stops at the first
+# backend reporting errors). "verilator" (--lint-only) is skipped when it is not installed.
+LINT_BACKENDS = os.environ.get("LINT_BACKENDS", "iverilog,verilator")
@@ -1,51 +1,119 @@
+import difflib
 import os
+import shutil
+import tempfile
 
-def replace_in_file(file_path, target_text, replacement_text):
+def apply_edits(content, edits):
     """
-    Replaces a specific block of text in a file with new content.
-    
+    Applies an ordered list of exact-text replacements to a string, in memory.
+
+    Each edit sees the result of the previous ones. Every edit is checked (found exactly
+    once) even after a failure, so all problems are reported in one go.
+
+    Args:
+        content (str): Original text.
+        edits (list): [{"target_text": str, "replacement_text": str}, ...]
+
+    Returns:
+        tuple: (new_content, errors) - errors is a list of messages, empty on success.
+    """
+    errors = []
+    for n, edit in enumerate(edits, start=1):
+        prefix = f"Edit {n}: " if len(edits) > 1 else ""
+        target = edit.get("target_text", "")
+        replacement = edit.get("replacement_text", "")
+        if not target:
+            errors.append(f"{prefix}Target text is empty.")
+            continue
+        idx = content.find(target)
+        if idx == -1:
+            errors.append(f"{prefix}Target text not found in file. "
+                          "Ensure you copied the text exactly, including whitespace.")
+            continue
+        # Safety check: Ambiguous match
+        if content.find(target, idx + 1) != -1:
+            errors.append(f"{prefix}Target text found {content.count(target)} times. "
+                          "Please provide a more unique context block.")
+            continue
+        content = content[:idx] + replacement + content[idx + len(target):]
+    return content, errors
+
+def atomic_write(file_path, content):
+    """Writes a file through a temp file in the same directory and os.replace (never half-written)."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def unified_diff(old, new, name):
+    return "".join(difflib.unified_diff(old.splitlines(keepends=True), new.splitlines(keepends=True),
+                                        fromfile=f"a/{name}", tofile=f"b/{name}"))
+
+def edit_file(file_path, edits):
+    """
+    Applies a batch of replacements to one file with a single read and a single atomic write.
+
+    Nothing is written unless every edit applies cleanly.
+
     Args:
         file_path (str): Absolute path to the file.
-        target_text (str): The exact text block to find and replace.
-        replacement_text (str): The new text to insert.
-        
+        edits (list): [{"target_text": str, "replacement_text": str}, ...], applied in order.
+
     Returns:
         dict: {
             "success": bool,
             "message": str,
-            "diff": str (optional)
+            "diff": str (optional, unified diff)
         }
     """
     if not os.path.exists(file_path):
         return {"success": False, "message": f"File not found: {file_path}"}
-        
+    if not edits:
+        return {"success": False, "message": "No edits given."}
+
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             content = f.read()
-            
-        if target_text not in content:
-            return {
-                "success": False, 
-                "message": "Target text not found in file. Ensure you copied the text exactly, including whitespace."
-            }
-            
-        # Safety check: Ambiguous match
-        if content.count(target_text) > 1:
-            return {
-                "success": False,
-                "message": f"Target text found {content.count(target_text)} times. Please provide a more unique context block."
-            }
-            
-        new_content = content.replace(target_text, replacement_text)
-        
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(new_content)
-            
+
+        new_content, errors = apply_edits(content, edits)
+        if errors:
+            note = "" if len(edits) == 1 else "\nNo changes were written."
+            return {"success": False, "message": "\n".join(errors) + note}
+
+        atomic_write(file_path, new_content)
         return {
             "success": True,
-            "message": "Successfully replaced text.",
-            "diff": f"- {target_text[:50]}...\n+ {replacement_text[:50]}..."
+            "message": "Successfully replaced text." if len(edits) == 1 else f"Successfully applied {len(edits)} edits.",
+            "diff": unified_diff(content, new_content, os.path.basename(file_path))
         }
-        
+
     except Exception as e:
         return {"success": False, "message": f"Error editing file: {str(e)}"}
+
+def replace_in_file(file_path, target_text, replacement_text):
+    """
+    Replaces a specific block of text in a file with new content.
+
+    Args:
+        file_path (str): Absolute path to the file.
+        target_text (str): The exact text block to find and replace.
+        replacement_text (str): The new text to insert.
+
+    Returns:
+        dict: {
+            "success": bool,
+            "message": str,
+            "diff": str (optional)
+        }
+    """
+    return edit_file(file_path, [{"target_text": target_text, "replacement_text": replacement_text}])
@@ -1,10 +1,255 @@
+import atexit
+import hashlib
+import json
 import os
+import queue
+import shutil
 import subprocess
+import threading
+from collections import deque
+from .netlist_svg import render_svg
 from .run_docker import run_docker_command
+from src.config import SCHEMATIC_RENDERER, SCHEMATIC_RENDER_TIMEOUT
+
+# Yosys netlists and rendered SVGs are cached per (source hash, top module) under
+# <workspace>/.schematics/<key>/: netlist.json plus one <module>.svg per rendered module.
+SCHEMATIC_DIR = ".schematics"
+_SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "netlistsvg_server.js")
+
+def _cache_key(verilog_file, top_module):
+    h = hashlib.sha256()
+    with open(verilog_file, "rb") as f:
+        h.update(f.read())
+    h.update(b"\0" + top_module.encode())
+    return h.hexdigest()[:16]
+
+def _cache_dir(cwd, key):
+    return os.path.join(cwd, SCHEMATIC_DIR, key)
+
+def _latest_pointer(cwd, top_module):
+    return os.path.join(cwd, SCHEMATIC_DIR, f"{top_module}.latest")
+
+class NetlistRenderer:
+    """
+    A resident Node process running netlistsvg (see netlistsvg_server.js).
+
+    Started once and reused for every render, so there is no per-call `npx` resolution
+    or Node start-up. Requests are serialized; a crashed process is restarted on the next call.
+    A failed start (no Node, no global netlistsvg) is remembered and not retried until close().
+    A process that doesn't answer within `timeout` seconds is killed (and restarted on the next call).
+    """
+    def __init__(self, timeout=None):
+        self.timeout = SCHEMATIC_RENDER_TIMEOUT if timeout is None else timeout
+        self._proc = None
+        self._lines = None
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._stderr = deque(maxlen=50)
+        self._start_error = None
+
+    def _start(self):
+        if self._start_error:
+            raise RuntimeError(self._start_error)
+        try:
+            self._spawn()
+        except Exception as e:
+            self._start_error = str(e)
+            raise
+
+    def _command(self):
+        node = shutil.which("node")
+        if node is None:
+            raise RuntimeError("Node.js is not installed.")
+        return [node, _SERVER_SCRIPT]
+
+    def _spawn(self):
+        command = self._command()
+        env = dict(os.environ)
+        npm = shutil.which("npm")
+        if npm and "NODE_PATH" not in env:
+            # Let require() find a globally installed netlistsvg (npm install -g netlistsvg)
+            root = subprocess.run([npm, "root", "-g"], capture_output=True, text=True).stdout.strip()
+            if root:
+                env["NODE_PATH"] = root
+        self._proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE, text=True, env=env)
+        # Drain stderr continuously so a chatty process can never block on a full pipe
+        self._stderr.clear()
+        threading.Thread(target=lambda p=self._proc: self._stderr.extend(p.stderr), daemon=True).start()
+        # stdout is read on its own thread too, so every reply can be awaited with a deadline
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read_stdout, args=(self._proc, self._lines), daemon=True).start()
+        ready = self._readline()
+        if not ready:
+            self._proc.wait()
+            self._proc = None
+            raise RuntimeError(f"netlistsvg renderer failed to start: {''.join(self._stderr).strip()}")
+
+    @staticmethod
+    def _read_stdout(proc, lines):
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put("")  # EOF: the process exited
+
+    def _readline(self):
+        """Next stdout line ("" once the process exited). Kills the process if none comes in time."""
+        try:
+            return self._lines.get(timeout=self.timeout)
+        except queue.Empty:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+            raise RuntimeError(f"netlistsvg renderer did not answer within {self.timeout:g}s.")
+
+    def render(self, netlist):
+        """Renders a yosys JSON netlist (dict) to SVG text. Raises RuntimeError on failure."""
+        with self._lock:
+            for attempt in range(2):
+                if self._proc is None or self._proc.poll() is not None:
+                    self._start()
+                self._next_id += 1
+                try:
+                    self._proc.stdin.write(json.dumps({"id": self._next_id, "netlist": netlist}) + "\n")
+                    self._proc.stdin.flush()
+                except (BrokenPipeError, OSError):
+                    line = ""
+                else:
+                    # A hung render raises here (process killed), so "auto" falls back instead of blocking
+                    line = self._readline()
+                if line:
+                    response = json.loads(line)
+                    if "error" in response:
+                        raise RuntimeError(response["error"])
+                    return response["svg"]
+                # Process died mid-request: restart once
+                self._proc = None
+            raise RuntimeError("netlistsvg renderer exited unexpectedly.")
+
+    def close(self):
+        with self._lock:
+            self._start_error = None
+            if self._proc is not None and self._proc.poll() is None:
+                self._proc.stdin.close()
+                self._proc.terminate()
+            self._proc = None
+
+_renderer = NetlistRenderer()
+atexit.register(_renderer.close)
+
+def get_renderer():
+    return _renderer
+
+def render_netlist(netlist, module, renderer=None):
+    """
+    Renders one module to SVG text with the configured renderer (see SCHEMATIC_RENDERER).
+
+    In "auto" mode netlistsvg is used when Node is available; if it is missing or fails,
+    the in-process layered layout (netlist_svg.render_svg) draws the module instead.
+    """
+    renderer = renderer or SCHEMATIC_RENDERER
+    if renderer == "python":
+        return render_svg(netlist, module)
+    try:
+        return get_renderer().render(module_netlist(netlist, module))
+    except Exception:
+        if renderer == "netlistsvg":
+            raise
+        return render_svg(netlist, module)
+
+def module_netlist(netlist, module):
+    """A copy of the netlist holding only `module`, marked as top (what netlistsvg draws)."""
+    mod = dict(netlist["modules"][module])
+    mod["attributes"] = {**mod.get("attributes", {}), "top": "00000000000000000000000000000001"}
+    return {**netlist, "modules": {module: mod}}
+
+def _build_netlist(verilog_file, top_module, cwd, cache_dir):
+    """Runs yosys (Docker) once per source version and stores netlist.json in cache_dir."""
+    netlist_path = os.path.join(cache_dir, "netlist.json")
+    if os.path.exists(netlist_path):
+        return netlist_path, None
+
+    # 1. Generate JSON using Yosys (Docker)
+    # We need to map the file to the container path
+    if cwd in verilog_file:
+        rel_path = os.path.relpath(verilog_file, cwd).replace("\\", "/")
+        container_input = f"/workspace/{rel_path}"
+    else:
+        container_input = f"/workspace/{os.path.basename(verilog_file)}"
+
+    os.makedirs(cache_dir, exist_ok=True)
+    rel_json = os.path.relpath(netlist_path, cwd).replace("\\", "/")
+    container_json_output = f"/workspace/{rel_json}"
+
+    # Yosys command: Hierarchy -> Proc -> Opt -> Write JSON
+    yosys_cmd = f"yosys -p 'read_verilog {container_input}; hierarchy -top {top_module}; proc; opt; write_json {container_json_output}'"
+
+    print(f"🚀 Generating Schematic JSON for {top_module}...")
+    result = run_docker_command(command=yosys_cmd, workspace_path=cwd)
+
+    if not result['success']:
+        return None, f"Yosys Failed: {result['stderr']}"
+    if not os.path.exists(netlist_path):
+        return None, "JSON file was not generated by Yosys."
+    return netlist_path, None
+
+def list_modules(cwd, top_module):
+    """Modules in the latest cached netlist of `top_module` (top first), or [] if none."""
+    pointer = _latest_pointer(cwd, top_module)
+    if not os.path.exists(pointer):
+        return []
+    with open(pointer) as f:
+        netlist_path = os.path.join(_cache_dir(cwd, f.read().strip()), "netlist.json")
+    if not os.path.exists(netlist_path):
+        return []
+    with open(netlist_path) as f:
+        modules = list(json.load(f)["modules"])
+    return sorted(modules, key=lambda m: (m != top_module, m))
+
+def render_module(cwd, top_module, module=None):
+    """
+    Renders one module of the latest cached netlist of `top_module`, on demand.
+
+    Each module's SVG is rendered at most once per source version, so browsing a big
+    hierarchy only ever renders the modules actually viewed.
+
+    Returns:
+        dict: {"success": bool, "svg_path": str, "error": str}
+    """
+    module = module or top_module
+    pointer = _latest_pointer(cwd, top_module)
+    if not os.path.exists(pointer):
+        return {"success": False, "error": f"No schematic netlist for {top_module}. Generate it first."}
+    with open(pointer) as f:
+        cache_dir = _cache_dir(cwd, f.read().strip())
+
+    svg_path = os.path.join(cache_dir, f"{module}.svg")
+    if os.path.exists(svg_path):
+        return {"success": True, "svg_path": svg_path}
+
+    with open(os.path.join(cache_dir, "netlist.json")) as f:
+        netlist = json.load(f)
+    if module not in netlist.get("modules", {}):
+        return {"success": False, "error": f"Module {module} not found in netlist."}
+
+    print(f"🎨 Rendering SVG for {module}...")
+    try:
+        svg = render_netlist(netlist, module)
+    except Exception as e:
+        return {"success": False, "error": f"Schematic rendering failed: {e}"}
+
+    tmp_path = svg_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(svg)
+    os.replace(tmp_path, svg_path)
+    return {"success": True, "svg_path": svg_path}
 
 def generate_schematic(verilog_file, top_module, cwd=None):
     """
-    Generates an SVG schematic from a Verilog file using Yosys and NetlistSVG.
+    Generates an SVG schematic from a Verilog file using Yosys and NetlistSVG (or the built-in layout).
+
+    The yosys netlist and the SVG are cached by source hash and top module, so an
+    unchanged design is served from <cwd>/.schematics/ without running either tool.
+    Only the top module is rendered here; submodules are rendered lazily by render_module.
     
     Args:
         verilog_file (str): Absolute path to the Verilog file.
@@ -20,52 +265,21 @@ def generate_schematic(verilog_file, top_module, cwd=None):
     """
     if cwd is None:
         cwd = os.path.dirname(verilog_file)
-        
-    # 1. Generate JSON using Yosys (Docker)
-    # We need to map the file to the container path
-    if cwd in verilog_file:
-        rel_path = os.path.relpath(verilog_file, cwd).replace("\\", "/")
-        container_input = f"/workspace/{rel_path}"
-    else:
-        container_input = f"/workspace/{os.path.basename(verilog_file)}"
-        
-    json_filename = f"{top_module}_schematic.json"
-    svg_filename = f"{top_module}_schematic.svg"
-    
-    container_json_output = f"/workspace/{json_filename}"
-    
-    # Yosys command: Hierarchy -> Proc -> Opt -> Write JSON
-    yosys_cmd = f"yosys -p 'read_verilog {container_input}; hierarchy -top {top_module}; proc; opt; write_json {container_json_output}'"
-    
-    print(f"🚀 Generating Schematic JSON for {top_module}...")
-    result = run_docker_command(command=yosys_cmd, workspace_path=cwd)
-    
-    if not result['success']:
-        return {"success": False, "error": f"Yosys Failed: {result['stderr']}"}
-        
-    # 2. Generate SVG using NetlistSVG (Local Node.js)
-    local_json_path = os.path.join(cwd, json_filename)
-    local_svg_path = os.path.join(cwd, svg_filename)
-    
-    if not os.path.exists(local_json_path):
-        return {"success": False, "error": "JSON file was not generated by Yosys."}
-        
-    print(f"🎨 Rendering SVG using NetlistSVG...")
-    try:
-        # npx -y netlistsvg input.json -o output.svg
-        cmd = ["npx", "-y", "netlistsvg", local_json_path, "-o", local_svg_path]
-        
-        # Run local command (shell=True for Windows npx resolution sometimes needed, but list is safer)
-        # On Windows, npx might be a batch file, so shell=True might be needed or full path.
-        # Let's try shell=True for npx on Windows.
-        subprocess.run(cmd, cwd=cwd, check=True, shell=True, capture_output=True)
-        
-        if os.path.exists(local_svg_path):
-            return {"success": True, "svg_path": local_svg_path}
-        else:
-            return {"success": False, "error": "NetlistSVG finished but SVG file not found."}
-            
-    except subprocess.CalledProcessError as e:
-        return {"success": False, "error": f"NetlistSVG Failed: {e.stderr.decode() if e.stderr else str(e)}"}
-    except Exception as e:
-        return {"success": False, "error": f"SVG Generation Error: {str(e)}"}
+
+    key = _cache_key(verilog_file, top_module)
+    cache_dir = _cache_dir(cwd, key)
+    _, error = _build_netlist(verilog_file, top_module, cwd, cache_dir)
+    if error:
+        return {"success": False, "error": error}
+
+    with open(_latest_pointer(cwd, top_module), "w") as f:
+        f.write(key)
+
+    result = render_module(cwd, top_module)
+    if not result["success"]:
+        return result
+
+    # The Schematic tab lists <top>_schematic.svg files in the workspace root
+    local_svg_path = os.path.join(cwd, f"{top_module}_schematic.svg")
+    shutil.copyfile(result["svg_path"], local_svg_path)
+    return {"success": True, "svg_path": local_svg_path}
@@ -0,0 +1,156 @@
+import re
+
+# In-process structural checks run before any linter subprocess. They only report what is
+# certainly wrong (unbalanced blocks, ports never declared), so a clean precheck says nothing.
+
+_COMMENT_OR_STRING_RE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"', re.DOTALL)
+_DEFINE_RE = re.compile(r"^[ \t]*`define\b(?:[^\n]*\\\n)*[^\n]*", re.MULTILINE)
+_CONDITIONAL_RE = re.compile(r"`(ifdef|ifndef|elsif)\b")
+_INCLUDE_RE = re.compile(r"`include\b")
+_BLOCK_RE = re.compile(r"\b(module|macromodule|endmodule|begin|end)\b")
+_DIRECTION_RE = re.compile(r"\b(input|output|inout)\b([^;]*);")
+_ANSI_RE = re.compile(r"\b(input|output|inout)\b")
+_MODULE_RE = re.compile(r"\b(?:module|macromodule)\s+([A-Za-z_][A-Za-z0-9_$]*)")
+_ENDMODULE_RE = re.compile(r"\bendmodule\b")
+_RANGE_RE = re.compile(r"\[[^\]]*\]")
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+_DECL_KEYWORDS = {"wire", "reg", "logic", "signed", "unsigned", "integer", "real", "time", "tri", "var",
+                  "input", "output", "inout"}
+
+def _blank(match):
+    """Replaces a comment/string/define with spaces, keeping its newlines (and so line numbers)."""
+    return re.sub(r"[^\n]", " ", match.group(0))
+
+def strip_source(text):
+    """Source text with comments, strings and `define bodies blanked out."""
+    return _DEFINE_RE.sub(_blank, _COMMENT_OR_STRING_RE.sub(_blank, text))
+
+def _line_of(text, pos):
+    return text.count("\n", 0, pos) + 1
+
+def _balanced(text, pos, open_char="(", close_char=")"):
+    """End index (exclusive) of the bracket group starting at text[pos], or None if unbalanced."""
+    depth = 0
+    for i in range(pos, len(text)):
+        if text[i] == open_char:
+            depth += 1
+        elif text[i] == close_char:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+def _error(filename, line, message):
+    return {"file": filename, "line": line, "severity": "error", "message": message}
+
+def check_blocks(text, filename):
+    """
+    module/endmodule and begin/end balance. `text` must already be stripped.
+
+    begin/end are only tracked inside module...endmodule: SystemVerilog packages, interfaces,
+    programs and classes have their own blocks, which this check does not parse.
+    """
+    # Conditional compilation can legitimately make the raw token stream unbalanced
+    # (e.g. two `ifdef variants of one module header): nothing can be said for certain
+    if _CONDITIONAL_RE.search(text):
+        return []
+    diagnostics = []
+    stack = []  # (keyword, line)
+    pos, line = 0, 1
+    for m in _BLOCK_RE.finditer(text):
+        # Count newlines incrementally: keeps big files linear
+        line += text.count("\n", pos, m.start())
+        pos, word = m.start(), m.group(1)
+        if word in ("module", "macromodule"):
+            if stack:
+                diagnostics.append(_error(filename, stack[0][1], "'module' has no matching 'endmodule' "
+                                          f"(next module starts at line {line})."))
+                stack = []
+            stack.append(("module", line))
+        elif word == "endmodule":
+            if not stack:
+                diagnostics.append(_error(filename, line, "'endmodule' without matching 'module'."))
+                continue
+            for _, opened in stack[1:]:
+                diagnostics.append(_error(filename, opened, "'begin' is not closed before 'endmodule' "
+                                          f"at line {line}."))
+            stack = []
+        elif not stack:
+            continue
+        elif word == "begin":
+            stack.append(("begin", line))
+        elif word == "end":
+            if len(stack) > 1:
+                stack.pop()
+            else:
+                diagnostics.append(_error(filename, line, "'end' without matching 'begin'."))
+    for keyword, opened in stack:
+        diagnostics.append(_error(filename, opened, f"'{keyword}' is never closed."))
+    return diagnostics
+
+def _header_ports(text, pos):
+    """
+    Port list of a non-ANSI module header starting after the module name at `pos`.
+
+    Returns:
+        tuple: (names, body_start) or (None, body_start) when the header is ANSI-style or can't be parsed.
+    """
+    i = pos
+    while i < len(text) and text[i].isspace():
+        i += 1
+    if text.startswith("#", i):
+        j = text.find("(", i)
+        end = _balanced(text, j) if j != -1 else None
+        if end is None:
+            return None, pos
+        i = end
+        while i < len(text) and text[i].isspace():
+            i += 1
+    if not text.startswith("(", i):
+        return None, i
+    end = _balanced(text, i)
+    if end is None:
+        return None, i
+    port_list = text[i + 1:end - 1]
+    if _ANSI_RE.search(port_list):
+        return None, end
+    names = []
+    for item in port_list.split(","):
+        item = item.strip()
+        # Port expressions (.a(x), {a,b}, a[3:0]) are not simple declarations: skip them
+        if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_$]*", item):
+            names.append(item)
+    return names, end
+
+def check_ports(text, filename):
+    """Ports named in a non-ANSI module header but never declared input/output/inout."""
+    diagnostics = []
+    for m in _MODULE_RE.finditer(text):
+        names, body_start = _header_ports(text, m.end())
+        if not names:
+            continue
+        end = _ENDMODULE_RE.search(text, body_start)
+        body = text[body_start:end.start() if end else len(text)]
+        # Declarations may come from an included file the precheck doesn't read
+        if _INCLUDE_RE.search(body):
+            continue
+        declared = set()
+        for decl in _DIRECTION_RE.finditer(body):
+            part = _RANGE_RE.sub(" ", decl.group(0)).split("=")[0]
+            declared.update(w for w in _IDENT_RE.findall(part) if w not in _DECL_KEYWORDS)
+        for name in names:
+            if name not in declared:
+                diagnostics.append(_error(filename, _line_of(text, m.start()),
+                                          f"Port '{name}' of module '{m.group(1)}' is never declared "
+                                          "input, output or inout."))
+    return diagnostics
+
+def precheck_source(text, filename):
+    """
+    Structural pre-check of one Verilog source (milliseconds, no subprocess).
+
+    Returns:
+        list: Diagnostics in the lint_files format ({"file", "line", "severity", "message"}).
+    """
+    stripped = strip_source(text)
+    return check_blocks(stripped, filename) + check_ports(stripped, filename)
@@ -0,0 +1,222 @@
+from collections import defaultdict, deque
+from xml.sax.saxutils import escape
+
+# Geometry (SVG user units)
+LAYER_GAP = 160
+NODE_WIDTH = 100
+PORT_PITCH = 14
+NODE_GAP = 20
+MARGIN = 40
+# Barycenter ordering passes (down + up sweeps); more passes = fewer crossings, slower.
+ORDERING_SWEEPS = 4
+
+def _module_graph(module):
+    """
+    Builds the driver -> sink graph of one yosys module.
+
+    Nodes are module ports ("port:<name>") and cells ("cell:<name>"). Constant bits
+    ("0", "1", "x", "z") are not drawn.
+
+    Returns:
+        tuple: (nodes dict id -> {"kind", "label", "type", "inputs", "outputs"}, edges set of (src, dst))
+    """
+    nodes = {}
+    drivers = {}              # bit -> node id
+    sinks = defaultdict(list) # bit -> [node id]
+
+    for name, port in module.get("ports", {}).items():
+        nid = f"port:{name}"
+        direction = port.get("direction", "input")
+        nodes[nid] = {"kind": direction, "label": name, "type": direction, "inputs": [], "outputs": []}
+        for bit in port.get("bits", []):
+            if isinstance(bit, str):
+                continue
+            if direction == "input":
+                drivers[bit] = nid
+            else:
+                sinks[bit].append(nid)
+
+    for name, cell in module.get("cells", {}).items():
+        nid = f"cell:{name}"
+        directions = cell.get("port_directions", {})
+        node = {"kind": "cell", "label": name, "type": cell.get("type", "?"), "inputs": [], "outputs": []}
+        for pin, bits in cell.get("connections", {}).items():
+            # Without port_directions (blackbox cells) assume outputs are named Y/Q/O*
+            direction = directions.get(pin) or ("output" if pin[:1] in ("Y", "Q", "O") else "input")
+            (node["outputs"] if direction == "output" else node["inputs"]).append(pin)
+            for bit in bits:
+                if isinstance(bit, str):
+                    continue
+                if direction == "output":
+                    drivers[bit] = nid
+                else:
+                    sinks[bit].append(nid)
+        nodes[nid] = node
+
+    edges = set()
+    for bit, targets in sinks.items():
+        src = drivers.get(bit)
+        if src is None:
+            continue
+        for dst in targets:
+            if dst != src:
+                edges.add((src, dst))
+    return nodes, edges
+
+def _break_cycles(nodes, edges):
+    """Reverses back edges found by an iterative DFS so the graph becomes acyclic."""
+    out = defaultdict(list)
+    for src, dst in edges:
+        out[src].append(dst)
+    state = {}
+    reversed_edges = set()
+    # Start from inputs first so feedback is reversed at the register end, not the input
+    order = sorted(nodes, key=lambda n: nodes[n]["kind"] != "input")
+    for root in order:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(out[root]))]
+        while stack:
+            node, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                state[node] = 2
+                stack.pop()
+            elif state.get(nxt) == 1:
+                reversed_edges.add((node, nxt))
+            elif nxt not in state:
+                state[nxt] = 1
+                stack.append((nxt, iter(out[nxt])))
+    return {(d, s) if (s, d) in reversed_edges else (s, d) for s, d in edges}
+
+def _assign_layers(nodes, dag):
+    """Longest-path layering; input ports sit in layer 0 and output ports in the last layer."""
+    indeg = {n: 0 for n in nodes}
+    out = defaultdict(list)
+    for src, dst in dag:
+        out[src].append(dst)
+        indeg[dst] += 1
+    layer = {n: 0 for n in nodes}
+    queue = deque(n for n in nodes if indeg[n] == 0)
+    while queue:
+        n = queue.popleft()
+        for m in out[n]:
+            layer[m] = max(layer[m], layer[n] + 1)
+            indeg[m] -= 1
+            if indeg[m] == 0:
+                queue.append(m)
+    last = max(layer.values(), default=0)
+    if any(nodes[n]["kind"] == "output" for n in nodes):
+        last = max(last, 1)
+    for n, info in nodes.items():
+        if info["kind"] == "input":
+            layer[n] = 0
+        elif info["kind"] == "output":
+            layer[n] = last
+    return layer
+
+def _order_layers(layer, dag):
+    """Barycenter heuristic: alternately sort each layer by the mean position of its neighbours."""
+    layers = defaultdict(list)
+    for n in sorted(layer):
+        layers[layer[n]].append(n)
+    preds, succs = defaultdict(list), defaultdict(list)
+    for src, dst in dag:
+        preds[dst].append(src)
+        succs[src].append(dst)
+
+    pos = {n: i for nodes in layers.values() for i, n in enumerate(nodes)}
+    depth = sorted(layers)
+    for sweep in range(ORDERING_SWEEPS):
+        downward = sweep % 2 == 0
+        neighbours = preds if downward else succs
+        for l in (depth[1:] if downward else reversed(depth[:-1])):
+            def barycenter(n):
+                ns = neighbours[n]
+                return sum(pos[m] for m in ns) / len(ns) if ns else pos[n]
+            layers[l].sort(key=barycenter)
+            for i, n in enumerate(layers[l]):
+                pos[n] = i
+    return layers
+
+def _node_height(info):
+    return max(len(info["inputs"]), len(info["outputs"]), 1) * PORT_PITCH + PORT_PITCH
+
+def layout_module(module):
+    """
+    Layered (Sugiyama-style) layout of one yosys module.
+
+    Returns:
+        tuple: (nodes with "x", "y", "h" set, edges as (src, dst), width, height)
+    """
+    nodes, edges = _module_graph(module)
+    dag = _break_cycles(nodes, edges)
+    layer = _assign_layers(nodes, dag)
+    layers = _order_layers(layer, dag)
+
+    height = 0
+    for l, members in layers.items():
+        y = MARGIN
+        for n in members:
+            info = nodes[n]
+            info["h"] = _node_height(info)
+            info["x"] = MARGIN + l * (NODE_WIDTH + LAYER_GAP)
+            info["y"] = y
+            y += info["h"] + NODE_GAP
+        height = max(height, y)
+    width = MARGIN * 2 + (max(layers, default=0) + 1) * (NODE_WIDTH + LAYER_GAP) - LAYER_GAP
+    return nodes, edges, width, height + MARGIN
+
+def render_svg(netlist, module=None):
+    """
+    Renders a yosys write_json netlist to SVG text, in-process.
+
+    Args:
+        netlist (dict): Parsed yosys JSON.
+        module (str): Module to draw (default: the one marked top, else the first).
+    """
+    modules = netlist.get("modules", {})
+    if module is None:
+        module = next((m for m, d in modules.items() if "top" in d.get("attributes", {})), next(iter(modules), None))
+    if module is None:
+        raise ValueError("Netlist has no modules.")
+
+    nodes, edges, width, height = layout_module(modules[module])
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="monospace" font-size="10">',
+        f'<title>{escape(module)}</title>',
+        '<g fill="none" stroke="#555" stroke-width="1">',
+    ]
+    for src, dst in sorted(edges):
+        a, b = nodes[src], nodes[dst]
+        x1, y1 = a["x"] + NODE_WIDTH, a["y"] + a["h"] / 2
+        x2, y2 = b["x"], b["y"] + b["h"] / 2
+        if x2 <= x1:
+            # Feedback edge: loop below the nodes
+            low = max(a["y"] + a["h"], b["y"] + b["h"]) + NODE_GAP / 2
+            parts.append(f'<path d="M{x1},{y1} C{x1 + 40},{y1} {x1 + 40},{low} {x1},{low} '
+                         f'L{x2},{low} C{x2 - 40},{low} {x2 - 40},{y2} {x2},{y2}" stroke="#c44"/>')
+        else:
+            mid = (x1 + x2) / 2
+            parts.append(f'<path d="M{x1},{y1} C{mid},{y1} {mid},{y2} {x2},{y2}"/>')
+    parts.append('</g>')
+
+    for nid, info in nodes.items():
+        x, y, h = info["x"], info["y"], info["h"]
+        label = escape(info["label"])
+        if info["kind"] == "cell":
+            parts.append(f'<rect x="{x}" y="{y}" width="{NODE_WIDTH}" height="{h}" rx="4" '
+                         f'fill="#eef3fb" stroke="#335"/>')
+            parts.append(f'<text x="{x + NODE_WIDTH / 2}" y="{y + 12}" text-anchor="middle" '
+                         f'font-weight="bold">{escape(info["type"].lstrip("$"))}</text>')
+            parts.append(f'<text x="{x + NODE_WIDTH / 2}" y="{y + h - 4}" text-anchor="middle" '
+                         f'fill="#666">{label[:16]}</text>')
+        else:
+            fill = "#e8f6e8" if info["kind"] == "input" else "#fbeaea"
+            parts.append(f'<polygon points="{x},{y} {x + NODE_WIDTH - 12},{y} {x + NODE_WIDTH},{y + h / 2} '
+                         f'{x + NODE_WIDTH - 12},{y + h} {x},{y + h}" fill="{fill}" stroke="#353"/>')
+            parts.append(f'<text x="{x + 6}" y="{y + h / 2 + 4}">{label[:14]}</text>')
+    parts.append('</svg>')
+    return "\n".join(parts)
@@ -0,0 +1,32 @@
+// Resident netlistsvg renderer used by generate_schematic.py.
+// Reads one JSON request per line on stdin: {"id": n, "netlist": {...yosys json...}}
+// and answers one JSON line per request on stdout: {"id": n, "svg": "..."} or {"id": n, "error": "..."}.
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+// Requires a global install: npm install -g netlistsvg (NODE_PATH is set to `npm root -g`).
+const netlistsvg = require('netlistsvg');
+
+function loadSkin() {
+    const pkgDir = path.dirname(require.resolve('netlistsvg/package.json'));
+    return fs.readFileSync(path.join(pkgDir, 'lib', 'default.svg'), 'utf8');
+}
+
+const skin = loadSkin();
+const rl = readline.createInterface({ input: process.stdin });
+
+rl.on('line', (line) => {
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        process.stdout.write(JSON.stringify({ id: null, error: 'Bad request: ' + e.message }) + '\n');
+        return;
+    }
+    netlistsvg.render(skin, request.netlist)
+        .then((svg) => process.stdout.write(JSON.stringify({ id: request.id, svg: svg }) + '\n'))
+        .catch((e) => process.stdout.write(JSON.stringify({ id: request.id, error: String(e) }) + '\n'));
+});
+
+// Signal readiness once the module and skin are loaded
+process.stdout.write(JSON.stringify({ ready: true }) + '\n');
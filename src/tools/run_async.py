@@ -0,0 +1,86 @@
+import asyncio
+import os
+import threading
+import weakref
+
+from src.config import MAX_TOOL_CONCURRENCY
+
+# One semaphore per (event loop, workspace). asyncio primitives are bound to the
+# loop they are first used on, so we keep a separate table for every loop.
+_session_semaphores = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+def session_semaphore(workspace, limit=None):
+    """
+    Returns the asyncio.Semaphore that caps concurrent tool subprocesses for a session.
+
+    Args:
+        workspace (str): Session workspace directory (one session == one workspace).
+        limit (int): Max concurrent subprocesses (default: MAX_TOOL_CONCURRENCY).
+    """
+    loop = asyncio.get_running_loop()
+    key = os.path.abspath(workspace)
+    with _semaphores_lock:
+        per_loop = _session_semaphores.setdefault(loop, {})
+        if key not in per_loop:
+            per_loop[key] = asyncio.Semaphore(limit or MAX_TOOL_CONCURRENCY)
+        return per_loop[key]
+
+async def run_command_async(cmd, cwd=None, timeout=60, env=None, timeout_message=None):
+    """
+    Runs a command with asyncio subprocesses (non-blocking counterpart of subprocess.Popen).
+
+    Args:
+        cmd (list): Command and arguments.
+        cwd (str): Working directory for execution.
+        timeout (int): Timeout in seconds.
+        env (dict): Optional environment for the child process.
+        timeout_message (str): stderr text to report on timeout.
+
+    Returns:
+        dict: {
+            "success": bool,
+            "stdout": str,
+            "stderr": str,
+            "command": str
+        }
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+
+    command_str = " ".join(cmd)
+    proc = None
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=cwd,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+
+        return {
+            "success": proc.returncode == 0,
+            "stdout": stdout.decode(errors="replace"),
+            "stderr": stderr.decode(errors="replace"),
+            "command": command_str
+        }
+    except asyncio.TimeoutError:
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": timeout_message or "Error: Command timed out.",
+            "command": command_str
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": f"Execution Error: {str(e)}",
+            "command": command_str
+        }
+    finally:
+        if proc and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
@@ -1,6 +1,7 @@
 import subprocess
 import os
 import sys
+from .run_async import run_command_async
 
 def run_docker_command(command, image="openroad/orfs:latest", cwd="/OpenROAD-flow-scripts/flow", workspace_path=None, volumes=None, timeout=3600):
     """
@@ -23,39 +24,7 @@ def run_docker_command(command, image="openroad/orfs:latest", cwd="/OpenROAD-flo
             "command": str
         }
     """
-    
-    # Resolve workspace path
-    if workspace_path is None:
-        # Assuming this file is in src/tools/
-        base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        workspace_path = os.path.join(base_path, "workspace")
-    
-    # Ensure workspace exists
-    if not os.path.exists(workspace_path):
-        os.makedirs(workspace_path)
-
-    # Convert command list to string if necessary
-    if isinstance(command, list):
-        command = " ".join(command)
-
-    # Construct Docker command
-    # We use --rm to clean up the container after exit
-    # We mount the workspace to /workspace
-    docker_cmd = [
-        "docker", "run", "--rm",
-        "-v", f"{workspace_path}:/workspace"
-    ]
-    
-    # Add custom volumes
-    if volumes:
-        for vol in volumes:
-            docker_cmd.extend(["-v", vol])
-
-    docker_cmd.extend([
-        "-w", cwd,
-        image,
-        "bash", "-c", command
-    ])
+    docker_cmd = _build_docker_cmd(command, image, cwd, workspace_path, volumes)
 
     proc = None
     try:
@@ -94,3 +63,48 @@ def run_docker_command(command, image="openroad/orfs:latest", cwd="/OpenROAD-flo
     finally:
         if proc and proc.poll() is None:
             proc.kill()
+
+async def arun_docker_command(command, image="openroad/orfs:latest", cwd="/OpenROAD-flow-scripts/flow", workspace_path=None, volumes=None, timeout=3600):
+    """
+    Async variant of run_docker_command. Same arguments and return value.
+    """
+    docker_cmd = _build_docker_cmd(command, image, cwd, workspace_path, volumes)
+    return await run_command_async(docker_cmd, timeout=timeout,
+                                   timeout_message="Error: Docker command timed out.")
+
+def _build_docker_cmd(command, image, cwd, workspace_path, volumes):
+    """Builds the `docker run` argument list (creating the workspace if needed)."""
+    # Resolve workspace path
+    if workspace_path is None:
+        # Assuming this file is in src/tools/
+        base_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        workspace_path = os.path.join(base_path, "workspace")
+    
+    # Ensure workspace exists
+    if not os.path.exists(workspace_path):
+        os.makedirs(workspace_path)
+
+    # Convert command list to string if necessary
+    if isinstance(command, list):
+        command = " ".join(command)
+
+    # Construct Docker command
+    # We use --rm to clean up the container after exit
+    # We mount the workspace to /workspace
+    docker_cmd = [
+        "docker", "run", "--rm",
+        "-v", f"{workspace_path}:/workspace"
+    ]
+    
+    # Add custom volumes
+    if volumes:
+        for vol in volumes:
+            docker_cmd.extend(["-v", vol])
+
+    docker_cmd.extend([
+        "-w", cwd,
+        image,
+        "bash", "-c", command
+    ])
+
+    return docker_cmd
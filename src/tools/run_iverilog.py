@@ -1,6 +1,7 @@
 import subprocess
 import os
 import shutil
+from .run_async import run_command_async
 
 def run_iverilog(verilog_files, output_executable="simulation.out", cwd=None, timeout=60):
     """
@@ -110,3 +111,34 @@ def run_iverilog(verilog_files, output_executable="simulation.out", cwd=None, ti
     finally:
         if proc and proc.poll() is None:
             proc.kill()
+
+async def arun_iverilog(verilog_files, output_executable="simulation.out", cwd=None, timeout=60):
+    """
+    Async variant of run_iverilog (asyncio subprocesses for compile and vvp).
+    Same arguments and return value as run_iverilog.
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+
+    if not shutil.which("iverilog"):
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": "Error: 'iverilog' executable not found in PATH.",
+            "command": "shutil.which('iverilog')"
+        }
+
+    # 1. Compile
+    compile_cmd = ["iverilog", "-g2012", "-o", output_executable] + verilog_files
+    result = await run_command_async(compile_cmd, cwd=cwd, timeout=timeout,
+                                     timeout_message="Error: Compilation timed out.")
+    if not result["success"]:
+        if result["stderr"].startswith(("Error:", "Execution Error")):
+            return result
+        result["stderr"] = f"Compilation Failed:\n{result['stderr']}"
+        return result
+
+    # 2. Run Simulation (vvp)
+    run_cmd = ["vvp", output_executable]
+    return await run_command_async(run_cmd, cwd=cwd, timeout=timeout,
+                                   timeout_message="Error: Simulation timed out (possible infinite loop).")
@@ -1,6 +1,26 @@
+import abc
+import hashlib
+import re
 import subprocess
 import os
 import shutil
+import threading
+from collections import OrderedDict
+from .lint_precheck import precheck_source
+from .run_async import run_command_async
+from src.config import LINT_BACKENDS
+
+# Batch lint results, keyed by the backends used and the (file name, content hash) pairs of the linted set.
+LINT_CACHE_SIZE = 128
+# iverilog diagnostics: "<file>:<line>: [error|warning|sorry: ]<message>"
+_DIAGNOSTIC_RE = re.compile(r"^(?P<file>[^:\n]+):(?P<line>\d+):\s*(?:(?P<severity>error|warning|sorry|note)\s*:\s*)?(?P<message>.*)$")
+# Summary lines that carry no information beyond the diagnostics themselves
+_SUMMARY_RE = re.compile(r"^(\d+ error\(s\)|Elaboration failed|I give up\.)", re.IGNORECASE)
+# Verilator diagnostics: "%Error[-CODE]: <file>:<line>:[<col>:] <message>" / "%Warning-CODE: ..."
+_VERILATOR_RE = re.compile(r"^%(?P<severity>Error|Warning)(?:-(?P<code>[A-Z0-9_]+))?:\s*(?P<file>[^:\n]+):(?P<line>\d+):(?:\d+:)?\s*(?P<message>.*)$")
+
+_lint_cache = OrderedDict()
+_lint_cache_lock = threading.Lock()
 
 def run_linter(verilog_files, cwd=None, timeout=30):
     """
@@ -75,3 +95,308 @@ def run_linter(verilog_files, cwd=None, timeout=30):
     finally:
         if proc and proc.poll() is None:
             proc.kill()
+
+async def arun_linter(verilog_files, cwd=None, timeout=30):
+    """
+    Async variant of run_linter (asyncio subprocess, does not block the event loop).
+    Same arguments and return value as run_linter.
+    """
+    if not shutil.which("iverilog"):
+        return {
+            "success": False,
+            "stdout": "",
+            "stderr": "Error: 'iverilog' executable not found in PATH.",
+            "command": "shutil.which('iverilog')"
+        }
+
+    lint_cmd = ["iverilog", "-t", "null", "-g2012"] + verilog_files
+    return await run_command_async(lint_cmd, cwd=cwd, timeout=timeout,
+                                   timeout_message="Error: Linting timed out.")
+
+def parse_diagnostics(text, name_map=None):
+    """
+    Parses iverilog output into structured diagnostics.
+
+    Args:
+        text (str): stderr/stdout of an iverilog run.
+        name_map (dict): Maps paths as given to iverilog to display names (e.g. abs -> relative).
+
+    Returns:
+        list: [{"file": str|None, "line": int|None, "severity": str, "message": str}, ...]
+            Lines that don't name a file are kept with file/line None.
+    """
+    name_map = name_map or {}
+    diagnostics = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or _SUMMARY_RE.match(line):
+            continue
+        m = _DIAGNOSTIC_RE.match(line)
+        if m:
+            severity = m.group("severity") or "error"
+            # "sorry" is iverilog's "unsupported construct": still fatal
+            diagnostics.append({
+                "file": name_map.get(m.group("file"), m.group("file")),
+                "line": int(m.group("line")),
+                "severity": "error" if severity == "sorry" else severity,
+                "message": m.group("message").strip(),
+            })
+        else:
+            diagnostics.append({"file": None, "line": None, "severity": "error", "message": line})
+    return diagnostics
+
+def parse_verilator_diagnostics(text, name_map=None):
+    """Parses `verilator --lint-only` output; same records as parse_diagnostics."""
+    name_map = name_map or {}
+    diagnostics = []
+    for raw in text.splitlines():
+        m = _VERILATOR_RE.match(raw.strip())
+        if m:
+            code = f"[{m.group('code')}] " if m.group("code") else ""
+            diagnostics.append({
+                "file": name_map.get(m.group("file"), m.group("file")),
+                "line": int(m.group("line")),
+                "severity": m.group("severity").lower(),
+                "message": code + m.group("message").strip(),
+            })
+        elif raw.startswith("%Error") and "Exiting due to" not in raw:
+            diagnostics.append({"file": None, "line": None, "severity": "error", "message": raw[1:].strip()})
+    return diagnostics
+
+class LintBackend(abc.ABC):
+    """
+    An external linter: how to find it, run it over a file set and parse its output.
+
+    run/arun return the usual {"success", "stdout", "stderr", "command"} dict.
+    """
+    name = None
+    executable = None
+    # A required backend runs (and reports itself missing) even when not installed
+    required = False
+
+    def available(self):
+        return shutil.which(self.executable) is not None
+
+    @abc.abstractmethod
+    def run(self, verilog_files, cwd, timeout):
+        ...
+
+    @abc.abstractmethod
+    async def arun(self, verilog_files, cwd, timeout):
+        ...
+
+    @abc.abstractmethod
+    def parse(self, text, name_map):
+        ...
+
+class IverilogBackend(LintBackend):
+    name = "iverilog"
+    executable = "iverilog"
+    required = True
+
+    def run(self, verilog_files, cwd, timeout):
+        return run_linter(verilog_files, cwd=cwd, timeout=timeout)
+
+    async def arun(self, verilog_files, cwd, timeout):
+        return await arun_linter(verilog_files, cwd=cwd, timeout=timeout)
+
+    def parse(self, text, name_map):
+        return parse_diagnostics(text, name_map)
+
+class VerilatorBackend(LintBackend):
+    name = "verilator"
+    executable = "verilator"
+
+    def command(self, verilog_files):
+        # The agent lints testbenches too: several tops and file naming are not errors here
+        return ["verilator", "--lint-only", "-Wno-fatal", "-Wno-MULTITOP", "-Wno-DECLFILENAME"] + list(verilog_files)
+
+    def run(self, verilog_files, cwd, timeout):
+        cmd = self.command(verilog_files)
+        try:
+            proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {"success": False, "stdout": "", "stderr": "Error: Linting timed out.", "command": " ".join(cmd)}
+        except Exception as e:
+            return {"success": False, "stdout": "", "stderr": f"Execution Error during linting: {str(e)}",
+                    "command": " ".join(cmd)}
+        return {"success": proc.returncode == 0, "stdout": proc.stdout, "stderr": proc.stderr,
+                "command": " ".join(cmd)}
+
+    async def arun(self, verilog_files, cwd, timeout):
+        return await run_command_async(self.command(verilog_files), cwd=cwd, timeout=timeout,
+                                       timeout_message="Error: Linting timed out.")
+
+    def parse(self, text, name_map):
+        return parse_verilator_diagnostics(text, name_map)
+
+BACKENDS = {backend.name: backend for backend in (IverilogBackend(), VerilatorBackend())}
+
+def get_backends(names=None):
+    """
+    The lint backends to run, in order (default: LINT_BACKENDS from config).
+    Optional backends that are not installed are skipped.
+    """
+    if names is None:
+        names = [n.strip() for n in LINT_BACKENDS.split(",") if n.strip()]
+    backends = [BACKENDS[n] for n in names if n in BACKENDS]
+    return [b for b in backends if b.required or b.available()]
+
+def _lint_key(verilog_files, cwd, backends):
+    """Cache key of a file set: backend names plus sorted (display name, sha256) pairs; None if a file is missing."""
+    entries = []
+    for path in verilog_files:
+        abs_path = path if os.path.isabs(path) else os.path.join(cwd, path)
+        try:
+            with open(abs_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+        entries.append((os.path.relpath(abs_path, cwd), digest))
+    return (tuple(b.name for b in backends),) + tuple(sorted(entries))
+
+def _name_map(verilog_files, cwd):
+    name_map = {}
+    for path in verilog_files:
+        abs_path = path if os.path.isabs(path) else os.path.join(cwd, path)
+        name_map[path] = name_map[abs_path] = os.path.relpath(abs_path, cwd)
+    return name_map
+
+def _precheck(verilog_files, cwd, name_map):
+    diagnostics = []
+    for path in verilog_files:
+        abs_path = path if os.path.isabs(path) else os.path.join(cwd, path)
+        try:
+            with open(abs_path, "r", encoding="utf-8", errors="replace") as f:
+                diagnostics += precheck_source(f.read(), name_map[path])
+        except OSError:
+            continue
+    return diagnostics
+
+def _lint_result(name_map, diagnostics, success, command):
+    files = {name: [] for name in name_map.values()}
+    for d in diagnostics:
+        if d["file"]:
+            files.setdefault(d["file"], []).append(d)
+    success = success and not any(d["severity"] == "error" for d in diagnostics)
+    return {"success": success, "diagnostics": diagnostics, "files": files,
+            "command": command, "cached": False}
+
+def _cache_get(key):
+    with _lint_cache_lock:
+        if key in _lint_cache:
+            _lint_cache.move_to_end(key)
+            return {**_lint_cache[key], "cached": True}
+    return None
+
+def _cache_put(key, result):
+    with _lint_cache_lock:
+        _lint_cache[key] = result
+        _lint_cache.move_to_end(key)
+        while len(_lint_cache) > LINT_CACHE_SIZE:
+            _lint_cache.popitem(last=False)
+
+def _is_tool_failure(raw):
+    # Timeouts and missing executables are reported but never cached
+    return raw["stderr"].startswith(("Error:", "Execution Error"))
+
+def _begin_lint(verilog_files, cwd, backends):
+    """Shared front half of lint_files/alint_files: cache lookup, then the structural pre-check."""
+    key = _lint_key(verilog_files, cwd, backends)
+    cached = _cache_get(key) if key else None
+    if cached:
+        return key, None, cached
+    name_map = _name_map(verilog_files, cwd)
+    diagnostics = _precheck(verilog_files, cwd, name_map)
+    if any(d["severity"] == "error" for d in diagnostics):
+        result = _lint_result(name_map, diagnostics, False, "precheck")
+        if key:
+            _cache_put(key, result)
+        return key, name_map, result
+    return key, name_map, None
+
+def _finish_lint(key, name_map, runs):
+    """Builds the result from [(backend, raw_result), ...] and caches it unless a tool failed."""
+    diagnostics, success = [], True
+    for backend, raw in runs:
+        diagnostics += backend.parse(raw["stderr"] + "\n" + raw["stdout"], name_map)
+        success = success and raw["success"]
+    command = " && ".join(raw["command"] for _, raw in runs) or "precheck"
+    result = _lint_result(name_map, diagnostics, success, command)
+    if key and not any(_is_tool_failure(raw) for _, raw in runs):
+        _cache_put(key, result)
+    return result
+
+def lint_files(verilog_files, cwd=None, timeout=30, backends=None):
+    """
+    Lints a whole file set: an in-process structural pre-check, then each backend once.
+
+    The pre-check (lint_precheck) catches unbalanced module/endmodule and begin/end and
+    undeclared ports without starting a subprocess. Otherwise the backends run in order
+    (iverilog, then Verilator when installed) over the whole set, stopping at the first
+    that reports errors. Each run elaborates the set together (so cross-file errors such
+    as unknown modules or port mismatches are found), and diagnostics are split per file.
+    Results are cached by the content hash of every file in the set: an unchanged set
+    never starts a linter.
+
+    Args:
+        verilog_files (list): Paths of .v files (absolute or relative to cwd).
+        cwd (str): Working directory; diagnostics name files relative to it.
+        timeout (int): Timeout in seconds (per backend).
+        backends (list): Backend names (default: LINT_BACKENDS from config).
+
+    Returns:
+        dict: {
+            "success": bool,
+            "diagnostics": list, # see parse_diagnostics
+            "files": dict,       # file name -> its diagnostics
+            "command": str,
+            "cached": bool
+        }
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+    backends = get_backends(backends)
+    key, name_map, result = _begin_lint(verilog_files, cwd, backends)
+    if result:
+        return result
+    runs = []
+    for backend in backends:
+        raw = backend.run(list(verilog_files), cwd, timeout)
+        runs.append((backend, raw))
+        if not raw["success"]:
+            break
+    return _finish_lint(key, name_map, runs)
+
+async def alint_files(verilog_files, cwd=None, timeout=30, backends=None):
+    """Async variant of lint_files (same arguments, result and cache)."""
+    if cwd is None:
+        cwd = os.getcwd()
+    backends = get_backends(backends)
+    key, name_map, result = _begin_lint(verilog_files, cwd, backends)
+    if result:
+        return result
+    runs = []
+    for backend in backends:
+        raw = await backend.arun(list(verilog_files), cwd, timeout)
+        runs.append((backend, raw))
+        if not raw["success"]:
+            break
+    return _finish_lint(key, name_map, runs)
+
+def format_diagnostics(result):
+    """Compact per-file text rendering of a lint_files result (for the agent)."""
+    if result["success"] and not result["diagnostics"]:
+        return f"Syntax OK ({len(result['files'])} file(s))."
+    lines = ["Syntax OK." if result["success"] else "Syntax Error:"]
+    # A failure with nothing per file (timeout, missing tool): per-file "OK" lines would be misleading
+    per_file = result["success"] or any(result["files"].values())
+    for name, diags in (result["files"].items() if per_file else []):
+        if not diags:
+            lines.append(f"{name}: OK")
+            continue
+        lines.append(f"{name}:")
+        lines.extend(f"  line {d['line']}: {d['severity']}: {d['message']}" for d in diags)
+    general = [d for d in result["diagnostics"] if d["file"] is None]
+    lines.extend(f"{d['severity']}: {d['message']}" for d in general)
+    return "\n".join(lines)
@@ -1,6 +1,6 @@
 import os
 import sys
-from .run_iverilog import run_iverilog
+from .run_iverilog import run_iverilog, arun_iverilog
 
 def run_simulation(verilog_files, top_module="tb", cwd=None, timeout=60):
     """
@@ -29,7 +29,20 @@ def run_simulation(verilog_files, top_module="tb", cwd=None, timeout=60):
     
     # Run Icarus Verilog (Compile + Run)
     result = run_iverilog(verilog_files, output_executable=output_exec, cwd=cwd, timeout=timeout)
-    
+    return _analyze_simulation(result)
+
+async def arun_simulation(verilog_files, top_module="tb", cwd=None, timeout=60):
+    """
+    Async variant of run_simulation. Same arguments and return value.
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+
+    result = await arun_iverilog(verilog_files, output_executable=f"{top_module}.out", cwd=cwd, timeout=timeout)
+    return _analyze_simulation(result)
+
+def _analyze_simulation(result):
+    """Turns a raw run_iverilog result into the run_simulation response dict."""
     response = {
         "success": False,
         "compilation_success": False,
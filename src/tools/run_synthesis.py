@@ -1,6 +1,6 @@
 import os
 import sys
-from .run_docker import run_docker_command
+from .run_docker import run_docker_command, arun_docker_command
 
 def run_synthesis(verilog_files, top_module, platform="sky130hd", clock_period_ns=None, 
                   utilization=5, aspect_ratio=1, core_margin=2, cwd=None, timeout=3600):
@@ -26,6 +26,43 @@ def run_synthesis(verilog_files, top_module, platform="sky130hd", clock_period_n
             "metrics": dict (placeholder for now)
         }
     """
+    cwd, make_cmd, volumes = _prepare_synthesis(verilog_files, top_module, platform, clock_period_ns,
+                                                 utilization, aspect_ratio, core_margin, cwd)
+
+    print(f"🚀 Starting Synthesis for {top_module}...")
+    result = run_docker_command(
+        command=make_cmd,
+        workspace_path=cwd,
+        volumes=volumes,
+        timeout=timeout
+    )
+    
+    return result
+
+async def arun_synthesis(verilog_files, top_module, platform="sky130hd", clock_period_ns=None,
+                         utilization=5, aspect_ratio=1, core_margin=2, cwd=None, timeout=3600):
+    """
+    Async variant of run_synthesis. Same arguments and return value.
+    """
+    cwd, make_cmd, volumes = _prepare_synthesis(verilog_files, top_module, platform, clock_period_ns,
+                                                 utilization, aspect_ratio, core_margin, cwd)
+
+    print(f"🚀 Starting Synthesis for {top_module}...")
+    return await arun_docker_command(
+        command=make_cmd,
+        workspace_path=cwd,
+        volumes=volumes,
+        timeout=timeout
+    )
+
+def _prepare_synthesis(verilog_files, top_module, platform, clock_period_ns,
+                       utilization, aspect_ratio, core_margin, cwd):
+    """
+    Writes constraints.sdc / config.mk and prepares the ORFS output directories.
+
+    Returns:
+        tuple: (cwd, make_cmd, volumes) for the Docker invocation.
+    """
     if cwd is None:
         # Default to workspace dir relative to this file
         cwd = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../workspace'))
@@ -106,13 +143,5 @@ export CORE_MARGIN = {core_margin}
     # BEST FIX: Run 'make clean_issue' (ORFS specific) or just nuke the results for this design if we suspect a change.
     # Simpler approach: Use -B to force execution.
     make_cmd = "make -B DESIGN_CONFIG=/workspace/config.mk"
-    
-    print(f"🚀 Starting Synthesis for {top_module}...")
-    result = run_docker_command(
-        command=make_cmd,
-        workspace_path=cwd,
-        volumes=volumes,
-        timeout=timeout
-    )
-    
-    return result
+
+    return cwd, make_cmd, volumes
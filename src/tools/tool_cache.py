@@ -0,0 +1,151 @@
+import contextvars
+import functools
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+
+from src.config import TOOL_CACHE_MODE, TOOL_CACHE_SIZE
+
+class ToolCache:
+    """
+    In-process memo table for tool results that are pure functions of workspace files.
+
+    Entries are keyed on (tool name, call arguments, fingerprint of the files the tool
+    reads), so any edit to an input file naturally produces a miss.
+    """
+    def __init__(self, mode=TOOL_CACHE_MODE, max_entries=TOOL_CACHE_SIZE):
+        self.mode = mode
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, paths):
+        """
+        Fingerprints files (or directories) by mtime+size ("stat") or by content hash ("hash").
+        Missing paths fingerprint as None so that creating them invalidates the entry.
+        """
+        prints = []
+        for path in sorted(set(paths)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                prints.append((path, None))
+                continue
+
+            if self.mode == "hash" and os.path.isfile(path):
+                h = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        h.update(chunk)
+                prints.append((path, h.hexdigest()))
+            else:
+                prints.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(prints)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, tool_name, outcome):
+        with self._lock:
+            counters = self._stats.setdefault(tool_name, {"hits": 0, "misses": 0, "bypassed": 0})
+            counters[outcome] += 1
+
+    def stats(self):
+        """Returns per-tool counters: {tool: {"hits": int, "misses": int, "bypassed": int}}."""
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+_tool_cache = ToolCache()
+
+# Set by a tracer to a dict before a tool runs; memoized tools store whether they were
+# served from cache under "cache_hit". A dict (not a plain value) because LangChain runs
+# the tool body in a copied context, so only mutations of a shared object are visible.
+cache_probe = contextvars.ContextVar("tool_cache_probe", default=None)
+
+def get_tool_cache():
+    return _tool_cache
+
+def tool_cache_stats():
+    """Per-tool hit/miss counters of the shared tool cache."""
+    return _tool_cache.stats()
+
+def memoize_tool(tool_name, inputs, outputs=None):
+    """
+    Decorator that memoizes a tool function on the files it reads.
+
+    The decorated function may declare a `bypass_cache: bool = False` parameter; when
+    the caller sets it, the tool always re-runs (and refreshes the cached entry).
+    Works for both sync functions and coroutines; a sync tool and its async variant
+    share entries when they use the same tool_name.
+
+    Args:
+        tool_name (str): Name used for cache keys and hit/miss counters.
+        inputs (callable): arguments dict -> list of absolute paths the tool reads.
+        outputs (callable): Optional arguments dict -> list of paths the tool produces.
+                            A hit is only served if all of them still exist.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def lookup(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            bypass = arguments.pop("bypass_cache", False)
+
+            key = (tool_name, repr(sorted(arguments.items())), _tool_cache.fingerprint(inputs(arguments)))
+            probe = cache_probe.get()
+            if bypass:
+                _tool_cache.record(tool_name, "bypassed")
+                if probe is not None:
+                    probe["cache_hit"] = False
+                return key, False, None
+
+            hit, value = _tool_cache.get(key)
+            if hit and outputs is not None and not all(os.path.exists(p) for p in outputs(arguments)):
+                hit = False
+            _tool_cache.record(tool_name, "hits" if hit else "misses")
+            if probe is not None:
+                probe["cache_hit"] = hit
+            return key, hit, value
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key, hit, value = lookup(args, kwargs)
+                if hit:
+                    return value
+                value = await func(*args, **kwargs)
+                _tool_cache.put(key, value)
+                return value
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key, hit, value = lookup(args, kwargs)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            _tool_cache.put(key, value)
+            return value
+        return wrapper
+    return decorator
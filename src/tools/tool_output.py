@@ -0,0 +1,146 @@
+import functools
+import hashlib
+import inspect
+import os
+
+from src.config import TOOL_OUTPUT_MAX_FILES, TOOL_OUTPUT_TOKEN_LIMIT
+
+# Directory (inside the session workspace) holding full copies of truncated tool outputs.
+SPILL_DIR = ".tool_outputs"
+CHARS_PER_TOKEN = 4
+
+def _prune_spill_dir(spill_dir, keep, max_files):
+    """Removes the least recently written/used outputs beyond `max_files` (never `keep`)."""
+    try:
+        entries = [e for e in os.scandir(spill_dir) if e.is_file() and e.path != keep]
+        entries.sort(key=lambda e: e.stat().st_mtime)
+    except OSError:
+        return
+    for entry in entries[:max(len(entries) - (max_files - 1), 0)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+def spill_output(text, tool_name, workspace, token_limit=None):
+    """
+    Caps a tool result at `token_limit` tokens (approx. 4 chars each).
+
+    Oversized text is written in full to <workspace>/.tool_outputs/ and replaced by its
+    head and tail plus a handle that read_output_tool can page through. The artifact
+    name is derived from the content hash, so repeated identical outputs share a file.
+    The directory keeps at most TOOL_OUTPUT_MAX_FILES outputs; the oldest go first.
+
+    Returns:
+        str: The original text, or the truncated view with a handle.
+    """
+    if token_limit is None:
+        token_limit = TOOL_OUTPUT_TOKEN_LIMIT
+    max_chars = token_limit * CHARS_PER_TOKEN
+    if not isinstance(text, str) or len(text) <= max_chars:
+        return text
+
+    digest = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()[:12]
+    handle = f"{SPILL_DIR}/{tool_name}_{digest}.txt"
+    path = os.path.join(workspace, SPILL_DIR, f"{tool_name}_{digest}.txt")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        _prune_spill_dir(os.path.dirname(path), path, TOOL_OUTPUT_MAX_FILES)
+    else:
+        # Reused: counts as recent, so pruning keeps it
+        os.utime(path)
+
+    lines = text.splitlines()
+    head_budget = int(max_chars * 0.6)
+    tail_budget = max_chars - head_budget
+
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > head_budget:
+            break
+        head.append(line)
+        used += len(line) + 1
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > tail_budget:
+            break
+        tail.append(line)
+        used += len(line) + 1
+    tail.reverse()
+
+    # Enormous lines at either end: fall back to a character cut.
+    if not head:
+        head = [text[:head_budget]]
+    if not tail and len(lines) > len(head):
+        tail = [text[-tail_budget:]]
+
+    omitted = max(len(lines) - len(head) - len(tail), 0)
+    return (
+        "\n".join(head)
+        + f"\n... [{omitted} lines omitted] ...\n"
+        + "\n".join(tail)
+        + f"\n[Output truncated ({len(lines)} lines, {len(text)} chars). Full text saved as '{handle}'. "
+        + f"Use read_output_tool(handle='{handle}', start_line=..., num_lines=...) to page through it.]"
+    )
+
+def read_output_page(handle, workspace, start_line=1, num_lines=200):
+    """
+    Returns lines [start_line, start_line + num_lines) of a spilled tool output.
+
+    Args:
+        handle (str): Handle returned in a truncated tool result (e.g. '.tool_outputs/x.txt').
+        workspace (str): Session workspace directory.
+        start_line (int): 1-based first line.
+        num_lines (int): Number of lines to return.
+    """
+    spill_root = os.path.realpath(os.path.join(workspace, SPILL_DIR))
+    path = os.path.realpath(os.path.join(workspace, handle))
+    if not path.startswith(spill_root + os.sep):
+        return f"Error: '{handle}' is not a tool output handle."
+    if not os.path.exists(path):
+        return f"Error: Output '{handle}' does not exist."
+
+    start_line = max(start_line, 1)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+
+    # A page is bounded by the same token limit as any other tool result.
+    max_chars = TOOL_OUTPUT_TOKEN_LIMIT * CHARS_PER_TOKEN
+    page, used = [], 0
+    for line in lines[start_line - 1:start_line - 1 + num_lines]:
+        if page and used + len(line) + 1 > max_chars:
+            break
+        page.append(line[:max_chars])
+        used += len(line) + 1
+    if not page:
+        return f"No lines in range (output has {len(lines)} lines)."
+
+    end_line = start_line + len(page) - 1
+    footer = f"\n[Lines {start_line}-{end_line} of {len(lines)}]"
+    if end_line < len(lines):
+        footer += f" Next page: start_line={end_line + 1}"
+    return "\n".join(page) + footer
+
+def cap_output(tool_name, workspace):
+    """
+    Decorator that passes a tool's string result through spill_output.
+
+    Args:
+        tool_name (str): Used to name the spilled artifact.
+        workspace (callable): Returns the active workspace directory.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return spill_output(await func(*args, **kwargs), tool_name, workspace())
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return spill_output(func(*args, **kwargs), tool_name, workspace())
+        return wrapper
+    return decorator
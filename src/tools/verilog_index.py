@@ -0,0 +1,298 @@
+import os
+import re
+import threading
+
+from .lint_precheck import strip_source
+
+VERILOG_EXTENSIONS = (".v", ".sv")
+# Generated trees (synthesized netlists, simulator builds) are not design sources
+_SKIP_DIR_PREFIXES = (".", "orfs_", "sim_build", "__pycache__")
+
+_MODULE_RE = re.compile(r"\b(?:module|macromodule)\s+([A-Za-z_][A-Za-z0-9_$]*)")
+_ENDMODULE_RE = re.compile(r"\bendmodule\b")
+_DIRECTION_RE = re.compile(r"\b(input|output|inout)\b([^;]*);")
+_PARAMETER_RE = re.compile(r"\bparameter\b([^;]*);")
+_RANGE_RE = re.compile(r"\[[^\]]*\]")
+_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+# "<module> [#(...)] <instance> [array] (" -- keywords are filtered out afterwards
+_INSTANCE_RE = re.compile(r"(?<![\w$.`])([A-Za-z_][A-Za-z0-9_$]*)(?:\s*#\s*\((?:[^()]|\([^()]*\))*\)\s*|\s+)"
+                          r"([A-Za-z_][A-Za-z0-9_$]*)\s*(?:\[[^\]]*\]\s*)?\(")
+_TYPE_KEYWORDS = {"wire", "reg", "logic", "signed", "unsigned", "integer", "real", "time", "tri", "var", "bit"}
+_KEYWORDS = _TYPE_KEYWORDS | {
+    "input", "output", "inout", "parameter", "localparam", "assign", "always", "always_ff", "always_comb",
+    "always_latch", "initial", "begin", "end", "if", "else", "for", "while", "repeat", "forever", "case",
+    "casez", "casex", "endcase", "function", "endfunction", "task", "endtask", "generate", "endgenerate",
+    "genvar", "module", "endmodule", "posedge", "negedge", "or", "and", "not", "default", "return", "fork",
+    "join", "wait", "disable", "automatic", "void", "int",
+    # Built-in gate primitives ("nand g1(y, a, b);" is not a module instance)
+    "nand", "nor", "xor", "xnor", "buf", "bufif0", "bufif1", "notif0", "notif1",
+}
+
+def _split_top_level(text):
+    """Splits on commas outside (), [] and {}."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(text):
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+def _balanced(text, pos):
+    depth = 0
+    for i in range(pos, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+def _skip_space(text, i):
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i
+
+def _parameters(text):
+    """[{"name", "default"}] from a parameter list such as 'parameter W = 8, D = 4'."""
+    params = []
+    for item in _split_top_level(text):
+        item = re.sub(r"^\s*(parameter|localparam)\b", "", item)
+        if "=" not in item:
+            continue
+        lhs, default = item.split("=", 1)
+        names = [w for w in _IDENT_RE.findall(_RANGE_RE.sub(" ", lhs)) if w not in _KEYWORDS]
+        if names:
+            params.append({"name": names[-1], "default": " ".join(default.split())})
+    return params
+
+def _ports_from_declarations(items):
+    """
+    Ports from direction declarations ('input [7:0] a, b' / ANSI header items).
+    Items without a direction keyword inherit the previous one, as in Verilog.
+    """
+    ports, direction, width = [], None, None
+    for item in items:
+        words = _IDENT_RE.findall(_RANGE_RE.sub(" ", item.split("=")[0]))
+        first = next((w for w in words if w in ("input", "output", "inout")), None)
+        if first:
+            direction = first
+            rng = _RANGE_RE.search(item)
+            width = rng.group(0).replace(" ", "") if rng else None
+        names = [w for w in words if w not in _KEYWORDS]
+        if direction and names:
+            ports.append({"name": names[-1], "direction": direction, "width": width})
+    return ports
+
+def parse_modules(text, filename):
+    """
+    Modules defined in one Verilog source.
+
+    Returns:
+        list: [{"name", "file", "line", "ports": [{"name", "direction", "width"}],
+                "parameters": [{"name", "default"}], "instances": [{"module", "name"}]}, ...]
+    """
+    text = strip_source(text)
+    modules = []
+    for m in _MODULE_RE.finditer(text):
+        i = _skip_space(text, m.end())
+        params = []
+        if text.startswith("#", i):
+            j = text.find("(", i)
+            end = _balanced(text, j) if j != -1 else None
+            if end is not None:
+                params = _parameters(text[j + 1:end - 1])
+                i = _skip_space(text, end)
+        header_items = []
+        if text.startswith("(", i):
+            end = _balanced(text, i)
+            if end is not None:
+                header_items = _split_top_level(text[i + 1:end - 1])
+                i = end
+        stop = _ENDMODULE_RE.search(text, i)
+        body = text[i:stop.start() if stop else len(text)]
+
+        if any(re.search(r"\b(input|output|inout)\b", item) for item in header_items):
+            ports = _ports_from_declarations(header_items)
+        else:
+            declared = {}
+            for decl in _DIRECTION_RE.finditer(body):
+                for port in _ports_from_declarations(_split_top_level(decl.group(0)[:-1])):
+                    declared[port["name"]] = port
+            # Header order, as seen by positional instantiation
+            ports = [declared.get(name, {"name": name, "direction": None, "width": None})
+                     for name in header_items if _IDENT_RE.fullmatch(name)]
+
+        for decl in _PARAMETER_RE.finditer(body):
+            params += _parameters(decl.group(1))
+
+        instances = [{"module": inst.group(1), "name": inst.group(2)}
+                     for inst in _INSTANCE_RE.finditer(body)
+                     if inst.group(1) not in _KEYWORDS and inst.group(2) not in _KEYWORDS]
+
+        modules.append({
+            "name": m.group(1),
+            "file": filename,
+            "line": text.count("\n", 0, m.start()) + 1,
+            "ports": ports,
+            "parameters": params,
+            "instances": instances,
+        })
+    return modules
+
+class VerilogIndex:
+    """
+    Modules, ports, parameters and the instantiation hierarchy of one workspace.
+
+    Files are re-parsed only when their (mtime, size) changes, so `refresh()` before a
+    query costs one stat per source. write_file/edit_file_tool call `update()` directly
+    after writing, so the index is current without waiting for the next refresh.
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._files = {}  # rel path -> ((mtime_ns, size), [module dicts])
+        self._lock = threading.RLock()
+
+    def _sources(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(_SKIP_DIR_PREFIXES)]
+            for name in filenames:
+                if name.endswith(VERILOG_EXTENSIONS) and not name.startswith("."):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.root)
+
+    def update(self, path):
+        """Re-parses one file (absolute or workspace-relative) if it changed; drops it if deleted."""
+        rel = os.path.relpath(os.path.join(self.root, path), self.root)
+        if not rel.endswith(VERILOG_EXTENSIONS):
+            return
+        abs_path = os.path.join(self.root, rel)
+        with self._lock:
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                self._files.pop(rel, None)
+                return
+            stamp = (st.st_mtime_ns, st.st_size)
+            entry = self._files.get(rel)
+            if entry and entry[0] == stamp:
+                return
+            with open(abs_path, "r", encoding="utf-8", errors="replace") as f:
+                self._files[rel] = (stamp, parse_modules(f.read(), rel))
+
+    def refresh(self):
+        """Brings the index up to date with the workspace (stat-only for unchanged files)."""
+        with self._lock:
+            present = set(self._sources())
+            for rel in list(self._files):
+                if rel not in present:
+                    del self._files[rel]
+            for rel in present:
+                self.update(rel)
+        return self
+
+    def modules(self):
+        """name -> module dict. When a module is defined twice, the most recently modified file wins."""
+        with self._lock:
+            entries = sorted(self._files.values(), key=lambda e: e[0][0])
+        return {mod["name"]: mod for _, mods in entries for mod in mods}
+
+    def get(self, name):
+        return self.modules().get(name)
+
+    def instantiated_by(self, name):
+        """Names of the modules that instantiate `name`."""
+        return sorted(m["name"] for m in self.modules().values()
+                      if any(inst["module"] == name for inst in m["instances"]))
+
+    def hierarchy(self, top):
+        """`top` plus every known module below it (depth-first, each once)."""
+        modules = self.modules()
+        order, stack = [], [top]
+        while stack:
+            name = stack.pop()
+            if name in order or name not in modules:
+                continue
+            order.append(name)
+            stack.extend(reversed([inst["module"] for inst in modules[name]["instances"]]))
+        return order
+
+    def files_for(self, top):
+        """
+        The minimal source set for `top`: the files defining it and every module below it,
+        in hierarchy order. Empty if `top` is unknown.
+        """
+        modules = self.modules()
+        files = []
+        for name in self.hierarchy(top):
+            if modules[name]["file"] not in files:
+                files.append(modules[name]["file"])
+        return files
+
+    def top_modules(self):
+        """Modules no other known module instantiates (design tops and testbenches)."""
+        modules = self.modules()
+        used = {inst["module"] for m in modules.values() for inst in m["instances"]}
+        return sorted(name for name in modules if name not in used)
+
+    def design_top(self, files=None):
+        """
+        The most likely synthesis top: a root module with ports (testbenches have none,
+        so below a testbench its DUT is taken), preferring the largest hierarchy.
+
+        Args:
+            files (list): Only consider modules defined in these workspace-relative files.
+        """
+        modules = self.modules()
+        roots = self.top_modules()
+        if files is not None:
+            files = {os.path.normpath(f) for f in files}
+            roots = [r for r in roots if modules[r]["file"] in files]
+            # A file that only holds submodules of another file: fall back to its own roots
+            if not roots:
+                local = [n for n, m in modules.items() if m["file"] in files]
+                used = {inst["module"] for n in local for inst in modules[n]["instances"]}
+                roots = [n for n in local if n not in used]
+        candidates = [r for r in roots if modules[r]["ports"]]
+        if not candidates:
+            # Only testbenches at the root: the design top is what they instantiate
+            candidates = sorted({inst["module"] for r in roots for inst in modules[r]["instances"]
+                                 if inst["module"] in modules and modules[inst["module"]]["ports"]}) or roots
+        if not candidates:
+            return None
+        return max(candidates, key=lambda r: (len(self.hierarchy(r)), r))
+
+    def describe(self, name):
+        """Compact text description of one module (for the agent)."""
+        mod = self.get(name)
+        if mod is None:
+            known = ", ".join(sorted(self.modules())) or "none"
+            return f"Error: Module '{name}' not found. Known modules: {known}"
+        lines = [f"module {name} ({mod['file']}:{mod['line']})"]
+        if mod["parameters"]:
+            lines.append("Parameters: " + ", ".join(f"{p['name']} = {p['default']}" for p in mod["parameters"]))
+        lines.append("Ports:" if mod["ports"] else "Ports: none")
+        for p in mod["ports"]:
+            width = f" {p['width']}" if p["width"] else ""
+            lines.append(f"  {p['direction'] or 'undeclared'}{width} {p['name']}")
+        if mod["instances"]:
+            lines.append("Instantiates: " + ", ".join(f"{i['module']} {i['name']}" for i in mod["instances"]))
+        parents = self.instantiated_by(name)
+        lines.append("Instantiated by: " + (", ".join(parents) if parents else "none (top-level)"))
+        return "\n".join(lines)
+
+_lock = threading.Lock()
+_indexes = {} # root -> VerilogIndex (process-level)
+
+def get_verilog_index(root):
+    """Returns the refreshed VerilogIndex for a workspace (created on first use)."""
+    root = os.path.abspath(root)
+    with _lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = VerilogIndex(root)
+    return index.refresh()
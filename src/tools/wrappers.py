@@ -1,12 +1,17 @@
 import os
+from typing_extensions import TypedDict
 from langchain_core.tools import tool
-from src.tools.run_linter import run_linter
-from src.tools.run_simulation import run_simulation
-from src.tools.run_synthesis import run_synthesis
+from src.tools.run_linter import lint_files, alint_files, format_diagnostics
+from src.tools.run_simulation import run_simulation, arun_simulation
+from src.tools.run_synthesis import run_synthesis, arun_synthesis
+from src.tools.run_async import session_semaphore
+from src.tools.tool_cache import memoize_tool
+from src.tools.tool_output import cap_output, read_output_page
 from src.tools.get_ppa import get_ppa_metrics
 from src.tools.read_waveform import read_waveform
 from src.tools.run_cocotb import run_cocotb
 from src.tools.run_sby import run_sby
+from src.tools.verilog_index import get_verilog_index, VERILOG_EXTENSIONS
 
 # Helper to get workspace path
 def get_workspace_path():
@@ -21,7 +26,54 @@ def get_workspace_path():
         
     return os.path.abspath(os.path.join(os.path.dirname(__file__), '../../workspace'))
 
+def async_variant(sync_tool):
+    """
+    Attaches an asyncio implementation to an existing @tool.
+    The agent's ToolNode uses it on the async path (ainvoke/astream), where all tool
+    calls of one AI message are gathered concurrently; the session semaphore caps
+    how many subprocesses actually run at once.
+    """
+    def decorator(coroutine):
+        sync_tool.coroutine = coroutine
+        return coroutine
+    return decorator
+
+def _workspace_files(*names):
+    workspace = get_workspace_path()
+    return [os.path.join(workspace, n) for n in names]
+
+def _resolve_sources(verilog_files, top_module):
+    """
+    Workspace-relative sources for a compile: `verilog_files` as given, or when omitted,
+    the files defining `top_module` and everything it instantiates (from the Verilog index).
+    """
+    if verilog_files:
+        return [verilog_files] if isinstance(verilog_files, str) else list(verilog_files)
+    return get_verilog_index(get_workspace_path()).files_for(top_module)
+
+def _unknown_top_error(top_module):
+    tops = get_verilog_index(get_workspace_path()).top_modules()
+    return (f"Error: Module {top_module} is not defined in any workspace file. "
+            f"Top-level modules: {', '.join(tops) or 'none'}. Pass verilog_files explicitly if needed.")
+
+# Extensions get_ppa and search_logs actually read; other ORFS outputs (GDS, ODB, tiles) don't affect them.
+_ORFS_TEXT_EXTENSIONS = (".log", ".rpt", ".txt", ".v", ".json")
+
+def _orfs_files():
+    """ORFS log/report files plus the top-level ORFS directories (fingerprint inputs)."""
+    workspace = get_workspace_path()
+    paths = []
+    for d in ("orfs_reports", "orfs_logs", "orfs_results"):
+        root_dir = os.path.join(workspace, d)
+        paths.append(root_dir)
+        for root, dirs, filenames in os.walk(root_dir):
+            # Viewer caches (.gds_tiles/...) live inside orfs_results: not flow outputs
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            paths.extend(os.path.join(root, f) for f in filenames if f.endswith(_ORFS_TEXT_EXTENSIONS))
+    return paths
+
 @tool
+@cap_output("write_file", get_workspace_path)
 def write_file(filename: str, content: str) -> str:
     """
     Writes content to a file in the workspace.
@@ -36,9 +88,12 @@ def write_file(filename: str, content: str) -> str:
     filepath = os.path.join(workspace, filename)
     with open(filepath, "w") as f:
         f.write(content)
+    if filename.endswith(VERILOG_EXTENSIONS):
+        get_verilog_index(workspace).update(filepath)
     return f"Successfully wrote to {filename}"
 
 @tool
+@cap_output("read_file", get_workspace_path)
 def read_file(filename: str) -> str:
     """
     Reads content from a file in the workspace.
@@ -55,34 +110,53 @@ def read_file(filename: str) -> str:
         return f.read()
 
 @tool
-def linter_tool(verilog_file: str) -> str:
+@cap_output("linter_tool", get_workspace_path)
+@memoize_tool("linter_tool", inputs=lambda a: _workspace_files(*a["verilog_files"]))
+def linter_tool(verilog_files: list[str], bypass_cache: bool = False) -> str:
     """
-    Checks the syntax of a Verilog file using iverilog.
+    Checks the syntax of Verilog files using iverilog, all files in one run.
     Args:
-        verilog_file: Name of the file to lint (e.g., 'design.v').
+        verilog_files: Files to lint together (e.g., ['design.v', 'tb.v']). Errors are reported per file.
+        bypass_cache: Set True to force a re-run instead of returning a cached result for unchanged files.
     """
     workspace = get_workspace_path()
-    filepath = os.path.join(workspace, verilog_file)
-    
-    if not os.path.exists(filepath):
-        return f"Error: File {verilog_file} does not exist."
-        
-    result = run_linter([filepath], cwd=workspace)
-    
-    if result["success"]:
-        return "Syntax OK."
-    else:
-        return f"Syntax Error:\n{result['stderr']}"
+    for f in verilog_files:
+        if not os.path.exists(os.path.join(workspace, f)):
+            return f"Error: File {f} does not exist."
+
+    result = lint_files([os.path.join(workspace, f) for f in verilog_files], cwd=workspace)
+    return format_diagnostics(result)
+
+@async_variant(linter_tool)
+@cap_output("linter_tool", get_workspace_path)
+@memoize_tool("linter_tool", inputs=lambda a: _workspace_files(*a["verilog_files"]))
+async def alinter_tool(verilog_files: list[str], bypass_cache: bool = False) -> str:
+    workspace = get_workspace_path()
+    for f in verilog_files:
+        if not os.path.exists(os.path.join(workspace, f)):
+            return f"Error: File {f} does not exist."
+
+    async with session_semaphore(workspace):
+        result = await alint_files([os.path.join(workspace, f) for f in verilog_files], cwd=workspace)
+    return format_diagnostics(result)
 
 @tool
-def simulation_tool(verilog_files: list[str], top_module: str) -> str:
+@cap_output("simulation_tool", get_workspace_path)
+@memoize_tool("simulation_tool",
+              inputs=lambda a: _workspace_files(*_resolve_sources(a["verilog_files"], a["top_module"])))
+def simulation_tool(top_module: str, verilog_files: list[str] | None = None, bypass_cache: bool = False) -> str:
     """
     Runs a Verilog simulation.
     Args:
-        verilog_files: List of filenames to compile (e.g., ['design.v', 'tb.v']).
         top_module: Name of the top-level module in the testbench (e.g., 'tb').
+        verilog_files: Optional list of filenames to compile (e.g., ['design.v', 'tb.v']).
+            Omit it to compile exactly the files top_module needs (resolved from its instantiations).
+        bypass_cache: Set True to force a re-run (e.g. the testbench reads other data files).
     """
     workspace = get_workspace_path()
+    verilog_files = _resolve_sources(verilog_files, top_module)
+    if not verilog_files:
+        return _unknown_top_error(top_module)
     abs_files = [os.path.join(workspace, f) for f in verilog_files]
     
     # Check existence
@@ -91,7 +165,28 @@ def simulation_tool(verilog_files: list[str], top_module: str) -> str:
             return f"Error: File {f} does not exist."
             
     result = run_simulation(abs_files, top_module=top_module, cwd=workspace)
-    
+    return _format_simulation_result(result)
+
+@async_variant(simulation_tool)
+@cap_output("simulation_tool", get_workspace_path)
+@memoize_tool("simulation_tool",
+              inputs=lambda a: _workspace_files(*_resolve_sources(a["verilog_files"], a["top_module"])))
+async def asimulation_tool(top_module: str, verilog_files: list[str] | None = None, bypass_cache: bool = False) -> str:
+    workspace = get_workspace_path()
+    verilog_files = _resolve_sources(verilog_files, top_module)
+    if not verilog_files:
+        return _unknown_top_error(top_module)
+    abs_files = [os.path.join(workspace, f) for f in verilog_files]
+
+    for f in abs_files:
+        if not os.path.exists(f):
+            return f"Error: File {f} does not exist."
+
+    async with session_semaphore(workspace):
+        result = await arun_simulation(abs_files, top_module=top_module, cwd=workspace)
+    return _format_simulation_result(result)
+
+def _format_simulation_result(result):
     if result["success"]:
         return "Simulation PASSED."
     else:
@@ -100,14 +195,16 @@ def simulation_tool(verilog_files: list[str], top_module: str) -> str:
 from src.tools.search_logs import search_logs
 
 @tool
-def synthesis_tool(verilog_files: list[str], top_module: str, clock_period_ns: float = 10.0,
+@cap_output("synthesis_tool", get_workspace_path)
+def synthesis_tool(top_module: str, verilog_files: list[str] | None = None, clock_period_ns: float = 10.0,
                    utilization: int = 5, aspect_ratio: float = 1.0, core_margin: float = 2.0) -> str:
     """
     Runs logic synthesis using OpenROAD Flow Scripts (ORFS).
     Returns a rich summary including generated files and key metrics.
     Args:
-        verilog_files: List of Verilog source files (e.g., ['cpu.v', 'alu.v']).
         top_module: Name of the top module to synthesize.
+        verilog_files: Optional list of Verilog source files (e.g., ['cpu.v', 'alu.v']).
+            Omit it to synthesize exactly the files top_module needs (testbenches are left out).
         clock_period_ns: Target clock period in nanoseconds (default: 10.0).
         utilization: Core utilization percentage (1-100). Higher = smaller area. Default: 5 (very safe).
         aspect_ratio: Core aspect ratio (Height/Width). 1.0 = Square. Default: 1.0.
@@ -116,8 +213,9 @@ def synthesis_tool(verilog_files: list[str], top_module: str, clock_period_ns: f
     workspace = get_workspace_path()
     
     # Handle single string input if agent forgets list
-    if isinstance(verilog_files, str):
-        verilog_files = [verilog_files]
+    verilog_files = _resolve_sources(verilog_files, top_module)
+    if not verilog_files:
+        return _unknown_top_error(top_module)
         
     abs_files = []
     for f in verilog_files:
@@ -129,7 +227,32 @@ def synthesis_tool(verilog_files: list[str], top_module: str, clock_period_ns: f
     result = run_synthesis(abs_files, top_module=top_module, clock_period_ns=clock_period_ns, 
                            utilization=utilization, aspect_ratio=aspect_ratio, core_margin=core_margin,
                            cwd=workspace)
-    
+    return _summarize_synthesis(result, workspace, top_module)
+
+@async_variant(synthesis_tool)
+@cap_output("synthesis_tool", get_workspace_path)
+async def asynthesis_tool(top_module: str, verilog_files: list[str] | None = None, clock_period_ns: float = 10.0,
+                          utilization: int = 5, aspect_ratio: float = 1.0, core_margin: float = 2.0) -> str:
+    workspace = get_workspace_path()
+
+    verilog_files = _resolve_sources(verilog_files, top_module)
+    if not verilog_files:
+        return _unknown_top_error(top_module)
+
+    abs_files = []
+    for f in verilog_files:
+        abs_f = os.path.join(workspace, f)
+        if not os.path.exists(abs_f):
+            return f"Error: File {f} does not exist."
+        abs_files.append(abs_f)
+
+    async with session_semaphore(workspace):
+        result = await arun_synthesis(abs_files, top_module=top_module, clock_period_ns=clock_period_ns,
+                                      utilization=utilization, aspect_ratio=aspect_ratio, core_margin=core_margin,
+                                      cwd=workspace)
+    return _summarize_synthesis(result, workspace, top_module)
+
+def _summarize_synthesis(result, workspace, top_module):
     if result["success"]:
         # 1. Auto-Grep for Metrics
         area_info = search_logs("Chip area", workspace)
@@ -157,10 +280,14 @@ def synthesis_tool(verilog_files: list[str], top_module: str, clock_period_ns: f
         return f"Synthesis Command Finished. Output:\n{result['stderr'][-1000:]}"
 
 @tool
-def ppa_tool() -> str:
+@cap_output("ppa_tool", get_workspace_path)
+@memoize_tool("ppa_tool", inputs=lambda a: _orfs_files())
+def ppa_tool(bypass_cache: bool = False) -> str:
     """
     Extracts PPA (Power, Performance, Area) metrics from the latest synthesis run.
     Returns a dictionary string of metrics.
+    Args:
+        bypass_cache: Set True to force a re-scan instead of returning a cached result for unchanged reports.
     """
     workspace = get_workspace_path()
     logs_dir = os.path.join(workspace, "orfs_logs")
@@ -169,7 +296,10 @@ def ppa_tool() -> str:
     return str(metrics)
 
 @tool
-def waveform_tool(vcd_file: str, signals: list[str], start_time: int = 0, end_time: int = 1000) -> str:
+@cap_output("waveform_tool", get_workspace_path)
+@memoize_tool("waveform_tool", inputs=lambda a: _workspace_files(a["vcd_file"]))
+def waveform_tool(vcd_file: str, signals: list[str], start_time: int = 0, end_time: int = 1000,
+                  bypass_cache: bool = False) -> str:
     """
     Reads a VCD waveform file to inspect signal values.
     Use this when simulation fails to understand WHY.
@@ -178,25 +308,34 @@ def waveform_tool(vcd_file: str, signals: list[str], start_time: int = 0, end_ti
         signals: List of signal names to inspect (e.g., ['clk', 'rst', 'count']).
         start_time: Start time to view.
         end_time: End time to view.
+        bypass_cache: Set True to force a re-read instead of returning a cached result for an unchanged file.
     """
     workspace = get_workspace_path()
     abs_file = os.path.join(workspace, vcd_file)
     return read_waveform(abs_file, signals, start_time, end_time)
 
 @tool
-def search_logs_tool(query: str) -> str:
+@cap_output("search_logs_tool", get_workspace_path)
+@memoize_tool("search_logs_tool", inputs=lambda a: _orfs_files())
+def search_logs_tool(query: str, bypass_cache: bool = False) -> str:
     """
     Searches for a keyword in all OpenROAD logs and reports.
     Useful for finding specific errors, warnings, or metrics (e.g. "slack", "error", "area").
     Args:
         query: The string to search for.
+        bypass_cache: Set True to force a re-search instead of returning a cached result for unchanged logs.
     """
     workspace = get_workspace_path()
     return search_logs(query, workspace)
 
-from src.tools.edit_file import replace_in_file
+from src.tools.edit_file import replace_in_file, edit_file
+
+class FileEdit(TypedDict):
+    target_text: str
+    replacement_text: str
 
 @tool
+@cap_output("edit_file_tool", get_workspace_path)
 def edit_file_tool(filename: str, target_text: str, replacement_text: str) -> str:
     """
     Surgically replaces a block of text in a file.
@@ -212,6 +351,31 @@ def edit_file_tool(filename: str, target_text: str, replacement_text: str) -> st
     result = replace_in_file(abs_file, target_text, replacement_text)
     
     if result["success"]:
+        if filename.endswith(VERILOG_EXTENSIONS):
+            get_verilog_index(workspace).update(abs_file)
+        return f"Success: {result['message']}\nDiff:\n{result.get('diff', '')}"
+    else:
+        return f"Error: {result['message']}"
+
+@tool
+@cap_output("multi_edit_tool", get_workspace_path)
+def multi_edit_tool(filename: str, edits: list[FileEdit]) -> str:
+    """
+    Applies several replacements to one file in a single call (one read, one atomic write).
+    Edits are applied in order, each to the result of the previous one; every target must
+    match exactly once, otherwise nothing is written and all failing edits are reported.
+    Args:
+        filename: Name of the file (e.g., 'design.v').
+        edits: List of {"target_text": ..., "replacement_text": ...} (target must match whitespace exactly).
+    """
+    workspace = get_workspace_path()
+    abs_file = os.path.join(workspace, filename)
+
+    result = edit_file(abs_file, [dict(e) for e in edits])
+
+    if result["success"]:
+        if filename.endswith(VERILOG_EXTENSIONS):
+            get_verilog_index(workspace).update(abs_file)
         return f"Success: {result['message']}\nDiff:\n{result.get('diff', '')}"
     else:
         return f"Error: {result['message']}"
@@ -219,12 +383,16 @@ def edit_file_tool(filename: str, target_text: str, replacement_text: str) -> st
 from src.tools.generate_schematic import generate_schematic
 
 @tool
-def schematic_tool(verilog_file: str, top_module: str) -> str:
+@cap_output("schematic_tool", get_workspace_path)
+@memoize_tool("schematic_tool", inputs=lambda a: _workspace_files(a["verilog_file"]),
+              outputs=lambda a: _workspace_files(f"{a['top_module']}_schematic.svg"))
+def schematic_tool(verilog_file: str, top_module: str, bypass_cache: bool = False) -> str:
     """
     Generates a visual schematic (SVG) from a Verilog file.
     Args:
         verilog_file: Name of the Verilog file (e.g., 'design.v').
         top_module: Name of the top-level module.
+        bypass_cache: Set True to force regeneration even if the source is unchanged.
     """
     workspace = get_workspace_path()
     abs_file = os.path.join(workspace, verilog_file)
@@ -240,16 +408,20 @@ def schematic_tool(verilog_file: str, top_module: str) -> str:
         return f"Failed to generate schematic: {result['error']}"
 
 @tool
-def cocotb_tool(verilog_files: list[str], top_module: str, python_module: str) -> str:
+@cap_output("cocotb_tool", get_workspace_path)
+def cocotb_tool(top_module: str, python_module: str, verilog_files: list[str] | None = None) -> str:
     """
     Runs a constrained random verification test using Cocotb (Python).
     Use this ONLY when the user explicitly asks for "Cocotb", "Python testbench", or "Randomized testing".
     Args:
-        verilog_files: List of Verilog source files.
         top_module: Name of the top-level Verilog module.
         python_module: Name of the Python test file (without .py extension).
+        verilog_files: Optional list of Verilog source files (default: the files top_module needs).
     """
     workspace = get_workspace_path()
+    verilog_files = _resolve_sources(verilog_files, top_module)
+    if not verilog_files:
+        return _unknown_top_error(top_module)
     
     # Ensure all files exist
     abs_files = [os.path.join(workspace, f) for f in verilog_files]
@@ -265,6 +437,7 @@ def cocotb_tool(verilog_files: list[str], top_module: str, python_module: str) -
         return f"Cocotb Test FAILED. ❌\nError: {result['stderr']}"
 
 @tool
+@cap_output("sby_tool", get_workspace_path)
 def sby_tool(sby_file: str) -> str:
     """
     Runs Formal Verification using SymbiYosys (SBY).
@@ -288,6 +461,7 @@ def sby_tool(sby_file: str) -> str:
     return f"SBY Run Finished. Status: {result['status']} {status_icon}\nOutput:\n{result['stdout'][-500:]}"
 
 @tool
+@cap_output("list_files_tool", get_workspace_path)
 def list_files_tool() -> str:
     """
     Lists all files in the current workspace.
@@ -308,11 +482,38 @@ def list_files_tool() -> str:
         
     return "Files in workspace:\n" + "\n".join(sorted(files))
 
+@tool
+@cap_output("describe_module_tool", get_workspace_path)
+def describe_module_tool(module_name: str) -> str:
+    """
+    Describes a Verilog module in the workspace without reading its source:
+    file and line, parameters, ports (direction and width), the modules it instantiates,
+    and which modules instantiate it.
+    Args:
+        module_name: Name of the module (e.g., 'counter').
+    """
+    return get_verilog_index(get_workspace_path()).describe(module_name)
+
+@tool
+def read_output_tool(handle: str, start_line: int = 1, num_lines: int = 200) -> str:
+    """
+    Pages through the full text of a truncated tool output.
+    Long tool results are cut to head + tail; the message names a handle such as
+    '.tool_outputs/simulation_tool_ab12cd34ef56.txt'.
+    Args:
+        handle: The handle from the truncated output.
+        start_line: First line to return (1-based).
+        num_lines: Number of lines to return (default 200).
+    """
+    workspace = get_workspace_path()
+    return read_output_page(handle, workspace, start_line, num_lines)
+
 # List of tools to bind to the agent
 architect_tools = [
     write_file,
     read_file,
     edit_file_tool,
+    multi_edit_tool,
     linter_tool,
     simulation_tool,
     synthesis_tool,
@@ -322,5 +523,7 @@ architect_tools = [
     search_logs_tool,
     cocotb_tool,
     sby_tool,
-    list_files_tool
+    list_files_tool,
+    describe_module_tool,
+    read_output_tool
 ]
@@ -0,0 +1,68 @@
+import atexit
+import sqlite3
+import threading
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# Process-level registry of long-lived agent resources.
+# Streamlit re-executes app.py on every interaction, but imported modules (and this
+# registry) survive reruns, so each database gets one connection/checkpointer and each
+# model one compiled graph for the lifetime of the server process.
+_lock = threading.RLock()
+_connections = {}   # db_path -> sqlite3.Connection
+_checkpointers = {} # db_path -> SqliteSaver
+_agents = {}        # (db_path, model_name) -> compiled agent graph
+
+def get_connection(db_path):
+    """Returns the shared SQLite connection for db_path (opened on first use)."""
+    with _lock:
+        conn = _connections.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            _connections[db_path] = conn
+        return conn
+
+def get_checkpointer(db_path):
+    """Returns the shared SqliteSaver for db_path. SqliteSaver serializes access with its own lock."""
+    with _lock:
+        saver = _checkpointers.get(db_path)
+        if saver is None:
+            saver = SqliteSaver(get_connection(db_path))
+            _checkpointers[db_path] = saver
+        return saver
+
+def get_agent(db_path, model_name):
+    """
+    Returns the compiled Architect graph for (db_path, model_name), building it once.
+
+    The graph itself is session-independent: sessions are selected per call through
+    config["configurable"]["thread_id"], so every session on the same model shares it.
+    """
+    # Imported lazily so that checkpoint-only users (reports, maintenance) don't pay for the LLM client.
+    from src.agents.architect import create_architect_agent
+
+    with _lock:
+        key = (db_path, model_name)
+        agent = _agents.get(key)
+        if agent is None:
+            agent = create_architect_agent(checkpointer=get_checkpointer(db_path), model_name=model_name)
+            _agents[key] = agent
+        return agent
+
+def release(db_path):
+    """Closes the connection for db_path and drops everything built on it (e.g. before deleting the DB file)."""
+    with _lock:
+        for key in [k for k in _agents if k[0] == db_path]:
+            del _agents[key]
+        _checkpointers.pop(db_path, None)
+        conn = _connections.pop(db_path, None)
+        if conn is not None:
+            conn.close()
+
+def close_all():
+    """Closes every registered connection (registered with atexit)."""
+    with _lock:
+        for db_path in list(_connections):
+            release(db_path)
+
+atexit.register(close_all)
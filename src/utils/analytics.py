@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+import time
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from src.utils.usage import estimate_cost, extract_usage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_events (
+    message_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    model_name TEXT,
+    ts REAL,
+    input_tokens INTEGER DEFAULT 0,
+    output_tokens INTEGER DEFAULT 0,
+    cached_tokens INTEGER DEFAULT 0,
+    cost REAL DEFAULT 0.0,
+    latency_ms REAL,
+    tool_calls INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_usage_session ON usage_events (session_id);
+CREATE INDEX IF NOT EXISTS idx_usage_model ON usage_events (model_name);
+
+CREATE TABLE IF NOT EXISTS tool_events (
+    tool_call_id TEXT PRIMARY KEY,
+    message_id TEXT,
+    session_id TEXT NOT NULL,
+    tool_name TEXT NOT NULL,
+    ts REAL,
+    latency_ms REAL,
+    success INTEGER,
+    cache_hit INTEGER,
+    output_chars INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_tool_name ON tool_events (tool_name, latency_ms);
+CREATE INDEX IF NOT EXISTS idx_tool_message ON tool_events (message_id);
+CREATE INDEX IF NOT EXISTS idx_tool_session ON tool_events (session_id);
+"""
+
+def is_failure(content):
+    """Same heuristic the chat UI uses for the ❌ icon."""
+    return "Error" in content or "FAILED" in content
+
+class AnalyticsStore:
+    """
+    Per-message usage and per-tool-call events in indexed tables of state.db.
+
+    Events are idempotent (keyed by message id / tool call id), so a turn can be recorded
+    live and the same history backfilled from checkpoints later without double counting.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Shared connection, (re)opened on first use, e.g. after close() and a DB reset."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+            return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def delete_session(self, session_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM usage_events WHERE session_id = ?", (session_id,))
+            self.conn.execute("DELETE FROM tool_events WHERE session_id = ?", (session_id,))
+
+    def record(self, usage_events=(), tool_events=()):
+        """
+        Writes a batch of events in one transaction.
+
+        Args:
+            usage_events: dicts with message_id, session_id, model_name, input_tokens, output_tokens,
+                cached_tokens, tool_calls and optionally ts, latency_ms, cost (estimated if missing).
+            tool_events: dicts with tool_call_id, message_id, session_id, tool_name and optionally
+                ts, latency_ms, success, cache_hit, output_chars.
+        """
+        now = time.time()
+        usage_rows = [(
+            e["message_id"], e["session_id"], e.get("model_name"), e.get("ts", now),
+            e.get("input_tokens", 0), e.get("output_tokens", 0), e.get("cached_tokens", 0),
+            e["cost"] if e.get("cost") is not None
+            else estimate_cost(e.get("model_name"), e.get("input_tokens", 0), e.get("output_tokens", 0)),
+            e.get("latency_ms"), e.get("tool_calls", 0)
+        ) for e in usage_events if e.get("message_id")]
+        tool_rows = [(
+            e["tool_call_id"], e.get("message_id"), e["session_id"], e["tool_name"], e.get("ts", now),
+            e.get("latency_ms"), e.get("success"), e.get("cache_hit"), e.get("output_chars")
+        ) for e in tool_events]
+
+        with self._lock, self.conn:
+            # Live events carry latency; a later backfill must not overwrite them.
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO usage_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", usage_rows)
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tool_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", tool_rows)
+
+    def ingest_messages(self, session_id, messages, model_name):
+        """Backfills events from a checkpointed message history (no latency available)."""
+        usage_events, tool_events, issuer = [], [], {}
+        for msg in messages:
+            if isinstance(msg, AIMessage) and msg.id:
+                in_t, out_t, _, cached_t = extract_usage(msg.usage_metadata or {})
+                usage_events.append({
+                    "message_id": msg.id, "session_id": session_id, "model_name": model_name,
+                    "input_tokens": in_t, "output_tokens": out_t, "cached_tokens": cached_t,
+                    "tool_calls": len(msg.tool_calls), "ts": None,
+                })
+                for tc in msg.tool_calls:
+                    issuer[tc["id"]] = (msg.id, tc["name"])
+            elif isinstance(msg, ToolMessage) and msg.tool_call_id in issuer:
+                message_id, tool_name = issuer[msg.tool_call_id]
+                content = str(msg.content)
+                tool_events.append({
+                    "tool_call_id": msg.tool_call_id, "message_id": message_id, "session_id": session_id,
+                    "tool_name": tool_name, "ts": None, "success": int(not is_failure(content)),
+                    "output_chars": len(content),
+                })
+        self.record(usage_events, tool_events)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            cur = self.conn.execute(sql, params)
+            columns = [d[0] for d in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def cost_per_tool(self, session_id=None):
+        """
+        Cost attributed to each tool: the LLM call that issued a tool call is split evenly
+        across the calls it made.
+        """
+        where, params = ("WHERE t.session_id = ?", (session_id,)) if session_id else ("", ())
+        return self._query(f"""
+            SELECT t.tool_name, COUNT(*) AS calls,
+                   SUM(u.cost / MAX(u.tool_calls, 1)) AS cost,
+                   SUM((u.input_tokens + u.output_tokens) * 1.0 / MAX(u.tool_calls, 1)) AS tokens
+            FROM tool_events t JOIN usage_events u ON u.message_id = t.message_id
+            {where}
+            GROUP BY t.tool_name ORDER BY cost DESC
+        """, params)
+
+    def cache_hit_ratio_per_model(self):
+        """Share of input tokens served from the provider's prompt cache, per model."""
+        return self._query("""
+            SELECT model_name, COUNT(*) AS calls, SUM(input_tokens) AS input_tokens,
+                   SUM(cached_tokens) AS cached_tokens,
+                   SUM(cached_tokens) * 1.0 / NULLIF(SUM(input_tokens), 0) AS cache_hit_ratio,
+                   SUM(cost) AS cost
+            FROM usage_events GROUP BY model_name ORDER BY cost DESC
+        """)
+
+    def slowest_tools(self, limit=10):
+        """Tools by mean wall time (only calls with a measured latency)."""
+        return self._query("""
+            SELECT tool_name, COUNT(*) AS calls, AVG(latency_ms) AS avg_ms, MAX(latency_ms) AS max_ms,
+                   SUM(latency_ms) AS total_ms, AVG(success) AS success_rate, AVG(cache_hit) AS cache_hit_rate
+            FROM tool_events WHERE latency_ms IS NOT NULL
+            GROUP BY tool_name ORDER BY avg_ms DESC LIMIT ?
+        """, (limit,))
+
+    def cost_per_session(self, limit=20):
+        return self._query("""
+            SELECT session_id, COUNT(*) AS llm_calls, SUM(cost) AS cost, AVG(latency_ms) AS avg_llm_ms
+            FROM usage_events GROUP BY session_id ORDER BY cost DESC LIMIT ?
+        """, (limit,))
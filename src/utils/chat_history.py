@@ -0,0 +1,131 @@
+from langchain_core.messages import AIMessage, SystemMessage
+
+# Number of message groups shown per page of chat history.
+HISTORY_PAGE_SIZE = 30
+# Tool outputs are previewed in the history, never shown in full.
+OUTPUT_PREVIEW_CHARS = 500
+
+# Helper to parse message content
+def get_clean_content(msg):
+    content = msg.content
+    if isinstance(content, list):
+        text_blocks = []
+        for block in content:
+            if isinstance(block, dict):
+                if block.get("type") == "text":
+                    text_blocks.append(block.get("text", ""))
+            elif isinstance(block, str):
+                text_blocks.append(block)
+        return "\n".join(text_blocks)
+    return str(content)
+
+def tool_call_summary(args):
+    """Short label for a tool call header (the file it touches, if any)."""
+    if "filename" in args: return args["filename"]
+    if "target_file" in args: return args["target_file"]
+    if "design_file" in args: return args["design_file"]
+    if "verilog_files" in args: return str(args["verilog_files"])
+    if "top_module" in args: return args["top_module"]
+    return ""
+
+def output_icon(content):
+    if "Success" in content or "PASSED" in content: return "✅"
+    if "Error" in content or "FAILED" in content: return "❌"
+    return "📄"
+
+def _is_tool_related(msg):
+    if isinstance(msg, AIMessage) and hasattr(msg, "tool_calls") and msg.tool_calls:
+        return True
+    return hasattr(msg, "tool_call_id") # ToolMessage
+
+def _tool_steps(msg):
+    """Pre-rendered steps (calls and outputs) of one tool-related message."""
+    if isinstance(msg, AIMessage):
+        return [{"kind": "call", "name": tc["name"], "summary": tool_call_summary(tc["args"]), "args": tc["args"]}
+                for tc in msg.tool_calls]
+    content = get_clean_content(msg)
+    preview = content[:OUTPUT_PREVIEW_CHARS] + ("..." if len(content) > OUTPUT_PREVIEW_CHARS else "")
+    return [{"kind": "output", "icon": output_icon(content), "preview": preview}]
+
+def append_grouped(groups, messages):
+    """
+    Groups messages for display, extending `groups` in place.
+
+    Consecutive tool calls/outputs form one "group" (rendered as an execution log);
+    every other message is a "single". Items hold only pre-rendered text, not
+    message objects, so a cached history stays small.
+    """
+    for msg in messages:
+        if isinstance(msg, SystemMessage): continue
+
+        if _is_tool_related(msg):
+            # The trailing group is still open: nothing has been appended after it.
+            if not groups or groups[-1]["type"] != "group":
+                text = get_clean_content(msg) if isinstance(msg, AIMessage) else ""
+                groups.append({"type": "group", "text": text, "steps": []})
+            groups[-1]["steps"].extend(_tool_steps(msg))
+        else:
+            role = "assistant" if isinstance(msg, AIMessage) else "user"
+            groups.append({"type": "single", "role": role, "text": get_clean_content(msg)})
+    return groups
+
+class ChatHistoryCache:
+    """
+    Grouped, display-ready chat history for one thread, keyed on checkpoint id.
+
+    When the latest checkpoint id is unchanged the cached groups are returned without
+    loading state at all; otherwise only the messages appended since the last render
+    are grouped.
+    """
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.checkpoint_id = None
+        self.message_count = 0
+        self.last_message_id = None
+        self.groups = []
+
+    def refresh(self, checkpoint_id, load_messages):
+        """
+        Args:
+            checkpoint_id (str): Latest checkpoint id of the thread (None if no state yet).
+            load_messages (callable): Returns the full message list; only called on change.
+
+        Returns:
+            list: All groups, oldest first.
+        """
+        if checkpoint_id == self.checkpoint_id:
+            return self.groups
+
+        messages = load_messages() if checkpoint_id else []
+        # History is append-only; anything else (e.g. a rewritten thread) triggers a rebuild.
+        prefix_ok = (len(messages) >= self.message_count and
+                     (self.message_count == 0 or messages[self.message_count - 1].id == self.last_message_id))
+        if not prefix_ok:
+            self.groups = []
+            self.message_count = 0
+
+        append_grouped(self.groups, messages[self.message_count:])
+        self.message_count = len(messages)
+        self.last_message_id = messages[-1].id if messages else None
+        self.checkpoint_id = checkpoint_id
+        return self.groups
+
+def page_groups(groups, pages, page_size=HISTORY_PAGE_SIZE):
+    """
+    Returns (visible_groups, hidden_count) showing the newest `pages` pages of history.
+    """
+    visible = pages * page_size
+    if len(groups) <= visible:
+        return groups, 0
+    return groups[-visible:], len(groups) - visible
+
+def latest_checkpoint_id(checkpointer, thread_id):
+    """Latest checkpoint id for a thread, read straight from SQLite (no deserialization)."""
+    with checkpointer.cursor(transaction=False) as cur:
+        cur.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+            "ORDER BY checkpoint_id DESC LIMIT 1",
+            (thread_id,)
+        )
+        row = cur.fetchone()
+    return row[0] if row else None
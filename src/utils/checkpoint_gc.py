@@ -0,0 +1,144 @@
+import sqlite3
+import threading
+
+from src.config import CHECKPOINT_KEEP_LAST, CHECKPOINT_GC_INTERVAL, CHECKPOINT_VACUUM_PAGES
+
+# Tables that hang off a checkpoint. SqliteSaver uses `writes`; other saver versions use
+# `checkpoint_writes` / `checkpoint_blobs`. Only the ones that exist are touched.
+WRITE_TABLES = ("writes", "checkpoint_writes")
+BLOB_TABLES = ("checkpoint_blobs",)
+
+def _existing_tables(conn, names):
+    placeholders = ",".join("?" * len(names))
+    rows = conn.execute(
+        f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})", names
+    ).fetchall()
+    return [r[0] for r in rows]
+
+def delete_thread(conn, thread_id):
+    """Deletes every checkpoint row of a thread (all checkpoint tables that exist). Caller commits."""
+    for table in _existing_tables(conn, ("checkpoints",) + WRITE_TABLES + BLOB_TABLES):
+        conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+def prune_checkpoints(conn, keep_last=None, thread_id=None):
+    """
+    Deletes all but the newest `keep_last` checkpoints of each thread/namespace.
+
+    The latest checkpoint of a thread is always kept (keep_last is at least 1), so
+    resuming a session is unaffected. Caller commits.
+
+    Returns:
+        int: Number of checkpoints deleted.
+    """
+    keep_last = max(1, CHECKPOINT_KEEP_LAST if keep_last is None else keep_last)
+    if not _existing_tables(conn, ("checkpoints",)):
+        return 0
+    where, params = ("WHERE thread_id = ?", (thread_id,)) if thread_id else ("", ())
+    cur = conn.execute(f"""
+        DELETE FROM checkpoints WHERE rowid IN (
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (
+                    PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                ) AS rn
+                FROM checkpoints {where}
+            ) WHERE rn > ?
+        )
+    """, params + (keep_last,))
+    return cur.rowcount
+
+def prune_orphans(conn):
+    """
+    Deletes pending writes whose checkpoint no longer exists, and blobs of threads
+    without any checkpoint. Caller commits.
+
+    Returns:
+        int: Number of rows deleted.
+    """
+    deleted = 0
+    for table in _existing_tables(conn, WRITE_TABLES):
+        deleted += conn.execute(f"""
+            DELETE FROM {table} WHERE NOT EXISTS (
+                SELECT 1 FROM checkpoints c
+                WHERE c.thread_id = {table}.thread_id AND c.checkpoint_ns = {table}.checkpoint_ns
+                  AND c.checkpoint_id = {table}.checkpoint_id
+            )
+        """).rowcount
+    for table in _existing_tables(conn, BLOB_TABLES):
+        deleted += conn.execute(f"""
+            DELETE FROM {table} WHERE thread_id NOT IN (SELECT DISTINCT thread_id FROM checkpoints)
+        """).rowcount
+    return deleted
+
+def compact_database(conn, vacuum_pages=None):
+    """
+    Returns freed pages to the filesystem and truncates the WAL.
+
+    The first call on a database switches it to auto_vacuum=INCREMENTAL, which needs a
+    one-off full VACUUM; afterwards each call frees at most `vacuum_pages` pages, so the
+    cost per run stays bounded. `conn` must not be inside a transaction.
+    """
+    vacuum_pages = CHECKPOINT_VACUUM_PAGES if vacuum_pages is None else vacuum_pages
+    # 2 == INCREMENTAL
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+def collect_garbage(db_path, keep_last=None, vacuum_pages=None, compact=True):
+    """
+    Applies the retention policy to a checkpoint database and compacts it.
+
+    Uses its own short-lived connection, so it is safe to call while the app's
+    checkpointer is open (WAL readers are not blocked; writers wait on busy_timeout).
+
+    Returns:
+        dict: {"checkpoints_deleted", "orphans_deleted"}
+    """
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            checkpoints_deleted = prune_checkpoints(conn, keep_last)
+            orphans_deleted = prune_orphans(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if compact:
+            compact_database(conn, vacuum_pages)
+    finally:
+        conn.close()
+    return {"checkpoints_deleted": checkpoints_deleted, "orphans_deleted": orphans_deleted}
+
+class CheckpointCollector:
+    """
+    Runs collect_garbage in a daemon thread: once at start, then every `interval` seconds.
+    """
+    def __init__(self, db_path, interval=None, keep_last=None):
+        self.db_path = db_path
+        self.interval = CHECKPOINT_GC_INTERVAL if interval is None else interval
+        self.keep_last = keep_last
+        self.last_result = None
+        self.last_error = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="checkpoint-gc", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.last_result = collect_garbage(self.db_path, self.keep_last)
+                self.last_error = None
+            except sqlite3.Error as e:
+                # e.g. the DB was deleted or is busy; retry on the next tick
+                self.last_error = str(e)
+            self._stopped.wait(self.interval)
@@ -0,0 +1,97 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.config import CONTEXT_TOKEN_BUDGET, CONTEXT_KEEP_TURNS, CONTEXT_COMPACT_STEP
+
+# Old tool outputs keep this many characters of their head (status line, first errors).
+COMPACT_HEAD_CHARS = 300
+# Old tool-call arguments (e.g. write_file content) longer than this are elided.
+COMPACT_ARG_CHARS = 200
+
+def estimate_tokens(msg):
+    """Cheap token estimate (~4 characters per token) for a message, including tool-call args."""
+    content = msg.content
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    chars = len(content)
+    if isinstance(msg, AIMessage) and msg.tool_calls:
+        chars += len(json.dumps([tc["args"] for tc in msg.tool_calls], default=str))
+    return chars // 4 + 1
+
+def _compact_tool_message(msg):
+    content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content, default=str)
+    if len(content) <= COMPACT_HEAD_CHARS:
+        return msg
+    omitted = len(content) - COMPACT_HEAD_CHARS
+    stub = (f"{content[:COMPACT_HEAD_CHARS]}\n"
+            f"[... {omitted} chars of older tool output compacted. Re-run the tool if you need it again.]")
+    return msg.model_copy(update={"content": stub})
+
+def _compact_ai_message(msg):
+    if not msg.tool_calls:
+        return msg
+    changed = False
+    tool_calls = []
+    for tc in msg.tool_calls:
+        args = {}
+        for name, value in tc["args"].items():
+            if isinstance(value, str) and len(value) > COMPACT_ARG_CHARS:
+                value = f"{value[:COMPACT_ARG_CHARS]}... [{len(value) - COMPACT_ARG_CHARS} chars compacted]"
+                changed = True
+            args[name] = value
+        tool_calls.append({**tc, "args": args})
+    if not changed:
+        return msg
+    return msg.model_copy(update={"tool_calls": tool_calls})
+
+def _compact(msg):
+    if isinstance(msg, ToolMessage):
+        return _compact_tool_message(msg)
+    return _compact_ai_message(msg)
+
+def compact_messages(messages, token_budget=CONTEXT_TOKEN_BUDGET, keep_turns=CONTEXT_KEEP_TURNS,
+                     step=CONTEXT_COMPACT_STEP):
+    """
+    Returns the list of messages to send to the LLM, compacted to fit a token budget.
+
+    System messages and the last `keep_turns` user turns (and everything after them) are
+    kept verbatim. Older tool outputs are cut down to their head, and large tool-call
+    arguments are elided, oldest first, until the estimate fits the budget.
+
+    To keep the prompt prefix stable (and provider-side prompt caching effective), the
+    compaction boundary only advances in whole blocks of `step` old messages, and compacting
+    a message is deterministic, so a compacted prefix is byte-identical on later turns.
+    The checkpointed state is never modified.
+    """
+    total = sum(estimate_tokens(m) for m in messages)
+    if total <= token_budget:
+        return list(messages)
+
+    # Start of the protected tail: the keep_turns-th last human message.
+    human_idx = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if not human_idx:
+        return list(messages)
+    protected_from = human_idx[-min(keep_turns, len(human_idx))]
+
+    candidates = [i for i in range(protected_from) if isinstance(messages[i], (ToolMessage, AIMessage))]
+    compacted = {}
+    savings = 0
+    needed = len(candidates)
+    for n, i in enumerate(candidates, start=1):
+        compacted[i] = _compact(messages[i])
+        savings += estimate_tokens(messages[i]) - estimate_tokens(compacted[i])
+        if total - savings <= token_budget:
+            needed = n
+            break
+
+    # Round the boundary up to a whole block so it moves rarely between turns.
+    boundary = min(len(candidates), -(-needed // step) * step)
+    for i in candidates[len(compacted):boundary]:
+        compacted[i] = _compact(messages[i])
+
+    return [compacted.get(i, m) for i, m in enumerate(messages)]
+
+def compaction_prompt(state):
+    """Prompt callable for create_react_agent: compacts state["messages"] before each model call."""
+    return compact_messages(state["messages"])
@@ -0,0 +1,197 @@
+import os
+import threading
+from collections import OrderedDict
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+# Watched workspaces kept alive at once; the least recently used index is stopped beyond this.
+MAX_WATCHED_WORKSPACES = 8
+
+def _is_hidden(rel_path):
+    # Internal artifact dirs (.tool_outputs, .reports, ...) are not part of the visible workspace
+    return any(part.startswith(".") for part in rel_path.split(os.sep))
+
+class FileIndex(FileSystemEventHandler):
+    """
+    In-memory index of the files under one workspace: relative path -> (size, mtime).
+
+    Built with a single scan, then kept current by watchdog events, so listing files,
+    building the file tree or finding GDS/VCD/SVG outputs never touches the disk.
+    `version` increases on every change and can be used as a cache key.
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.version = 0
+        self._files = {}
+        self._lock = threading.RLock()
+        self._observer = None
+
+    def start(self):
+        os.makedirs(self.root, exist_ok=True)
+        self._observer = Observer()
+        self._observer.schedule(self, self.root, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+        # Scan after the watch is armed so nothing created in between is missed
+        self.rescan()
+        return self
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def rescan(self, subdir=""):
+        """Re-indexes everything below `subdir` (relative to root)."""
+        base = os.path.join(self.root, subdir)
+        found = {}
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[os.path.relpath(path, self.root)] = (st.st_size, st.st_mtime)
+        with self._lock:
+            self._drop_prefix(subdir)
+            self._files.update(found)
+            self.version += 1
+
+    def _rel(self, path):
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        rel = os.path.relpath(path, self.root)
+        return None if rel == "." or rel.startswith("..") or _is_hidden(rel) else rel
+
+    def _drop_prefix(self, rel_dir):
+        if not rel_dir:
+            self._files.clear()
+            return
+        prefix = rel_dir + os.sep
+        for key in [k for k in self._files if k.startswith(prefix)]:
+            del self._files[key]
+
+    def _stat_into_index(self, rel):
+        try:
+            st = os.stat(os.path.join(self.root, rel))
+        except OSError:
+            self._files.pop(rel, None)
+            return
+        self._files[rel] = (st.st_size, st.st_mtime)
+
+    def refresh(self, path):
+        """
+        Synchronously stats one file (absolute or relative to root) into the index.
+
+        Watchdog events arrive on the observer thread some milliseconds after a write;
+        callers that just wrote a file and redraw right away use this instead of waiting.
+        """
+        rel = self._rel(os.path.join(self.root, path))
+        if rel is None:
+            return
+        with self._lock:
+            self._stat_into_index(rel)
+            self.version += 1
+
+    # --- watchdog callbacks (observer thread) ---
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        src = self._rel(event.src_path)
+        dest = self._rel(getattr(event, "dest_path", "") or "") if event.event_type == "moved" else None
+
+        if event.is_directory:
+            if event.event_type in ("deleted", "moved") and src:
+                with self._lock:
+                    self._drop_prefix(src)
+                    self.version += 1
+            if event.event_type == "created" and src:
+                self.rescan(src)
+            if dest:
+                self.rescan(dest)
+            return
+
+        with self._lock:
+            if event.event_type == "deleted" and src:
+                self._files.pop(src, None)
+            elif event.event_type == "moved":
+                if src:
+                    self._files.pop(src, None)
+                if dest:
+                    self._stat_into_index(dest)
+            elif src:
+                self._stat_into_index(src)
+            self.version += 1
+
+    # --- queries ---
+    def files(self, extensions=None, root_only=False):
+        """Sorted relative paths, optionally filtered by extension(s) and to the workspace root."""
+        with self._lock:
+            paths = list(self._files)
+        if extensions:
+            paths = [p for p in paths if p.endswith(tuple(extensions))]
+        if root_only:
+            paths = [p for p in paths if os.sep not in p]
+        return sorted(paths)
+
+    def recent(self, n=10, extensions=None):
+        """The `n` most recently modified files (newest first)."""
+        with self._lock:
+            items = list(self._files.items())
+        if extensions:
+            items = [(p, v) for p, v in items if p.endswith(tuple(extensions))]
+        items.sort(key=lambda item: item[1][1], reverse=True)
+        return [p for p, _ in items[:n]]
+
+    def stat(self, rel_path):
+        """(size, mtime) of an indexed file, or None."""
+        with self._lock:
+            return self._files.get(rel_path)
+
+    def tree(self, extensions=None):
+        """Nested {"files": [...], "dirs": {name: subtree}} of matching files; empty dirs are omitted."""
+        tree = {"files": [], "dirs": {}}
+        for rel in self.files(extensions):
+            *dirs, name = rel.split(os.sep)
+            node = tree
+            for d in dirs:
+                node = node["dirs"].setdefault(d, {"files": [], "dirs": {}})
+            node["files"].append(name)
+        return tree
+
+_lock = threading.Lock()
+_indexes = OrderedDict() # root -> FileIndex (process-level, survives reruns)
+
+def get_file_index(root):
+    """Returns the watched index for a workspace, building it on first use."""
+    root = os.path.abspath(root)
+    with _lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = FileIndex(root).start()
+            _indexes[root] = index
+            while len(_indexes) > MAX_WATCHED_WORKSPACES:
+                _, oldest = _indexes.popitem(last=False)
+                oldest.stop()
+        else:
+            _indexes.move_to_end(root)
+        return index
+
+def release_file_index(root):
+    """Stops watching a workspace (e.g. before it is deleted)."""
+    with _lock:
+        index = _indexes.pop(os.path.abspath(root), None)
+    if index is not None:
+        index.stop()
+
+def release_all_file_indexes():
+    with _lock:
+        indexes = list(_indexes.values())
+        _indexes.clear()
+    for index in indexes:
+        index.stop()
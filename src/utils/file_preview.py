@@ -0,0 +1,76 @@
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+
+# Files up to this size are previewed whole; larger ones are paged from the head or tail.
+PREVIEW_MAX_BYTES = 256 * 1024
+PREVIEW_PAGE_LINES = 300
+# Tail pages are read backwards in blocks of this size.
+_TAIL_BLOCK = 64 * 1024
+_CACHE_ENTRIES = 64
+
+_cache = OrderedDict() # (path, mtime, size, mode, page, page_lines) -> preview dict
+_cache_lock = threading.Lock()
+
+def _read_head(path, page, page_lines):
+    with open(path, "r", errors="ignore") as f:
+        lines = list(islice(f, page * page_lines, (page + 1) * page_lines + 1))
+    has_more = len(lines) > page_lines
+    return "".join(lines[:page_lines]), has_more
+
+def _read_tail(path, page, page_lines, size):
+    """Lines [-(page+1)*page_lines, -page*page_lines) without reading the whole file."""
+    wanted = (page + 1) * page_lines + 1
+    data = b""
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0 and data.count(b"\n") < wanted:
+            step = min(_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="ignore").splitlines(keepends=True)
+    # The first line may be partial unless we reached the start of the file
+    if pos > 0 and lines:
+        lines = lines[1:]
+    end = len(lines) - page * page_lines
+    start = max(end - page_lines, 0)
+    has_more = pos > 0 or start > 0
+    return "".join(lines[start:max(end, 0)]), has_more
+
+def read_preview(path, mode="head", page=0, page_lines=PREVIEW_PAGE_LINES):
+    """
+    Reads a preview of a text file, cached on (path, mtime, size).
+
+    Small files (<= PREVIEW_MAX_BYTES) are returned whole. Larger files return one page of
+    `page_lines` lines counted from the head or from the tail (page 0 is the first/last page).
+
+    Returns:
+        dict: {"text", "size", "truncated" (bool), "has_more" (more pages in this direction)}
+    """
+    st = os.stat(path)
+    truncated = st.st_size > PREVIEW_MAX_BYTES
+    if not truncated:
+        mode, page = "full", 0
+    key = (path, st.st_mtime_ns, st.st_size, mode, page, page_lines)
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    if mode == "full":
+        with open(path, "r", errors="ignore") as f:
+            text, has_more = f.read(), False
+    elif mode == "tail":
+        text, has_more = _read_tail(path, page, page_lines, st.st_size)
+    else:
+        text, has_more = _read_head(path, page, page_lines)
+
+    preview = {"text": text, "size": st.st_size, "truncated": truncated, "has_more": has_more}
+    with _cache_lock:
+        _cache[key] = preview
+        while len(_cache) > _CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return preview
@@ -0,0 +1,320 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import gdstk
+import numpy as np
+import matplotlib.colors
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection
+
+# Rendered tiles are PNGs of TILE_SIZE x TILE_SIZE pixels. Zoom level z splits the layout
+# into 2**z x 2**z tiles; level 0 is the whole-layout overview.
+TILE_SIZE = 512
+MAX_ZOOM = 4
+# Tiles are cached on disk next to the GDS, under a hidden directory (ignored by the file index),
+# together with META_FILE (layer list, bbox) so a cached layout is never parsed just to list its layers.
+TILE_DIR = ".gds_tiles"
+META_FILE = "meta.json"
+# Parsed layouts kept in memory (a routed design can be large).
+_LAYOUT_CACHE_ENTRIES = 2
+# Level of detail: shapes smaller than MIN_FEATURE_PX pixels at the current zoom are not drawn
+# individually but accumulated into a per-layer density map of DENSITY_RES x DENSITY_RES cells.
+MIN_FEATURE_PX = 1.5
+DENSITY_RES = 128
+# The spatial index splits the layout into GRID_CELLS x GRID_CELLS buckets.
+GRID_CELLS = 64
+# Part of the tile file name; bump when the rendering changes so old tiles are not reused.
+RENDER_VERSION = 2
+
+LAYER_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b",
+                "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"]
+
+def gds_fingerprint(gds_path):
+    """Cache key of a GDS file: path + mtime + size (changes whenever the flow rewrites it)."""
+    st = os.stat(gds_path)
+    return hashlib.sha1(f"{os.path.abspath(gds_path)}:{st.st_mtime_ns}:{st.st_size}".encode()).hexdigest()[:16]
+
+class Layout:
+    """
+    A GDS top cell flattened once into per-layer polygon arrays.
+
+    Attributes:
+        layers (dict): (layer, datatype) -> {"polygons": [Nx2 arrays], "bbox": Kx4 array (xmin, ymin, xmax, ymax)}
+        bbox (tuple): Overall (xmin, ymin, xmax, ymax).
+        cell_name (str), fingerprint (str)
+    """
+    def __init__(self, gds_path):
+        self.path = os.path.abspath(gds_path)
+        self.fingerprint = gds_fingerprint(gds_path)
+        lib = gdstk.read_gds(gds_path)
+        top_cells = lib.top_level()
+        if not top_cells:
+            raise ValueError("No top level cell found in GDS.")
+        cell = top_cells[0]
+        self.cell_name = cell.name
+
+        grouped = {}
+        for poly in cell.get_polygons(apply_repetitions=True, include_paths=True):
+            grouped.setdefault((poly.layer, poly.datatype), []).append(poly.points)
+
+        self.layers = {}
+        for spec, polygons in sorted(grouped.items()):
+            bbox = np.array([[p[:, 0].min(), p[:, 1].min(), p[:, 0].max(), p[:, 1].max()] for p in polygons])
+            self.layers[spec] = {
+                "polygons": polygons,
+                "bbox": bbox,
+                "size": np.maximum(bbox[:, 2] - bbox[:, 0], bbox[:, 3] - bbox[:, 1]),
+                "center": (bbox[:, :2] + bbox[:, 2:]) / 2,
+                "area": (bbox[:, 2] - bbox[:, 0]) * (bbox[:, 3] - bbox[:, 1]),
+            }
+
+        if self.layers:
+            all_bbox = np.vstack([l["bbox"] for l in self.layers.values()])
+            self.bbox = (all_bbox[:, 0].min(), all_bbox[:, 1].min(), all_bbox[:, 2].max(), all_bbox[:, 3].max())
+        else:
+            self.bbox = (0.0, 0.0, 1.0, 1.0)
+        self._grids = {}
+        self._grids_lock = threading.Lock()
+
+    @property
+    def polygon_count(self):
+        return sum(len(l["polygons"]) for l in self.layers.values())
+
+    def tile_bounds(self, zoom, tx, ty):
+        """World-space (xmin, ymin, xmax, ymax) of a tile; ty = 0 is the top row."""
+        xmin, ymin, xmax, ymax = self.bbox
+        side = max(xmax - xmin, ymax - ymin) or 1.0
+        step = side / (2 ** zoom)
+        top = ymin + side
+        return (xmin + tx * step, top - (ty + 1) * step, xmin + (tx + 1) * step, top - ty * step)
+
+    def grid(self, spec):
+        """The layer's GridIndex, built on first use."""
+        with self._grids_lock:
+            grid = self._grids.get(spec)
+            if grid is None:
+                grid = GridIndex(self.layers[spec]["bbox"], self.bbox)
+                self._grids[spec] = grid
+            return grid
+
+    def query(self, spec, bounds, min_size=0.0):
+        """
+        Shapes of a layer intersecting `bounds` (xmin, ymin, xmax, ymax).
+
+        Returns:
+            tuple: (indices of shapes at least `min_size` wide/tall, indices of smaller ones)
+        """
+        data = self.layers[spec]
+        candidates = self.grid(spec).query(bounds)
+        if len(candidates) == 0:
+            return candidates, candidates
+        x0, y0, x1, y1 = bounds
+        bbox = data["bbox"][candidates]
+        hit = (bbox[:, 2] >= x0) & (bbox[:, 0] <= x1) & (bbox[:, 3] >= y0) & (bbox[:, 1] <= y1)
+        visible = candidates[hit]
+        big = data["size"][visible] >= min_size
+        return visible[big], visible[~big]
+
+    def layer_color(self, spec):
+        return LAYER_COLORS[list(self.layers).index(spec) % len(LAYER_COLORS)]
+
+class GridIndex:
+    """
+    Uniform-grid spatial index over shape bounding boxes.
+
+    Each shape is listed in every bucket its bbox overlaps, so a viewport query only
+    touches the buckets it covers and its cost scales with the viewport, not the design.
+    """
+    def __init__(self, bbox, extent, cells=GRID_CELLS):
+        self.cells = cells
+        self.x0, self.y0 = extent[0], extent[1]
+        side = max(extent[2] - extent[0], extent[3] - extent[1]) or 1.0
+        self.step = side / cells
+
+        ix0, iy0 = self._cell(bbox[:, 0], bbox[:, 1])
+        ix1, iy1 = self._cell(bbox[:, 2], bbox[:, 3])
+        self.buckets = {}
+
+        # Most shapes fit in one bucket: group those with one sort
+        single = (ix0 == ix1) & (iy0 == iy1)
+        idx = np.nonzero(single)[0]
+        cell_ids = iy0[idx] * cells + ix0[idx]
+        order = np.argsort(cell_ids, kind="stable")
+        ids, starts = np.unique(cell_ids[order], return_index=True)
+        for cid, group in zip(ids, np.split(idx[order], starts[1:])):
+            self.buckets[int(cid)] = [group]
+
+        for i in np.nonzero(~single)[0]:
+            for gy in range(iy0[i], iy1[i] + 1):
+                for gx in range(ix0[i], ix1[i] + 1):
+                    self.buckets.setdefault(gy * cells + gx, []).append(np.array([i]))
+
+        self.buckets = {cid: np.concatenate(parts) for cid, parts in self.buckets.items()}
+
+    def _cell(self, x, y):
+        ix = np.clip(((np.asarray(x) - self.x0) / self.step).astype(int), 0, self.cells - 1)
+        iy = np.clip(((np.asarray(y) - self.y0) / self.step).astype(int), 0, self.cells - 1)
+        return ix, iy
+
+    def query(self, bounds):
+        """Candidate shape indices for a viewport (may include shapes just outside it)."""
+        gx0, gy0 = self._cell(bounds[0], bounds[1])
+        gx1, gy1 = self._cell(bounds[2], bounds[3])
+        parts = [self.buckets[cid]
+                 for gy in range(int(gy0), int(gy1) + 1) for gx in range(int(gx0), int(gx1) + 1)
+                 if (cid := gy * self.cells + gx) in self.buckets]
+        if not parts:
+            return np.array([], dtype=int)
+        return np.unique(np.concatenate(parts))
+
+_layouts = OrderedDict() # fingerprint -> Layout
+_layouts_lock = threading.Lock()
+
+def load_layout(gds_path):
+    """Returns the parsed Layout, re-reading the GDS only when its fingerprint changes."""
+    key = gds_fingerprint(gds_path)
+    with _layouts_lock:
+        layout = _layouts.get(key)
+        if layout is not None:
+            _layouts.move_to_end(key)
+            return layout
+    layout = Layout(gds_path)
+    with _layouts_lock:
+        _layouts[key] = layout
+        while len(_layouts) > _LAYOUT_CACHE_ENTRIES:
+            _layouts.popitem(last=False)
+    return layout
+
+def _layers_key(layers):
+    return hashlib.sha1(",".join(f"{l}.{d}" for l, d in sorted(layers)).encode()).hexdigest()[:8]
+
+def _density_rgba(layout, spec, idx, bounds, color):
+    """Coverage map of small shapes: each cell's alpha is the share of its area they cover."""
+    data = layout.layers[spec]
+    x0, y0, x1, y1 = bounds
+    centers = data["center"][idx]
+    hist, _, _ = np.histogram2d(centers[:, 1], centers[:, 0], bins=DENSITY_RES,
+                                range=[[y0, y1], [x0, x1]], weights=data["area"][idx])
+    cell_area = ((x1 - x0) / DENSITY_RES) * ((y1 - y0) / DENSITY_RES)
+    coverage = np.clip(hist / cell_area, 0.0, 1.0)
+    rgba = np.zeros((DENSITY_RES, DENSITY_RES, 4))
+    rgba[..., :3] = matplotlib.colors.to_rgb(color)
+    rgba[..., 3] = coverage * 0.8
+    return rgba
+
+def rasterize_tile(layout, zoom, tx, ty, layers=None, tile_size=TILE_SIZE):
+    """
+    Rasterizes one tile to PNG bytes (no caching).
+
+    Only shapes inside the tile are fetched (via the spatial index). Shapes at least
+    MIN_FEATURE_PX pixels across are drawn as polygons; smaller ones are merged into a
+    density map, so the work per tile is bounded by the viewport, not the design size.
+    """
+    layers = list(layout.layers) if layers is None else layers
+    bounds = layout.tile_bounds(zoom, tx, ty)
+    x0, y0, x1, y1 = bounds
+    min_size = MIN_FEATURE_PX * (x1 - x0) / tile_size
+
+    fig = Figure(figsize=(tile_size / 100, tile_size / 100), dpi=100)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(x0, x1)
+    ax.set_ylim(y0, y1)
+    ax.set_axis_off()
+    ax.set_facecolor("white")
+    for spec in layers:
+        data = layout.layers.get(spec)
+        if data is None:
+            continue
+        big, small = layout.query(spec, bounds, min_size)
+        color = layout.layer_color(spec)
+        if len(small):
+            ax.imshow(_density_rgba(layout, spec, small, bounds, color), origin="lower",
+                      extent=(x0, x1, y0, y1), interpolation="nearest", aspect="auto")
+        if len(big):
+            ax.add_collection(PolyCollection([data["polygons"][i] for i in big],
+                                             facecolors=color, edgecolors=color, linewidths=0.2, alpha=0.45))
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", facecolor="white")
+    return buf.getvalue()
+
+def _tile_dir(gds_path, fingerprint):
+    """<gds dir>/.gds_tiles/<gds name>/<fingerprint>/"""
+    gds_path = os.path.abspath(gds_path)
+    return os.path.join(os.path.dirname(gds_path), TILE_DIR, os.path.basename(gds_path), fingerprint)
+
+def _prepare_tile_dir(tile_dir):
+    """Creates the tile directory of a GDS version, removing the tiles of older versions."""
+    gds_dir = os.path.dirname(tile_dir)
+    if not os.path.isdir(tile_dir) and os.path.isdir(gds_dir):
+        for stale in os.listdir(gds_dir):
+            shutil.rmtree(os.path.join(gds_dir, stale), ignore_errors=True)
+    os.makedirs(tile_dir, exist_ok=True)
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def layout_info(gds_path):
+    """
+    Layer list, bbox, top cell name and polygon count of a GDS.
+
+    Read from META_FILE next to the tiles when this GDS version was seen before, so
+    nothing is parsed; otherwise the layout is loaded once and the metadata stored.
+
+    Returns:
+        dict: {"fingerprint", "cell_name", "layers": [(layer, datatype), ...], "bbox", "polygon_count"}
+    """
+    meta_path = os.path.join(_tile_dir(gds_path, gds_fingerprint(gds_path)), META_FILE)
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta.get("version") == RENDER_VERSION:
+            return {**meta, "layers": [tuple(spec) for spec in meta["layers"]]}
+    except (OSError, ValueError):
+        pass
+
+    layout = load_layout(gds_path)
+    meta = {
+        "version": RENDER_VERSION,
+        "fingerprint": layout.fingerprint,
+        "cell_name": layout.cell_name,
+        "layers": [list(spec) for spec in layout.layers],
+        "bbox": [float(v) for v in layout.bbox],
+        "polygon_count": layout.polygon_count,
+    }
+    tile_dir = _tile_dir(gds_path, layout.fingerprint)
+    _prepare_tile_dir(tile_dir)
+    _write_atomic(os.path.join(tile_dir, META_FILE), json.dumps(meta).encode())
+    return {**meta, "layers": [tuple(spec) for spec in meta["layers"]]}
+
+def get_tile(gds_path, zoom, tx, ty, layers=None, tile_size=TILE_SIZE):
+    """
+    Returns PNG bytes for a tile of a GDS file, rendering it only on a cache miss.
+
+    Tiles are stored under <gds dir>/.gds_tiles/<gds name>/<fingerprint>/, keyed by zoom,
+    position and the set of visible layers. The lookup needs only the file fingerprint:
+    the GDS is parsed (load_layout) only when the tile is not on disk yet, so an unchanged
+    layout is served from disk even after a restart. Tiles of older versions of the same
+    GDS are removed when a new version is first rendered.
+    """
+    if layers is None:
+        layers = layout_info(gds_path)["layers"]
+    name = f"v{RENDER_VERSION}_z{zoom}_{tx}_{ty}_{tile_size}_{_layers_key(layers)}.png"
+    path = os.path.join(_tile_dir(gds_path, gds_fingerprint(gds_path)), name)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    layout = load_layout(gds_path)
+    png = rasterize_tile(layout, zoom, tx, ty, layers, tile_size)
+    tile_dir = _tile_dir(gds_path, layout.fingerprint)
+    _prepare_tile_dir(tile_dir)
+    _write_atomic(os.path.join(tile_dir, name), png)
+    return png
@@ -1,109 +1,149 @@
-import sqlite3
+import os
 import datetime
+import threading
+from collections import OrderedDict
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from langgraph.checkpoint.sqlite import SqliteSaver
-from src.agents.architect import create_architect_agent
 
-# Reuse pricing logic logic if possible, or duplicate for independence
-PRICING = {
-    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
-    "gemini-3-pro-preview": {"input": 2.00, "output": 12.00}
-}
+from src.utils import agent_registry
+from src.utils.usage import extract_usage, get_rates
 
-def generate_markdown_report(session_id, db_path, model_name="gemini-2.5-flash"):
+# Reports are written (and reused) per checkpoint under <workspace>/.reports/
+REPORT_DIR = ".reports"
+# Sessions whose token aggregate is kept in memory (least recently reported evicted first)
+AGGREGATE_CACHE_SIZE = 64
+
+class ReportAggregate:
     """
-    Generates a Markdown report for a given session.
+    Token totals of one session up to a given checkpoint.
+
+    History is append-only, so a newer checkpoint only adds the messages appended since
+    the last one; a rewritten history triggers a full recount.
     """
-    
-    # 1. Connect to DB to get history
-    try:
-        conn = sqlite3.connect(db_path, check_same_thread=False)
-        memory = SqliteSaver(conn)
-        config = {"configurable": {"thread_id": session_id}}
-        
-        # We need the agent graph to load the state
-        # We just need the state, no need to actually run agent
-        # Passing a dummy model_name since we won't invoke LLM
-        agent_graph = create_architect_agent(checkpointer=memory, model_name=model_name)
-        
-        current_state = agent_graph.get_state(config)
-        messages = current_state.values.get("messages", [])
-        conn.close()
-    except Exception as e:
-        return f"# Error Generating Report\n\nCould not load session: {e}"
+    def __init__(self):
+        self.checkpoint_id = None
+        self.message_count = 0
+        self.last_message_id = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.total_tokens = 0
 
-    if not messages:
-        return f"# Session Report: {session_id}\n\n*No messages found.*"
-
-    # 2. Analyze Token Usage
-    input_tokens = 0
-    output_tokens = 0
-    cached_tokens = 0
-    total_tokens = 0
-    
-    transcript = []
-    
-    for msg in messages:
-        # Transcript Formatting
-        role = "Unknown"
-        
-        # Helper to clean content
-        def get_clean_content(c):
-            if isinstance(c, list):
-                text_parts = []
-                for item in c:
-                    if isinstance(item, dict) and "text" in item:
-                        text_parts.append(item["text"])
-                    elif isinstance(item, str):
-                        text_parts.append(item)
-                return "\n".join(text_parts)
-            return str(c)
-            
-        content = get_clean_content(msg.content)
-        
-        if isinstance(msg, SystemMessage):
-            # Skip system prompt in transcript usually, or make it collapsible
-            continue 
-        elif isinstance(msg, HumanMessage):
-            role = "User"
-            transcript.append(f"## 👤 User\n\n{content}\n")
-        elif isinstance(msg, AIMessage):
-            role = "Assistant"
-            # Check for tool calls
-            if hasattr(msg, "tool_calls") and msg.tool_calls:
-                tools_used = [tc['name'] for tc in msg.tool_calls]
-                transcript.append(f"## 🤖 Assistant (Tools: {', '.join(tools_used)})\n")
-            else:
-                transcript.append(f"## 🤖 Assistant\n\n{content}\n")
-                
+    def update(self, checkpoint_id, messages):
+        if checkpoint_id == self.checkpoint_id:
+            return self
+        prefix_ok = (len(messages) >= self.message_count and
+                     (self.message_count == 0 or messages[self.message_count - 1].id == self.last_message_id))
+        if not prefix_ok:
+            self.__init__()
+
+        for msg in messages[self.message_count:]:
             # Usage Tracking (Only on AI Messages)
-            if hasattr(msg, "usage_metadata") and msg.usage_metadata:
-                meta = msg.usage_metadata
-                in_t = meta.get("input_tokens", 0)
-                out_t = meta.get("output_tokens", 0)
-                tot_t = meta.get("total_tokens", 0)
-                
-                # Cache
-                c_t = 0
-                if "input_token_details" in meta:
-                    det = meta["input_token_details"]
-                    if isinstance(det, dict):
-                        c_t = det.get("cache_read", 0) or det.get("cache_read_input_tokens", 0)
-                
-                input_tokens += in_t
-                output_tokens += out_t
-                total_tokens += tot_t
-                cached_tokens += c_t
-
-        elif hasattr(msg, "tool_call_id"): # ToolMessage
-             transcript.append(f"## ⚙️ Tool Output\n\n```\n{content[:500]}...\n```\n")
+            if isinstance(msg, AIMessage) and msg.usage_metadata:
+                in_t, out_t, tot_t, c_t = extract_usage(msg.usage_metadata)
+                self.input_tokens += in_t
+                self.output_tokens += out_t
+                self.total_tokens += tot_t
+                self.cached_tokens += c_t
+
+        self.message_count = len(messages)
+        self.last_message_id = messages[-1].id if messages else None
+        self.checkpoint_id = checkpoint_id
+        return self
+
+# session_id -> ReportAggregate (process-level LRU, survives Streamlit reruns)
+_aggregates = OrderedDict()
+_aggregates_lock = threading.Lock()
+
+def load_session(session_id, db_path):
+    """
+    Reads the latest checkpoint straight from the shared checkpointer (no agent graph or LLM client).
+
+    Returns:
+        tuple: (checkpoint_id or None, list of messages)
+    """
+    saver = agent_registry.get_checkpointer(db_path)
+    checkpoint_tuple = saver.get_tuple({"configurable": {"thread_id": session_id}})
+    if checkpoint_tuple is None:
+        return None, []
+    checkpoint = checkpoint_tuple.checkpoint
+    return checkpoint["id"], checkpoint.get("channel_values", {}).get("messages", [])
+
+def get_aggregate(session_id, checkpoint_id, messages):
+    with _aggregates_lock:
+        aggregate = _aggregates.get(session_id)
+        if aggregate is None:
+            aggregate = _aggregates[session_id] = ReportAggregate()
+        _aggregates.move_to_end(session_id)
+        while len(_aggregates) > AGGREGATE_CACHE_SIZE:
+            _aggregates.popitem(last=False)
+        return aggregate.update(checkpoint_id, messages)
+
+def discard_aggregate(session_id=None):
+    """Drops the cached aggregate of one session (or all), e.g. when it is deleted."""
+    with _aggregates_lock:
+        if session_id is None:
+            _aggregates.clear()
+        else:
+            _aggregates.pop(session_id, None)
+
+# Helper to clean content
+def get_clean_content(c):
+    if isinstance(c, list):
+        text_parts = []
+        for item in c:
+            if isinstance(item, dict) and "text" in item:
+                text_parts.append(item["text"])
+            elif isinstance(item, str):
+                text_parts.append(item)
+        return "\n".join(text_parts)
+    return str(c)
+
+def _transcript_entry(msg):
+    content = get_clean_content(msg.content)
+
+    if isinstance(msg, SystemMessage):
+        # Skip system prompt in transcript usually, or make it collapsible
+        return None
+    elif isinstance(msg, HumanMessage):
+        return f"## 👤 User\n\n{content}\n"
+    elif isinstance(msg, AIMessage):
+        # Check for tool calls
+        if hasattr(msg, "tool_calls") and msg.tool_calls:
+            tools_used = [tc['name'] for tc in msg.tool_calls]
+            return f"## 🤖 Assistant (Tools: {', '.join(tools_used)})\n"
+        return f"## 🤖 Assistant\n\n{content}\n"
+    elif hasattr(msg, "tool_call_id"): # ToolMessage
+        return f"## ⚙️ Tool Output\n\n```\n{content[:500]}...\n```\n"
+    return None
+
+def iter_markdown_report(session_id, db_path, model_name="gemini-2.5-flash", checkpoint_id=None, messages=None):
+    """
+    Yields a Markdown report for a given session in chunks (header, usage table, then one
+    chunk per transcript entry), so callers can stream it without building one big string.
+
+    Callers that already ran load_session pass its checkpoint_id and messages to skip the reload.
+    """
+    # 1. Load history from the checkpoint
+    if messages is None:
+        try:
+            checkpoint_id, messages = load_session(session_id, db_path)
+        except Exception as e:
+            yield f"# Error Generating Report\n\nCould not load session: {e}"
+            return
+
+    if not messages:
+        yield f"# Session Report: {session_id}\n\n*No messages found.*"
+        return
+
+    # 2. Token Usage (cached per checkpoint)
+    agg = get_aggregate(session_id, checkpoint_id, messages)
 
     # 3. Calculate Cost
-    rates = PRICING.get(model_name, PRICING["gemini-2.5-flash"])
-    cost = (input_tokens / 1_000_000 * rates["input"]) + (output_tokens / 1_000_000 * rates["output"])
-    
+    rates = get_rates(model_name)
+    cost = (agg.input_tokens / 1_000_000 * rates["input"]) + (agg.output_tokens / 1_000_000 * rates["output"])
+
     # 4. Build Report
-    report = f"""# 📄 Session Report: {session_id}
+    yield f"""# 📄 Session Report: {session_id}
 **Date Generated:** {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 **Model:** {model_name}
 
@@ -113,10 +153,10 @@ def generate_markdown_report(session_id, db_path, model_name="gemini-2.5-flash")
 
 | Metric | Count | Cost (Approx) |
 | :--- | :--- | :--- |
-| **Input Tokens** | {input_tokens:,} | ${ (input_tokens / 1_000_000 * rates['input']):.4f} |
-| **Output Tokens** | {output_tokens:,} | ${ (output_tokens / 1_000_000 * rates['output']):.4f} |
-| **Cached Tokens** | {cached_tokens:,} | - |
-| **Total** | **{total_tokens:,}** | **${cost:.4f}** |
+| **Input Tokens** | {agg.input_tokens:,} | ${ (agg.input_tokens / 1_000_000 * rates['input']):.4f} |
+| **Output Tokens** | {agg.output_tokens:,} | ${ (agg.output_tokens / 1_000_000 * rates['output']):.4f} |
+| **Cached Tokens** | {agg.cached_tokens:,} | - |
+| **Total** | **{agg.total_tokens:,}** | **${cost:.4f}** |
 
 > **Note:** Costs are estimated based on standard pricing for `{model_name}`.
 
@@ -125,6 +165,42 @@ def generate_markdown_report(session_id, db_path, model_name="gemini-2.5-flash")
 # 📝 Transcript
 
 """
-    report += "\n".join(transcript)
-    
-    return report
+    first = True
+    for msg in messages:
+        entry = _transcript_entry(msg)
+        if entry is None:
+            continue
+        yield entry if first else "\n" + entry
+        first = False
+
+def generate_markdown_report(session_id, db_path, model_name="gemini-2.5-flash"):
+    """
+    Generates a Markdown report for a given session.
+    """
+    return "".join(iter_markdown_report(session_id, db_path, model_name))
+
+def write_markdown_report(session_id, db_path, workspace, model_name="gemini-2.5-flash"):
+    """
+    Streams the report to <workspace>/.reports/ and returns its path.
+
+    The file is named after the latest checkpoint, so an unchanged session reuses the
+    existing file; reports of older checkpoints are removed.
+    """
+    checkpoint_id, messages = load_session(session_id, db_path)
+    report_dir = os.path.join(workspace, REPORT_DIR)
+    os.makedirs(report_dir, exist_ok=True)
+    name = f"{session_id}_{checkpoint_id or 'empty'}.md"
+    path = os.path.join(report_dir, name)
+    if os.path.exists(path):
+        return path
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for chunk in iter_markdown_report(session_id, db_path, model_name, checkpoint_id, messages):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+    for old in os.listdir(report_dir):
+        if old != name and old.startswith(f"{session_id}_") and old.endswith(".md"):
+            os.remove(os.path.join(report_dir, old))
+    return path
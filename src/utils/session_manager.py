@@ -1,8 +1,48 @@
 import os
 import shutil
+import sqlite3
 import datetime
+import threading
+from contextlib import contextmanager
 import streamlit as st
 
+from src.utils.checkpoint_gc import delete_thread
+
+# Statements are kept as constants so sqlite3's per-connection statement cache
+# reuses the compiled (prepared) form on every call.
+_SELECT_METADATA = "SELECT * FROM session_metadata WHERE session_id = ?"
+# create_session wins over a concurrent reconcile that restored the row with a default model
+_INSERT_SESSION = """
+    INSERT INTO session_metadata (session_id, model_name, created_at) VALUES (?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET model_name = excluded.model_name, created_at = excluded.created_at
+"""
+_RESTORE_SESSION = "INSERT OR IGNORE INTO session_metadata (session_id, model_name, created_at) VALUES (?, ?, ?)"
+_UPDATE_STATS = """
+    UPDATE session_metadata 
+    SET input_tokens = ?, output_tokens = ?, cached_tokens = ?, total_tokens = ?, total_cost = ?
+    WHERE session_id = ?
+"""
+_ADD_STATS = """
+    UPDATE session_metadata 
+    SET input_tokens = input_tokens + ?, output_tokens = output_tokens + ?, cached_tokens = cached_tokens + ?,
+        total_tokens = total_tokens + ?, total_cost = total_cost + ?
+    WHERE session_id = ?
+"""
+_SESSION_COLUMNS = ("session_id", "model_name", "created_at", "input_tokens", "output_tokens",
+                    "cached_tokens", "total_tokens", "total_cost")
+# Home page orderings; each is served by an index on session_metadata.
+_SORT_ORDERS = {
+    "recent": "created_at DESC, session_id DESC",
+    "cost": "total_cost DESC, session_id DESC",
+}
+
+def _ctime(path):
+    """Creation time of a path, or None if it vanished or can't be stat'ed."""
+    try:
+        return os.path.getctime(path)
+    except OSError:
+        return None
+
 class SessionManager:
     def __init__(self, base_dir="workspace", db_path="state.db"):
         self.base_dir = os.path.abspath(base_dir)
@@ -10,15 +50,60 @@ class SessionManager:
         
         if not os.path.exists(self.base_dir):
             os.makedirs(self.base_dir)
+
+        # One connection per thread, reused for the lifetime of the manager
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
             
         self._init_metadata_db()
+
+    def _connect(self):
+        """Returns this thread's pooled connection (WAL mode, no fsync per commit)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30, cached_statements=64)
+            # WAL + synchronous=NORMAL: commits append to the WAL without an fsync;
+            # durability is only deferred to the next checkpoint, never lost on app crash.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups writes into one transaction (one commit). Nestable; the outermost block commits.
+        """
+        conn = self._connect()
+        self._local.depth += 1
+        try:
+            yield conn
+        except Exception:
+            if self._local.depth == 1:
+                conn.rollback()
+            raise
+        else:
+            if self._local.depth == 1:
+                conn.commit()
+        finally:
+            self._local.depth -= 1
+
+    def close(self):
+        """Closes every pooled connection (all threads)."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
         
     def _init_metadata_db(self):
         """Creates the metadata table if it doesn't exist."""
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+        with self.transaction() as conn:
+            conn.execute("""
             CREATE TABLE IF NOT EXISTS session_metadata (
                 session_id TEXT PRIMARY KEY,
                 model_name TEXT,
@@ -30,8 +115,8 @@ class SessionManager:
                 total_cost REAL DEFAULT 0.0
             )
         """)
-        conn.commit()
-        conn.close()
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_session_created ON session_metadata (created_at DESC, session_id DESC)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_session_cost ON session_metadata (total_cost DESC, session_id DESC)")
 
     def get_all_sessions(self):
         """Returns a sorted list of session directories (newest first)."""
@@ -40,6 +125,59 @@ class SessionManager:
         sessions = [d for d in os.listdir(self.base_dir) if os.path.isdir(os.path.join(self.base_dir, d))]
         return sorted(sessions, reverse=True)
 
+    def list_sessions(self, limit=20, offset=0, sort_by="recent", name_filter=None):
+        """
+        Returns one page of sessions from the metadata table.
+
+        Args:
+            limit (int): Page size.
+            offset (int): Rows to skip.
+            sort_by (str): "recent" (created_at) or "cost" (total_cost), newest/highest first.
+            name_filter (str): Case-insensitive substring of the session name.
+
+        Returns:
+            tuple: (list of metadata dicts, total number of matching sessions)
+        """
+        where, params = "", []
+        if name_filter:
+            escaped = name_filter.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where, params = "WHERE session_id LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+        order = _SORT_ORDERS.get(sort_by, _SORT_ORDERS["recent"])
+
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM session_metadata {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {', '.join(_SESSION_COLUMNS)} FROM session_metadata {where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [dict(zip(_SESSION_COLUMNS, row)) for row in rows], total
+
+    def reconcile_sessions(self, default_model="gemini-2.5-flash"):
+        """
+        Syncs session_metadata with the workspace directories (run occasionally, off the UI path).
+
+        Directories without metadata get a row (created_at from the directory ctime);
+        rows whose directory is gone are dropped. Directories deleted during the scan are skipped.
+
+        Returns:
+            tuple: (added, removed)
+        """
+        on_disk = set(self.get_all_sessions())
+        known = {row[0] for row in self._connect().execute("SELECT session_id FROM session_metadata")}
+        # Stat outside the transaction: a failed stat must not roll back the whole reconcile
+        ctimes = {sid: _ctime(self.get_workspace_path(sid)) for sid in on_disk - known}
+        ctimes = {sid: ctime for sid, ctime in ctimes.items() if ctime is not None}
+        with self.transaction() as conn:
+            known = {row[0] for row in conn.execute("SELECT session_id FROM session_metadata")}
+            added = sorted(sid for sid in ctimes if sid not in known)
+            # Re-check: a session may have been created since the directory scan
+            removed = sorted(sid for sid in known - on_disk if not os.path.isdir(self.get_workspace_path(sid)))
+            conn.executemany(_RESTORE_SESSION, [
+                (sid, default_model, datetime.datetime.fromtimestamp(ctimes[sid])) for sid in added
+            ])
+            conn.executemany("DELETE FROM session_metadata WHERE session_id = ?", [(sid,) for sid in removed])
+        return len(added), len(removed)
+
     def create_session(self, tag, model_name="gemini-2.5-flash"):
         """Creates a new session directory using the tag. Raises FileExistsError if it exists."""
         if not tag:
@@ -59,24 +197,14 @@ class SessionManager:
         os.makedirs(path)
         
         # Store Metadata
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("INSERT OR IGNORE INTO session_metadata (session_id, model_name, created_at) VALUES (?, ?, ?)", 
-                       (session_name, model_name, datetime.datetime.now()))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            conn.execute(_INSERT_SESSION, (session_name, model_name, datetime.datetime.now()))
         
         return session_name
 
     def get_session_metadata(self, session_id):
         """Retrieves metadata for a session. Returns dict or None."""
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM session_metadata WHERE session_id = ?", (session_id,))
-        row = cursor.fetchone()
-        conn.close()
+        row = self._connect().execute(_SELECT_METADATA, (session_id,)).fetchone()
         
         if row:
             # Columns: session_id, model_name, created_at, input, output, cached, total, cost
@@ -93,21 +221,34 @@ class SessionManager:
         return None
 
     def update_session_stats(self, session_id, input_t, output_t, cached_t, cost):
-        """Updates (increments) the stats for a session."""
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+        """Updates the stats for a session."""
         # We update by ADDING the new delta (assumes caller sends delta)
         # OR we can update absolute values if caller tracks total.
         # Let's assume absolute totals for better consistency with app state.
-        cursor.execute("""
-            UPDATE session_metadata 
-            SET input_tokens = ?, output_tokens = ?, cached_tokens = ?, total_tokens = ?, total_cost = ?
-            WHERE session_id = ?
-        """, (input_t, output_t, cached_t, input_t + output_t + cached_t, cost, session_id))
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            conn.execute(_UPDATE_STATS, (input_t, output_t, cached_t, input_t + output_t + cached_t, cost, session_id))
+
+    def update_many_session_stats(self, rows):
+        """
+        Batched form of update_session_stats: writes all rows in a single transaction.
+        Args:
+            rows: Iterable of (session_id, input_t, output_t, cached_t, cost) absolute totals.
+        """
+        with self.transaction() as conn:
+            conn.executemany(_UPDATE_STATS, [
+                (i, o, c, i + o + c, cost, sid) for sid, i, o, c, cost in rows
+            ])
+
+    def add_session_stats(self, deltas):
+        """
+        Increments session stats by usage deltas, all in a single transaction.
+        Args:
+            deltas: Iterable of (session_id, input_t, output_t, cached_t, cost) increments.
+        """
+        with self.transaction() as conn:
+            conn.executemany(_ADD_STATS, [
+                (i, o, c, i + o + c, cost, sid) for sid, i, o, c, cost in deltas
+            ])
 
     def delete_session(self, session_id):
         """Deletes a session directory and its metadata."""
@@ -116,27 +257,10 @@ class SessionManager:
         if os.path.exists(session_path):
             shutil.rmtree(session_path)
             
-        # 2. Delete Metadata
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            # Delete Metadata
-            cursor.execute("DELETE FROM session_metadata WHERE session_id = ?", (session_id,))
-            
-            # Delete LangGraph Checkpoints (if tables exist)
-            # Note: Table names are typically 'checkpoints' and 'checkpoint_writes' or similar depending on version.
-            # SqliteSaver uses 'checkpoints', 'checkpoint_writes', 'checkpoint_blobs' usually.
-            # We attempt to delete safely.
-            cursor.execute("DELETE FROM checkpoints WHERE thread_id = ?", (session_id,))
-            cursor.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (session_id,))
-            cursor.execute("DELETE FROM checkpoint_blobs WHERE thread_id = ?", (session_id,))
-        except sqlite3.OperationalError:
-            # Tables might not exist or schema differs; ignore to prevent crash
-            pass
-            
-        conn.commit()
-        conn.close()
+        # 2. Delete Metadata and LangGraph Checkpoints (whichever checkpoint tables exist)
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM session_metadata WHERE session_id = ?", (session_id,))
+            delete_thread(conn, session_id)
 
     def clear_all_sessions(self):
         """Deletes all workspace folders and the database."""
@@ -147,12 +271,15 @@ class SessionManager:
                 if os.path.isdir(item_path):
                     shutil.rmtree(item_path)
         
-        # Clear DB
-        if os.path.exists(self.db_path):
-            try:
-                os.remove(self.db_path)
-            except PermissionError:
-                st.error("Could not delete database file. It might be in use.")
+        # Clear DB (pooled connections must be closed first, WAL side files go too)
+        self.close()
+        for path in (self.db_path, self.db_path + "-wal", self.db_path + "-shm"):
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except PermissionError:
+                    st.error("Could not delete database file. It might be in use.")
+        self._init_metadata_db()
                 
     def get_workspace_path(self, session_id):
         return os.path.join(self.base_dir, session_id)
@@ -0,0 +1,187 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.tools.tool_cache import cache_probe
+from src.utils.analytics import is_failure
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trace_spans (
+    span_id TEXT PRIMARY KEY,
+    trace_id TEXT NOT NULL,
+    parent_id TEXT,
+    session_id TEXT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    tool_call_id TEXT,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    thread INTEGER,
+    args_size INTEGER,
+    output_size INTEGER,
+    success INTEGER,
+    cache_hit INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_spans_session ON trace_spans (session_id, start_ts);
+CREATE INDEX IF NOT EXISTS idx_spans_trace ON trace_spans (trace_id);
+"""
+
+_COLUMNS = ("span_id", "trace_id", "parent_id", "session_id", "kind", "name", "tool_call_id", "start_ts", "end_ts",
+            "thread", "args_size", "output_size", "success", "cache_hit", "error")
+
+class TraceStore:
+    """Local span store (a table in state.db)."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.executescript(_SCHEMA)
+            return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add_spans(self, spans):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO trace_spans ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [tuple(span.get(c) for c in _COLUMNS) for span in spans]
+            )
+
+    def get_spans(self, session_id=None, trace_id=None):
+        where, params = [], []
+        if session_id:
+            where.append("session_id = ?"); params.append(session_id)
+        if trace_id:
+            where.append("trace_id = ?"); params.append(trace_id)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM trace_spans {clause} ORDER BY start_ts", params
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def delete_session(self, session_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM trace_spans WHERE session_id = ?", (session_id,))
+
+def _content_size(value):
+    return len(str(getattr(value, "content", value)))
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Records a span for every tool run and chat model call of one agent turn.
+
+    Pass it in config["callbacks"]; finished spans are buffered and written with flush().
+    """
+    # Callbacks must run in the tool's own context so the cache probe reaches the tool.
+    run_inline = True
+
+    def __init__(self, session_id=None, store=None):
+        self.session_id = session_id
+        self.store = store
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, parent_run_id, kind, name, args_size, tool_call_id=None):
+        probe = {}
+        if kind == "tool":
+            cache_probe.set(probe)
+        with self._lock:
+            self._open[run_id] = {
+                "span_id": str(run_id), "trace_id": self.trace_id,
+                "parent_id": str(parent_run_id) if parent_run_id else None,
+                "session_id": self.session_id, "kind": kind, "name": name, "tool_call_id": tool_call_id,
+                "start_ts": time.time(), "thread": threading.get_ident(),
+                "args_size": args_size, "probe": probe,
+            }
+
+    def _end(self, run_id, output_size=None, success=True, error=None):
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            probe = span.pop("probe")
+            cache_hit = probe.get("cache_hit")
+            span.update(end_ts=time.time(), output_size=output_size, success=int(success), error=error,
+                        cache_hit=None if cache_hit is None else int(cache_hit))
+            self.spans.append(span)
+
+    # --- Tools ---
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, parent_run_id, "tool", name, len(input_str or ""), kwargs.get("tool_call_id"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = str(getattr(output, "content", output))
+        self._end(run_id, len(content), success=not is_failure(content))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, success=False, error=repr(error))
+
+    # --- LLM calls ---
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        name = (kwargs.get("metadata") or {}).get("ls_model_name") or (serialized or {}).get("name") or "llm"
+        args_size = sum(_content_size(m) for batch in messages for m in batch)
+        self._start(run_id, parent_run_id, "llm", name, args_size)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        name = (kwargs.get("metadata") or {}).get("ls_model_name") or (serialized or {}).get("name") or "llm"
+        self._start(run_id, parent_run_id, "llm", name, sum(len(p) for p in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        size = sum(len(g.text or "") for batch in response.generations for g in batch)
+        self._end(run_id, size)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, success=False, error=repr(error))
+
+    def flush(self):
+        """Writes finished spans to the store (if any) and clears the buffer."""
+        with self._lock:
+            spans, self.spans = self.spans, []
+        if spans and self.store is not None:
+            self.store.add_spans(spans)
+        return spans
+
+def to_chrome_trace(spans):
+    """
+    Converts spans to the Chrome Trace Event format (open in chrome://tracing or ui.perfetto.dev).
+
+    Returns:
+        dict: {"traceEvents": [...]} with one complete ("X") event per span.
+    """
+    events = []
+    for span in spans:
+        events.append({
+            "name": span["name"],
+            "cat": span["kind"],
+            "ph": "X",
+            "ts": span["start_ts"] * 1e6,
+            "dur": (span["end_ts"] - span["start_ts"]) * 1e6,
+            "pid": span.get("session_id") or "session",
+            "tid": span.get("thread") or 0,
+            "args": {k: span.get(k) for k in ("span_id", "parent_id", "trace_id", "tool_call_id", "args_size",
+                                              "output_size", "success", "cache_hit", "error")},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def export_chrome_trace(spans):
+    return json.dumps(to_chrome_trace(spans))
@@ -0,0 +1,157 @@
+import atexit
+import threading
+
+from langchain_core.messages import AIMessage
+
+from src.config import PRICING, USAGE_FLUSH_INTERVAL, USAGE_FLUSH_MAX_PENDING
+
+def extract_usage(usage_metadata):
+    """
+    Normalizes LangChain usage_metadata.
+
+    Returns:
+        tuple: (input_tokens, output_tokens, total_tokens, cached_tokens)
+    """
+    in_t = usage_metadata.get("input_tokens", 0)
+    out_t = usage_metadata.get("output_tokens", 0)
+    total_t = usage_metadata.get("total_tokens", 0)
+
+    # Attempt to extract cache info (provider dependent)
+    cached_t = 0
+    # Check for cache_read (Google style via LangChain)
+    details = usage_metadata.get("input_token_details")
+    if isinstance(details, dict):
+        # Try both keys just in case
+        cached_t = details.get("cache_read", 0) or details.get("cache_read_input_tokens", 0)
+    return in_t, out_t, total_t, cached_t
+
+def get_rates(model_name):
+    """Per-1M-token rates for a model (gemini-2.5-flash rates if unknown)."""
+    return PRICING.get(model_name, PRICING["gemini-2.5-flash"])
+
+def estimate_cost(model_name, input_t, output_t):
+    rates = get_rates(model_name)
+    return (input_t / 1_000_000) * rates["input"] + (output_t / 1_000_000) * rates["output"]
+
+def usage_from_messages(messages):
+    """
+    Sums token usage over the AI messages of a conversation.
+
+    Returns:
+        dict: input_tokens, output_tokens, total_tokens, cached_tokens, and model_name
+            (as reported by the provider on the last AI message, or None).
+    """
+    totals = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cached_tokens": 0, "model_name": None}
+    for msg in messages:
+        if not isinstance(msg, AIMessage):
+            continue
+        if msg.usage_metadata:
+            in_t, out_t, total_t, cached_t = extract_usage(msg.usage_metadata)
+            totals["input_tokens"] += in_t
+            totals["output_tokens"] += out_t
+            totals["total_tokens"] += total_t
+            totals["cached_tokens"] += cached_t
+        model = (msg.response_metadata or {}).get("model_name")
+        if model:
+            totals["model_name"] = model.removeprefix("models/")
+    return totals
+
+class UsageBuffer:
+    """
+    Accumulates per-session token/cost deltas in memory and writes them in batches.
+
+    Pending deltas are flushed:
+        - every `interval` seconds, by one long-lived background thread (so the writer
+          reuses a single pooled connection);
+        - as soon as `max_pending` messages have been added (by waking that thread, so
+          add() never writes or raises on the caller's thread);
+        - when flush() is called (end of a turn);
+        - at interpreter exit (atexit).
+
+    A failed write keeps the deltas pending for the next flush. Only an explicit flush()
+    raises it.
+    """
+    def __init__(self, write_deltas, interval=None, max_pending=None):
+        """
+        Args:
+            write_deltas (callable): Persists an iterable of (session_id, input_t, output_t, cached_t, cost)
+                increments, e.g. SessionManager.add_session_stats.
+            interval (float): Max seconds a delta stays in memory.
+            max_pending (int): Messages buffered before the background thread is woken to flush.
+        """
+        self.write_deltas = write_deltas
+        self.interval = USAGE_FLUSH_INTERVAL if interval is None else interval
+        self.max_pending = USAGE_FLUSH_MAX_PENDING if max_pending is None else max_pending
+        self._lock = threading.RLock()
+        self._pending = {} # session_id -> [input_t, output_t, cached_t, cost]
+        self._count = 0
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        atexit.register(self.close)
+
+    def add(self, session_id, input_t, output_t, cached_t, cost):
+        with self._lock:
+            totals = self._pending.setdefault(session_id, [0, 0, 0, 0.0])
+            totals[0] += input_t
+            totals[1] += output_t
+            totals[2] += cached_t
+            totals[3] += cost
+            self._count += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="usage-flush", daemon=True)
+                self._thread.start()
+            if self._count >= self.max_pending:
+                self._wake.set()
+
+    def pending(self, session_id):
+        """Unflushed (input_t, output_t, cached_t, cost) for a session."""
+        with self._lock:
+            return tuple(self._pending.get(session_id, (0, 0, 0, 0.0)))
+
+    def discard(self, session_id=None):
+        """Drops pending deltas for one session (or all), e.g. when it is deleted."""
+        with self._lock:
+            if session_id is None:
+                self._pending.clear()
+            else:
+                self._pending.pop(session_id, None)
+
+    def flush(self):
+        """Writes all pending deltas in one batch. Raises if the write fails (deltas are kept)."""
+        with self._lock:
+            if not self._pending:
+                self._count = 0
+                return
+            batch, self._pending = self._pending, {}
+            self._count = 0
+            try:
+                self.write_deltas([(sid, *totals) for sid, totals in batch.items()])
+            except Exception:
+                # Put the batch back so nothing is lost
+                for sid, totals in batch.items():
+                    current = self._pending.setdefault(sid, [0, 0, 0, 0.0])
+                    for k in range(4):
+                        current[k] += totals[k]
+                raise
+
+    def close(self):
+        """Stops the background thread and writes whatever is still pending (registered with atexit)."""
+        self._stopped.set()
+        self._wake.set()
+        self.flush()
+
+    def _run(self):
+        # interval <= 0: no timer, flush only when add() wakes the thread
+        timeout = self.interval if self.interval > 0 else None
+        while True:
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            # An error here has nowhere to go; the deltas stay pending and the next flush retries.
+            try:
+                self.flush()
+            except Exception:
+                pass
@@ -1,10 +1,11 @@
 import os
 import streamlit as st
 import matplotlib.pyplot as plt
-import gdstk
 from vcdvcd import VCDVCD
 import numpy as np
 
+from src.utils.gds_render import MAX_ZOOM, get_tile, layout_info
+
 def render_waveform(vcd_path):
     """Parses VCD and renders a step plot using Matplotlib."""
     try:
@@ -126,27 +127,33 @@ def render_waveform(vcd_path):
         st.error(f"Failed to render Waveform: {e}")
 
 def render_gds(gds_path):
-    """Renders GDS to SVG using gdstk and displays it."""
+    """Renders a GDS layout as cached raster tiles with per-layer toggles."""
     try:
         # Check if file exists and is not empty
         if os.path.getsize(gds_path) == 0:
             st.warning("GDS file is empty.")
             return
 
-        lib = gdstk.read_gds(gds_path)
-        top_cells = lib.top_level()
-        if not top_cells:
-            st.error("No top level cell found in GDS.")
+        # Layers and tiles come from the on-disk cache; the GDS is parsed only on a tile miss
+        info = layout_info(gds_path)
+        specs = info["layers"]
+        if not specs:
+            st.warning("GDS top cell has no geometry.")
             return
-            
-        cell = top_cells[0]
-        
-        # Create a temporary SVG path
-        svg_path = gds_path + ".svg"
-        cell.write_svg(svg_path)
-        
-        # Display
-        st.image(svg_path, caption=f"Layout: {os.path.basename(gds_path)}")
+
+        labels = {spec: f"{spec[0]}/{spec[1]}" for spec in specs}
+        key = f"gds_{os.path.basename(gds_path)}"
+        visible = st.multiselect("Layers", specs, default=specs, format_func=labels.get, key=f"{key}_layers")
+
+        c1, c2, c3 = st.columns(3)
+        zoom = c1.slider("Zoom", 0, MAX_ZOOM, 0, key=f"{key}_zoom")
+        tiles = 2 ** zoom
+        tx = c2.slider("Column", 0, tiles - 1, 0, key=f"{key}_tx") if tiles > 1 else 0
+        ty = c3.slider("Row", 0, tiles - 1, 0, key=f"{key}_ty") if tiles > 1 else 0
+
+        png = get_tile(gds_path, zoom, tx, ty, visible)
+        st.image(png, caption=f"Layout: {os.path.basename(gds_path)} ({info['cell_name']}, "
+                              f"{info['polygon_count']:,} polygons) - zoom {zoom}, tile {tx},{ty}")
         
     except Exception as e:
         st.error(f"Failed to render GDS: {e}")
@@ -0,0 +1,44 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils import agent_registry
+
+class TestAgentRegistry(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "state.db")
+        os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+    def tearDown(self):
+        agent_registry.release(self.db_path)
+        shutil.rmtree(self.test_dir)
+
+    def test_checkpointer_is_shared(self):
+        first = agent_registry.get_checkpointer(self.db_path)
+        second = agent_registry.get_checkpointer(self.db_path)
+        self.assertIs(first, second)
+        self.assertIs(first.conn, agent_registry.get_connection(self.db_path))
+
+    def test_agent_is_compiled_once_per_model(self):
+        flash = agent_registry.get_agent(self.db_path, "gemini-2.5-flash")
+        self.assertIs(flash, agent_registry.get_agent(self.db_path, "gemini-2.5-flash"))
+        self.assertIsNot(flash, agent_registry.get_agent(self.db_path, "gemini-3-pro-preview"))
+
+    def test_release_closes_connection(self):
+        conn = agent_registry.get_connection(self.db_path)
+        agent_registry.get_checkpointer(self.db_path)
+        agent_registry.release(self.db_path)
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        self.assertIsNot(conn, agent_registry.get_connection(self.db_path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from src.utils.analytics import AnalyticsStore
+from src.utils.usage import estimate_cost
+
+def ai(msg_id, calls, in_t=1000, out_t=100, cached=0):
+    return AIMessage(content="", id=msg_id, tool_calls=[
+        {"name": name, "id": call_id, "args": {}} for name, call_id in calls
+    ], usage_metadata={"input_tokens": in_t, "output_tokens": out_t, "total_tokens": in_t + out_t,
+                       "input_token_details": {"cache_read": cached}})
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = AnalyticsStore(os.path.join(self.tmp, "state.db"))
+        self.messages = [
+            HumanMessage(content="go"),
+            ai("a1", [("linter_tool", "c1"), ("simulation_tool", "c2")], cached=500),
+            ToolMessage(content="Success", tool_call_id="c1"),
+            ToolMessage(content="Simulation FAILED", tool_call_id="c2"),
+            ai("a2", [("simulation_tool", "c3")]),
+            ToolMessage(content="PASSED", tool_call_id="c3"),
+            ai("a3", []),
+        ]
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp)
+
+    def test_cost_per_tool_splits_issuing_call(self):
+        self.store.ingest_messages("s1", self.messages, "gemini-2.5-flash")
+        per_tool = {r["tool_name"]: r for r in self.store.cost_per_tool()}
+        one_call = estimate_cost("gemini-2.5-flash", 1000, 100)
+
+        self.assertEqual(per_tool["simulation_tool"]["calls"], 2)
+        self.assertAlmostEqual(per_tool["simulation_tool"]["cost"], one_call / 2 + one_call)
+        self.assertAlmostEqual(per_tool["linter_tool"]["cost"], one_call / 2)
+
+    def test_cache_hit_ratio_and_idempotent_ingest(self):
+        self.store.ingest_messages("s1", self.messages, "gemini-2.5-flash")
+        self.store.ingest_messages("s1", self.messages, "gemini-2.5-flash")
+        (row,) = self.store.cache_hit_ratio_per_model()
+        self.assertEqual(row["calls"], 3)
+        self.assertAlmostEqual(row["cache_hit_ratio"], 500 / 3000)
+
+    def test_live_latency_survives_backfill(self):
+        self.store.record(tool_events=[{"tool_call_id": "c2", "message_id": "a1", "session_id": "s1",
+                                        "tool_name": "simulation_tool", "latency_ms": 900.0, "success": 0}])
+        self.store.ingest_messages("s1", self.messages, "gemini-2.5-flash")
+        (row,) = self.store.slowest_tools()
+        self.assertEqual((row["tool_name"], row["avg_ms"]), ("simulation_tool", 900.0))
+
+    def test_delete_session(self):
+        self.store.ingest_messages("s1", self.messages, "gemini-2.5-flash")
+        self.store.delete_session("s1")
+        self.assertEqual(self.store.cost_per_tool(), [])
+
+if __name__ == "__main__":
+    unittest.main()
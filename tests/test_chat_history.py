@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from src.utils.chat_history import ChatHistoryCache, append_grouped, page_groups
+
+def tool_round(n):
+    return [
+        AIMessage(content="Linting", id=f"a{n}", tool_calls=[{"name": "linter_tool", "id": f"c{n}", "args": {"verilog_file": "design.v"}}]),
+        ToolMessage(content="Syntax Error:\nline 3", tool_call_id=f"c{n}", id=f"t{n}"),
+    ]
+
+class TestChatHistory(unittest.TestCase):
+    def setUp(self):
+        self.messages = [SystemMessage(content="sys", id="s"), HumanMessage(content="build a counter", id="h1")]
+        self.messages += tool_round(1) + tool_round(2)
+        self.messages.append(AIMessage(content="Done.", id="r1"))
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return list(self.messages)
+
+    def test_grouping(self):
+        groups = append_grouped([], self.messages)
+
+        self.assertEqual([g["type"] for g in groups], ["single", "group", "single"])
+        self.assertEqual(groups[0]["role"], "user")
+        self.assertEqual(groups[1]["text"], "Linting")
+        self.assertEqual([s["kind"] for s in groups[1]["steps"]], ["call", "output", "call", "output"])
+        self.assertEqual(groups[1]["steps"][1]["icon"], "❌")
+        self.assertEqual(groups[2]["text"], "Done.")
+
+    def test_same_checkpoint_skips_loading(self):
+        cache = ChatHistoryCache("t")
+        cache.refresh("cp1", self.load)
+        cache.refresh("cp1", self.load)
+        self.assertEqual(self.loads, 1)
+
+    def test_incremental_matches_full_rebuild(self):
+        cache = ChatHistoryCache("t")
+        # Stop in the middle of a tool group so the next refresh must extend it
+        partial = self.messages[:4]
+        cache.refresh("cp1", lambda: partial)
+        groups = cache.refresh("cp2", self.load)
+
+        self.assertEqual(groups, append_grouped([], self.messages))
+
+    def test_rewritten_history_rebuilds(self):
+        cache = ChatHistoryCache("t")
+        cache.refresh("cp1", self.load)
+        self.messages = [HumanMessage(content="new thread", id="x1")]
+        groups = cache.refresh("cp2", self.load)
+
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0]["text"], "new thread")
+
+    def test_paging(self):
+        groups = list(range(75))
+        visible, hidden = page_groups(groups, 1, page_size=30)
+        self.assertEqual(visible, list(range(45, 75)))
+        self.assertEqual(hidden, 45)
+        visible, hidden = page_groups(groups, 3, page_size=30)
+        self.assertEqual(len(visible), 75)
+        self.assertEqual(hidden, 0)
+
+if __name__ == "__main__":
+    unittest.main()
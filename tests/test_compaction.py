@@ -0,0 +1,69 @@
+import os
+import sys
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from src.utils.compaction import compact_messages, estimate_tokens
+
+def make_turn(n, output_chars=4000):
+    call_id = f"call_{n}"
+    return [
+        HumanMessage(content=f"request {n}", id=f"h{n}"),
+        AIMessage(content="", id=f"a{n}", tool_calls=[{
+            "name": "write_file", "id": call_id,
+            "args": {"filename": "design.v", "content": "x" * output_chars}
+        }]),
+        ToolMessage(content="Simulation FAILED.\n" + "y" * output_chars, tool_call_id=call_id, id=f"t{n}"),
+        AIMessage(content=f"done {n}", id=f"r{n}"),
+    ]
+
+class TestCompaction(unittest.TestCase):
+    def setUp(self):
+        self.messages = [SystemMessage(content="system prompt", id="sys")]
+        for n in range(10):
+            self.messages += make_turn(n)
+
+    def test_under_budget_is_untouched(self):
+        result = compact_messages(self.messages, token_budget=10**9)
+        self.assertEqual(result, self.messages)
+
+    def test_fits_budget_and_keeps_recent_turns(self):
+        budget = 6000
+        result = compact_messages(self.messages, token_budget=budget, keep_turns=2, step=1)
+
+        self.assertLessEqual(sum(estimate_tokens(m) for m in result), budget)
+        self.assertEqual(len(result), len(self.messages))
+        self.assertIs(result[0], self.messages[0])
+        # Last two turns are verbatim
+        self.assertEqual(result[-8:], self.messages[-8:])
+        # Old tool output keeps its status line
+        self.assertTrue(result[3].content.startswith("Simulation FAILED."))
+        self.assertIn("compacted", result[3].content)
+        # Tool-call pairing is preserved
+        self.assertEqual(result[3].tool_call_id, "call_0")
+        self.assertEqual(result[2].tool_calls[0]["id"], "call_0")
+
+    def test_state_messages_not_mutated(self):
+        original = self.messages[3].content
+        compact_messages(self.messages, token_budget=6000)
+        self.assertEqual(self.messages[3].content, original)
+
+    def test_prefix_stable_across_turns(self):
+        budget = 9000
+        first = compact_messages(self.messages, token_budget=budget, step=8)
+        grown = self.messages + make_turn(10)
+        second = compact_messages(grown, token_budget=budget, step=8)
+
+        # Everything that was compacted before is compacted identically now
+        for before, after in zip(first, second):
+            if "compacted" in str(before.content):
+                self.assertEqual(before.content, after.content)
+            elif before.content != after.content:
+                self.assertIn("compacted", after.content)
+                self.assertNotIn("compacted", before.content)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import os
 import unittest
 import tempfile
-from src.tools.edit_file import replace_in_file
+from src.tools.edit_file import replace_in_file, edit_file
 
 class TestEditFile(unittest.TestCase):
     def setUp(self):
@@ -70,5 +70,37 @@ endmodule"""
         self.assertFalse(result["success"])
         self.assertIn("found 2 times", result["message"])
 
+    def test_batch_edits_in_order_with_diff(self):
+        edits = [
+            {"target_text": "output [7:0] count", "replacement_text": "output [15:0] count"},
+            {"target_text": "reg [7:0] count_reg;", "replacement_text": "reg [15:0] count_reg;"},
+            # Sees the result of the previous edits
+            {"target_text": "count_reg <= 8'b0;", "replacement_text": "count_reg <= 16'b0;"},
+        ]
+        result = edit_file(self.test_file, edits)
+
+        self.assertTrue(result["success"])
+        self.assertIn("3 edits", result["message"])
+        self.assertIn("--- a/test_design.v", result["diff"])
+        self.assertIn("-    reg [7:0] count_reg;\n+    reg [15:0] count_reg;", result["diff"])
+        with open(self.test_file, "r") as f:
+            self.assertNotIn("7:0", f.read())
+        # The temp file was renamed into place
+        self.assertEqual(os.listdir(self.test_dir), ["test_design.v"])
+
+    def test_batch_is_all_or_nothing(self):
+        edits = [
+            {"target_text": "input clk", "replacement_text": "input clock"},
+            {"target_text": "missing", "replacement_text": "x"},
+            {"target_text": "count_reg", "replacement_text": "cnt"},
+        ]
+        result = edit_file(self.test_file, edits)
+
+        self.assertFalse(result["success"])
+        self.assertIn("Edit 2: Target text not found", result["message"])
+        self.assertIn("Edit 3: Target text found", result["message"])
+        with open(self.test_file, "r") as f:
+            self.assertEqual(f.read(), self.original_content)
+
 if __name__ == "__main__":
     unittest.main()
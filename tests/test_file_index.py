@@ -0,0 +1,81 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.file_index import FileIndex
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def touch(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        touch(os.path.join(self.root, "design.v"))
+        touch(os.path.join(self.root, "orfs_results", "gf180", "top", "6_final.gds"))
+        touch(os.path.join(self.root, ".tool_outputs", "x.txt"))
+        self.index = FileIndex(self.root).start()
+
+    def tearDown(self):
+        self.index.stop()
+        shutil.rmtree(self.root)
+
+    def test_initial_scan(self):
+        self.assertEqual(self.index.files((".v",), root_only=True), ["design.v"])
+        self.assertEqual(self.index.files((".gds",)), [os.path.join("orfs_results", "gf180", "top", "6_final.gds")])
+        self.assertEqual(self.index.files((".txt",)), [])  # hidden dirs are skipped
+        tree = self.index.tree((".v", ".gds"))
+        self.assertEqual(tree["files"], ["design.v"])
+        self.assertEqual(tree["dirs"]["orfs_results"]["dirs"]["gf180"]["dirs"]["top"]["files"], ["6_final.gds"])
+
+    def test_watch_create_delete_move(self):
+        new = os.path.join(self.root, "tb.v")
+        touch(new)
+        self.assertTrue(wait_for(lambda: "tb.v" in self.index.files()))
+
+        os.remove(new)
+        self.assertTrue(wait_for(lambda: "tb.v" not in self.index.files()))
+
+        os.rename(os.path.join(self.root, "design.v"), os.path.join(self.root, "core.v"))
+        self.assertTrue(wait_for(lambda: self.index.files((".v",)) == ["core.v"]))
+
+        shutil.rmtree(os.path.join(self.root, "orfs_results"))
+        self.assertTrue(wait_for(lambda: self.index.files((".gds",)) == []))
+
+    def test_refresh_is_synchronous(self):
+        # No observer: only refresh() can pick the write up
+        index = FileIndex(self.root)
+        index.rescan()
+        touch(os.path.join(self.root, "tb.v"))
+        index.refresh("tb.v")
+        self.assertIn("tb.v", index.files((".v",)))
+        os.remove(os.path.join(self.root, "tb.v"))
+        index.refresh(os.path.join(self.root, "tb.v"))
+        self.assertNotIn("tb.v", index.files((".v",)))
+        # Hidden paths stay out of the index
+        index.refresh(os.path.join(".tool_outputs", "x.txt"))
+        self.assertEqual(index.files((".txt",)), [])
+
+    def test_recent(self):
+        path = os.path.join(self.root, "sim.vcd")
+        touch(path)
+        os.utime(path, (time.time() + 100, time.time() + 100))
+        self.assertTrue(wait_for(lambda: self.index.recent(1) == ["sim.vcd"]))
+
+if __name__ == "__main__":
+    unittest.main()
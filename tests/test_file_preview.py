@@ -0,0 +1,57 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.file_preview import read_preview
+
+class TestFilePreview(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.small = os.path.join(self.tmp, "design.v")
+        with open(self.small, "w") as f:
+            f.write("module top;\nendmodule\n")
+        self.big = os.path.join(self.tmp, "flow.log")
+        with open(self.big, "w") as f:
+            for n in range(1, 50001):
+                f.write(f"line {n} " + "x" * 20 + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_small_file_whole(self):
+        preview = read_preview(self.small, mode="tail", page=3)
+        self.assertFalse(preview["truncated"])
+        self.assertEqual(preview["text"], "module top;\nendmodule\n")
+
+    def test_head_pages(self):
+        first = read_preview(self.big, mode="head", page=0, page_lines=100)
+        self.assertTrue(first["truncated"])
+        self.assertTrue(first["text"].startswith("line 1 "))
+        self.assertEqual(first["text"].count("\n"), 100)
+        second = read_preview(self.big, mode="head", page=1, page_lines=100)
+        self.assertTrue(second["text"].startswith("line 101 "))
+        self.assertTrue(second["has_more"])
+
+    def test_tail_pages(self):
+        last = read_preview(self.big, mode="tail", page=0, page_lines=100)
+        lines = last["text"].splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertTrue(lines[0].startswith("line 49901 "))
+        self.assertTrue(lines[-1].startswith("line 50000 "))
+        previous = read_preview(self.big, mode="tail", page=1, page_lines=100)
+        self.assertTrue(previous["text"].splitlines()[-1].startswith("line 49900 "))
+
+    def test_cache_invalidated_by_change(self):
+        read_preview(self.small)
+        with open(self.small, "w") as f:
+            f.write("module changed;\nendmodule\n")
+        os.utime(self.small, ns=(1, 10**18))
+        self.assertIn("changed", read_preview(self.small)["text"])
+
+if __name__ == "__main__":
+    unittest.main()
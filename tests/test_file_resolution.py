@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools import wrappers
+
+class TestFileResolution(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.saved_env = os.environ.get("RTL_WORKSPACE")
+        os.environ["RTL_WORKSPACE"] = self.workspace
+        for name, text in {
+            "design.v": "module counter(input clk, output [3:0] q); flop f0(.clk(clk)); endmodule\n",
+            "flop.v": "module flop(input clk); endmodule\n",
+            "tb.v": "module tb; reg clk; counter dut(.clk(clk)); endmodule\n",
+            "stale.v": "module counter_v1(input clk); endmodule\n",
+        }.items():
+            wrappers.write_file.invoke({"filename": name, "content": text})
+
+        self.compiled = []
+        def fake_run_simulation(files, top_module, cwd=None, **kwargs):
+            self.compiled.append(sorted(os.path.relpath(f, cwd) for f in files))
+            return {"success": True, "stdout": "TEST PASSED", "stderr": ""}
+        self.saved_sim = wrappers.run_simulation
+        wrappers.run_simulation = fake_run_simulation
+
+    def tearDown(self):
+        wrappers.run_simulation = self.saved_sim
+        if self.saved_env is None:
+            os.environ.pop("RTL_WORKSPACE", None)
+        else:
+            os.environ["RTL_WORKSPACE"] = self.saved_env
+        shutil.rmtree(self.workspace)
+
+    def test_top_module_only(self):
+        result = wrappers.simulation_tool.invoke({"top_module": "tb", "bypass_cache": True})
+        self.assertEqual(result, "Simulation PASSED.")
+        self.assertEqual(self.compiled, [["design.v", "flop.v", "tb.v"]])
+
+    def test_explicit_files_win(self):
+        wrappers.simulation_tool.invoke({"top_module": "tb", "verilog_files": ["design.v", "tb.v"],
+                                         "bypass_cache": True})
+        self.assertEqual(self.compiled, [["design.v", "tb.v"]])
+
+    def test_unknown_top(self):
+        result = wrappers.simulation_tool.invoke({"top_module": "nope", "bypass_cache": True})
+        self.assertIn("Top-level modules: counter_v1, tb", result)
+        self.assertEqual(self.compiled, [])
+
+if __name__ == "__main__":
+    unittest.main()
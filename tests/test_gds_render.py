@@ -0,0 +1,112 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gdstk
+
+from src.utils import gds_render
+from src.utils.gds_render import get_tile, layout_info, load_layout
+
+def write_gds(path, n=20):
+    lib = gdstk.Library()
+    sub = lib.new_cell("SUB")
+    sub.add(gdstk.rectangle((0, 0), (1, 1), layer=1))
+    top = lib.new_cell("TOP")
+    for i in range(n):
+        top.add(gdstk.Reference(sub, (i * 2, 0)))
+    top.add(gdstk.rectangle((0, 0), (40, 40), layer=2))
+    lib.write_gds(path)
+
+class TestGdsRender(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.gds = os.path.join(self.tmp, "6_final.gds")
+        write_gds(self.gds)
+        gds_render._layouts.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_flattened_layers(self):
+        layout = load_layout(self.gds)
+        self.assertEqual(set(layout.layers), {(1, 0), (2, 0)})
+        self.assertEqual(len(layout.layers[(1, 0)]["polygons"]), 20)
+        self.assertIs(load_layout(self.gds), layout)
+
+    def test_tiles_cached_on_disk(self):
+        png = get_tile(self.gds, 1, 0, 1, tile_size=64)
+        self.assertTrue(png.startswith(b"\x89PNG"))
+
+        calls = []
+        original = gds_render.rasterize_tile
+        gds_render.rasterize_tile = lambda *a, **k: calls.append(a) or original(*a, **k)
+        try:
+            self.assertEqual(get_tile(self.gds, 1, 0, 1, tile_size=64), png)
+            self.assertEqual(calls, [])
+            # A different layer selection is a different tile
+            get_tile(self.gds, 1, 0, 1, layers=[(2, 0)], tile_size=64)
+            self.assertEqual(len(calls), 1)
+        finally:
+            gds_render.rasterize_tile = original
+
+    def test_cached_layout_is_not_parsed_again(self):
+        info = layout_info(self.gds)
+        png = get_tile(self.gds, 0, 0, 0, tile_size=64)
+
+        # As after a restart: nothing in memory, and parsing would fail
+        gds_render._layouts.clear()
+        original = gds_render.load_layout
+        gds_render.load_layout = lambda path: self.fail("GDS parsed on a cache hit")
+        try:
+            self.assertEqual(layout_info(self.gds), info)
+            self.assertEqual(info["layers"], [(1, 0), (2, 0)])
+            self.assertEqual((info["cell_name"], info["polygon_count"]), ("TOP", 21))
+            self.assertEqual(get_tile(self.gds, 0, 0, 0, tile_size=64), png)
+        finally:
+            gds_render.load_layout = original
+
+    def test_rewritten_gds_invalidates(self):
+        first = layout_info(self.gds)
+        get_tile(self.gds, 0, 0, 0, tile_size=64)
+        time.sleep(0.01)
+        write_gds(self.gds, n=5)
+        second = layout_info(self.gds)
+        self.assertNotEqual(first["fingerprint"], second["fingerprint"])
+        self.assertEqual(second["polygon_count"], 6)
+        get_tile(self.gds, 0, 0, 0, tile_size=64)
+        tile_root = os.path.join(self.tmp, gds_render.TILE_DIR, "6_final.gds")
+        self.assertEqual(os.listdir(tile_root), [second["fingerprint"]])
+
+    def test_viewport_query_and_lod(self):
+        layout = load_layout(self.gds)
+        # Only the small squares at x < 10 (i = 0..4) intersect this viewport
+        big, small = layout.query((1, 0), (0, 0, 9.5, 1))
+        self.assertEqual(len(big) + len(small), 5)
+        self.assertEqual(len(small), 0)
+
+        big, small = layout.query((1, 0), (0, 0, 9.5, 1), min_size=2.0)
+        self.assertEqual((len(big), len(small)), (0, 5))
+        # The large rectangle is found from any bucket it covers
+        big, _ = layout.query((2, 0), (30, 30, 31, 31))
+        self.assertEqual(len(big), 1)
+
+    def test_overview_uses_density_for_small_shapes(self):
+        layout = load_layout(self.gds)
+        drawn = []
+        original = gds_render._density_rgba
+        gds_render._density_rgba = lambda *a: drawn.append(len(a[2])) or original(*a)
+        try:
+            # At 16 px for 40 units, the 1x1 squares are below MIN_FEATURE_PX
+            gds_render.rasterize_tile(layout, 0, 0, 0, tile_size=16)
+        finally:
+            gds_render._density_rgba = original
+        self.assertEqual(drawn, [20])
+
+if __name__ == "__main__":
+    unittest.main()
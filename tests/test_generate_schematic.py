@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools import generate_schematic as gs
+
+NETLIST = {"creator": "Yosys", "modules": {
+    "top": {"attributes": {"top": "00000000000000000000000000000001"}, "ports": {}, "cells": {}, "netnames": {}},
+    "adder": {"attributes": {}, "ports": {}, "cells": {}, "netnames": {}},
+}}
+
+class FakeRenderer:
+    def __init__(self):
+        self.rendered = []
+
+    def render(self, netlist):
+        (module,) = netlist["modules"]
+        self.rendered.append(module)
+        return f"<svg>{module}</svg>"
+
+class TestGenerateSchematic(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.design = os.path.join(self.workspace, "design.v")
+        with open(self.design, "w") as f:
+            f.write("module top; adder a(); endmodule\nmodule adder; endmodule\n")
+
+        self.yosys_runs = 0
+        def fake_docker(command, workspace_path=None, **kwargs):
+            self.yosys_runs += 1
+            out = command.split("write_json ")[1].rstrip("'").replace("/workspace/", "", 1)
+            with open(os.path.join(workspace_path, out), "w") as f:
+                json.dump(NETLIST, f)
+            return {"success": True, "stdout": "", "stderr": ""}
+
+        self.renderer = FakeRenderer()
+        self.saved = (gs.run_docker_command, gs._renderer)
+        gs.run_docker_command = fake_docker
+        gs._renderer = self.renderer
+
+    def tearDown(self):
+        gs.run_docker_command, gs._renderer = self.saved
+        shutil.rmtree(self.workspace)
+
+    def test_cached_by_source_and_lazy_submodules(self):
+        result = gs.generate_schematic(self.design, "top", cwd=self.workspace)
+        self.assertTrue(result["success"])
+        with open(result["svg_path"]) as f:
+            self.assertEqual(f.read(), "<svg>top</svg>")
+        # Only the top module is rendered up front
+        self.assertEqual(self.renderer.rendered, ["top"])
+
+        gs.generate_schematic(self.design, "top", cwd=self.workspace)
+        self.assertEqual((self.yosys_runs, self.renderer.rendered), (1, ["top"]))
+
+        self.assertEqual(gs.list_modules(self.workspace, "top"), ["top", "adder"])
+        sub = gs.render_module(self.workspace, "top", "adder")
+        self.assertTrue(sub["success"])
+        gs.render_module(self.workspace, "top", "adder")
+        self.assertEqual(self.renderer.rendered, ["top", "adder"])
+
+    def test_source_change_regenerates(self):
+        gs.generate_schematic(self.design, "top", cwd=self.workspace)
+        with open(self.design, "a") as f:
+            f.write("// edit\n")
+        gs.generate_schematic(self.design, "top", cwd=self.workspace)
+        self.assertEqual(self.yosys_runs, 2)
+
+    def test_falls_back_to_builtin_layout(self):
+        class BrokenRenderer:
+            def render(self, netlist):
+                raise RuntimeError("Node.js is not installed.")
+        gs._renderer = BrokenRenderer()
+        result = gs.generate_schematic(self.design, "top", cwd=self.workspace)
+        self.assertTrue(result["success"])
+        with open(result["svg_path"]) as f:
+            self.assertIn("<svg", f.read())
+
+        with self.assertRaises(RuntimeError):
+            gs.render_netlist(NETLIST, "adder", renderer="netlistsvg")
+
+    def test_failed_start_is_not_retried(self):
+        renderer = gs.NetlistRenderer()
+        spawns = []
+        def failing_spawn():
+            spawns.append(1)
+            raise RuntimeError("Node.js is not installed.")
+        renderer._spawn = failing_spawn
+        for _ in range(3):
+            with self.assertRaises(RuntimeError):
+                renderer.render(NETLIST)
+        self.assertEqual(len(spawns), 1)
+        renderer.close()
+        with self.assertRaises(RuntimeError):
+            renderer.render(NETLIST)
+        self.assertEqual(len(spawns), 2)
+
+    def test_hung_render_times_out(self):
+        renderer = gs.NetlistRenderer(timeout=0.5)
+        # Starts up, then never answers a request
+        hang = "import sys, time; print('ready', flush=True); sys.stdin.readline(); time.sleep(60)"
+        renderer._command = lambda: [sys.executable, "-c", hang]
+        with self.assertRaises(RuntimeError) as ctx:
+            renderer.render(NETLIST)
+        self.assertIn("did not answer", str(ctx.exception))
+        self.assertIsNone(renderer._proc)
+
+        # The lock is released and "auto" falls back to the python layout
+        gs._renderer = renderer
+        self.assertIn("<svg", gs.render_netlist(NETLIST, "adder", renderer="auto"))
+        renderer.close()
+
+    def test_module_netlist_marks_top(self):
+        sub = gs.module_netlist(NETLIST, "adder")
+        self.assertEqual(list(sub["modules"]), ["adder"])
+        self.assertIn("top", sub["modules"]["adder"]["attributes"])
+
+if __name__ == "__main__":
+    unittest.main()
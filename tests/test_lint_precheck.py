@@ -0,0 +1,77 @@
+import os
+import sys
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.lint_precheck import precheck_source
+
+CLEAN = """
+// module in a comment: endmodule begin
+module counter(clk, rst, count);
+    input clk, rst;
+    output reg [7:0] count;
+    always @(posedge clk) begin
+        if (rst) begin
+            count <= 0;
+        end else begin
+            count <= count + 1;
+        end
+    end
+endmodule
+
+module tb;
+    reg clk = 0;
+    initial begin $display("begin"); end
+    counter dut(.clk(clk), .rst(1'b0), .count());
+endmodule
+"""
+
+class TestLintPrecheck(unittest.TestCase):
+    def test_clean_source(self):
+        self.assertEqual(precheck_source(CLEAN, "design.v"), [])
+
+    def test_unclosed_begin(self):
+        src = "module m(input a);\nalways @(*) begin\n  if (a) begin end\nendmodule\n"
+        (diag,) = precheck_source(src, "m.v")
+        self.assertEqual((diag["file"], diag["line"], diag["severity"]), ("m.v", 2, "error"))
+        self.assertIn("'begin'", diag["message"])
+
+    def test_missing_endmodule_and_stray_end(self):
+        src = "module a;\nmodule b;\nend\nendmodule\n"
+        messages = [(d["line"], d["message"]) for d in precheck_source(src, "x.v")]
+        self.assertEqual(messages[0][0], 1)
+        self.assertIn("endmodule", messages[0][1])
+        self.assertIn((3, "'end' without matching 'begin'."), messages)
+
+    def test_package_function_blocks(self):
+        src = ("package util_pkg;\n  function automatic int inc(int x);\n    begin\n      return x + 1;\n"
+               "    end\n  endfunction\nendpackage\n\nmodule m(input a);\nendmodule\n")
+        self.assertEqual(precheck_source(src, "pkg.sv"), [])
+
+    def test_interface_initial_block(self):
+        src = ("interface bus_if(input logic clk);\n  logic valid;\n  initial begin\n    valid = 0;\n"
+               "  end\nendinterface\n\nmodule m(input a);\nendmodule\n")
+        self.assertEqual(precheck_source(src, "bus.sv"), [])
+
+    def test_undeclared_port(self):
+        src = "module m(a, b, y);\n  input a;\n  output [1:0] y;\nendmodule\n"
+        (diag,) = precheck_source(src, "m.v")
+        self.assertIn("Port 'b'", diag["message"])
+
+    def test_conditional_compilation_skips_begin_end(self):
+        src = "module m;\n`ifdef X\ninitial begin\n`else\ninitial begin\n`endif\nend\nendmodule\n"
+        self.assertEqual(precheck_source(src, "m.v"), [])
+
+    def test_conditional_module_header(self):
+        src = ("`ifdef WIDE\nmodule m(input [15:0] a);\n`else\nmodule m(input [7:0] a);\n`endif\n"
+               "endmodule\n")
+        self.assertEqual(precheck_source(src, "m.v"), [])
+
+    def test_ports_declared_in_include(self):
+        src = 'module m(a, y);\n  `include "m_ports.vh"\n  assign y = a;\nendmodule\n'
+        self.assertEqual(precheck_source(src, "m.v"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.netlist_svg import layout_module, render_svg
+
+def cell(type_, inputs, outputs):
+    return {
+        "type": type_,
+        "port_directions": {**{p: "input" for p in inputs}, **{p: "output" for p in outputs}},
+        "connections": {**inputs, **outputs},
+    }
+
+# a, b -> AND -> DFF (with feedback through XOR) -> y
+COUNTER = {"modules": {"top": {
+    "attributes": {"top": "00000000000000000000000000000001"},
+    "ports": {
+        "a": {"direction": "input", "bits": [2]},
+        "b": {"direction": "input", "bits": [3]},
+        "y": {"direction": "output", "bits": [6]},
+    },
+    "cells": {
+        "and0": cell("$and", {"A": [2], "B": [3]}, {"Y": [4]}),
+        "xor0": cell("$xor", {"A": [4], "B": [6]}, {"Y": [5]}),
+        "reg0": cell("$dff", {"D": [5], "CLK": ["0"]}, {"Q": [6]}),
+    },
+    "netnames": {},
+}}}
+
+def chain(n):
+    cells = {f"c{i}": cell("$not", {"A": [i + 2]}, {"Y": [i + 3]}) for i in range(n)}
+    return {"modules": {"big": {
+        "ports": {"i": {"direction": "input", "bits": [2]}, "o": {"direction": "output", "bits": [n + 2]}},
+        "cells": cells, "netnames": {},
+    }}}
+
+class TestNetlistSvg(unittest.TestCase):
+    def test_layers_follow_dataflow(self):
+        nodes, edges, _, _ = layout_module(COUNTER["modules"]["top"])
+        x = {n: info["x"] for n, info in nodes.items()}
+        self.assertEqual(x["port:a"], x["port:b"])
+        self.assertLess(x["port:a"], x["cell:and0"])
+        self.assertLess(x["cell:and0"], x["cell:xor0"])
+        self.assertLess(x["cell:xor0"], x["cell:reg0"])
+        self.assertEqual(x["port:y"], max(x.values()))
+        # Feedback reg0 -> xor0 is kept as an edge
+        self.assertIn(("cell:reg0", "cell:xor0"), edges)
+
+    def test_renders_valid_svg(self):
+        svg = render_svg(COUNTER)
+        root = ET.fromstring(svg)
+        self.assertTrue(root.tag.endswith("svg"))
+        self.assertIn("dff", svg)
+        self.assertIn("and0", svg)
+
+    def test_large_netlist_is_fast(self):
+        start = time.perf_counter()
+        svg = render_svg(chain(3000), "big")
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(svg.count("<rect"), 3000)
+
+if __name__ == "__main__":
+    unittest.main()
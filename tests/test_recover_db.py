@@ -0,0 +1,86 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import StateGraph, MessagesState, START, END
+
+from recover_db import recover_sessions, scan_workspace
+from src.utils.usage import estimate_cost
+
+def reply(state):
+    return {"messages": [AIMessage(
+        content="ok",
+        usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120,
+                        "input_token_details": {"cache_read": 10}},
+        response_metadata={"model_name": "models/gemini-3-pro-preview"},
+    )]}
+
+class TestRecoverDb(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "state.db")
+        self.workspace = os.path.join(self.tmp, "workspace")
+        for sid in ("with_history", "empty"):
+            os.makedirs(os.path.join(self.workspace, sid))
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        builder = StateGraph(MessagesState)
+        builder.add_node("agent", reply)
+        builder.add_edge(START, "agent")
+        builder.add_edge("agent", END)
+        graph = builder.compile(checkpointer=SqliteSaver(conn))
+        config = {"configurable": {"thread_id": "with_history"}}
+        graph.invoke({"messages": [HumanMessage(content="hi")]}, config)
+        graph.invoke({"messages": [HumanMessage(content="again")]}, config)
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def rows(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = {r[0]: r for r in conn.execute(
+            "SELECT session_id, model_name, input_tokens, output_tokens, cached_tokens, total_tokens, total_cost "
+            "FROM session_metadata")}
+        conn.close()
+        return rows
+
+    def test_rebuilds_usage_from_checkpoints(self):
+        recover_sessions(self.db_path, self.workspace, workers=4)
+        rows = self.rows()
+
+        self.assertEqual(set(rows), {"with_history", "empty"})
+        _, model, in_t, out_t, cached_t, total_t, cost = rows["with_history"]
+        self.assertEqual(model, "gemini-3-pro-preview")
+        self.assertEqual((in_t, out_t, cached_t, total_t), (200, 40, 20, 260))
+        self.assertAlmostEqual(cost, estimate_cost("gemini-3-pro-preview", 200, 40))
+        self.assertEqual(rows["empty"][2:6], (0, 0, 0, 0))
+
+    def test_scan_skips_vanished_dirs(self):
+        gone = os.path.join(self.workspace, "empty")
+        original = os.path.getctime
+        def getctime(path):
+            if path == gone:
+                raise FileNotFoundError(path)
+            return original(path)
+        os.path.getctime = getctime
+        try:
+            self.assertEqual(set(scan_workspace(self.workspace, workers=2)), {"with_history"})
+        finally:
+            os.path.getctime = original
+
+    def test_idempotent(self):
+        recover_sessions(self.db_path, self.workspace)
+        recover_sessions(self.db_path, self.workspace)
+        self.assertEqual(self.rows()["with_history"][5], 260)
+
+if __name__ == "__main__":
+    unittest.main()
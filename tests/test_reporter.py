@@ -0,0 +1,92 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, MessagesState, START, END
+
+from src.utils import agent_registry
+from src.utils import reporter
+
+def reply(state):
+    return {"messages": [AIMessage(content="done", usage_metadata={
+        "input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100})]}
+
+class TestReporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, "state.db")
+        builder = StateGraph(MessagesState)
+        builder.add_node("agent", reply)
+        builder.add_edge(START, "agent")
+        builder.add_edge("agent", END)
+        self.graph = builder.compile(checkpointer=agent_registry.get_checkpointer(self.db_path))
+        self.config = {"configurable": {"thread_id": "s1"}}
+        self.graph.invoke({"messages": [HumanMessage(content="build a counter")]}, self.config)
+
+    def tearDown(self):
+        agent_registry.release(self.db_path)
+        reporter._aggregates.clear()
+        shutil.rmtree(self.tmp)
+
+    def test_report_without_agent(self):
+        report = reporter.generate_markdown_report("s1", self.db_path)
+        self.assertIn("| **Input Tokens** | 1,000 |", report)
+        self.assertIn("build a counter", report)
+        self.assertIn("## 🤖 Assistant\n\ndone", report)
+
+    def test_aggregate_is_incremental(self):
+        reporter.generate_markdown_report("s1", self.db_path)
+        self.graph.invoke({"messages": [HumanMessage(content="again")]}, self.config)
+        report = reporter.generate_markdown_report("s1", self.db_path)
+        self.assertIn("| **Input Tokens** | 2,000 |", report)
+        self.assertEqual(reporter._aggregates["s1"].message_count, 4)
+
+    def test_aggregates_are_bounded(self):
+        saved = reporter.AGGREGATE_CACHE_SIZE
+        reporter.AGGREGATE_CACHE_SIZE = 2
+        try:
+            for sid in ("a", "b", "a", "c"):
+                reporter.get_aggregate(sid, "cp", [])
+        finally:
+            reporter.AGGREGATE_CACHE_SIZE = saved
+        self.assertEqual(list(reporter._aggregates), ["a", "c"])
+        reporter.discard_aggregate("a")
+        self.assertEqual(list(reporter._aggregates), ["c"])
+
+    def test_write_report_reused_per_checkpoint(self):
+        workspace = os.path.join(self.tmp, "workspace")
+        first = reporter.write_markdown_report("s1", self.db_path, workspace)
+        self.assertEqual(reporter.write_markdown_report("s1", self.db_path, workspace), first)
+
+        self.graph.invoke({"messages": [HumanMessage(content="again")]}, self.config)
+        second = reporter.write_markdown_report("s1", self.db_path, workspace)
+        self.assertNotEqual(first, second)
+        self.assertFalse(os.path.exists(first))
+
+    def test_write_report_loads_session_once(self):
+        calls = []
+        original = reporter.load_session
+        def counting_load(*args):
+            calls.append(args)
+            return original(*args)
+        reporter.load_session = counting_load
+        try:
+            path = reporter.write_markdown_report("s1", self.db_path, os.path.join(self.tmp, "workspace"))
+        finally:
+            reporter.load_session = original
+        self.assertEqual(len(calls), 1)
+        with open(path, encoding="utf-8") as f:
+            self.assertIn("build a counter", f.read())
+
+    def test_missing_session(self):
+        report = reporter.generate_markdown_report("nope", self.db_path)
+        self.assertIn("*No messages found.*", report)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.run_async import run_command_async, session_semaphore
+
+class TestRunAsync(unittest.TestCase):
+    def test_captures_output(self):
+        cmd = [sys.executable, "-c", "import sys; print('hello'); sys.stderr.write('warn')"]
+        result = asyncio.run(run_command_async(cmd, timeout=10))
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["stdout"].strip(), "hello")
+        self.assertEqual(result["stderr"], "warn")
+
+    def test_nonzero_exit(self):
+        cmd = [sys.executable, "-c", "raise SystemExit(3)"]
+        result = asyncio.run(run_command_async(cmd, timeout=10))
+
+        self.assertFalse(result["success"])
+
+    def test_timeout(self):
+        cmd = [sys.executable, "-c", "import time; time.sleep(5)"]
+        result = asyncio.run(run_command_async(cmd, timeout=0.2, timeout_message="Error: slow."))
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["stderr"], "Error: slow.")
+
+    def test_commands_run_concurrently(self):
+        cmd = [sys.executable, "-c", "import time; time.sleep(0.5)"]
+
+        async def run_three():
+            return await asyncio.gather(*[run_command_async(cmd, timeout=10) for _ in range(3)])
+
+        start = time.time()
+        results = asyncio.run(run_three())
+        elapsed = time.time() - start
+
+        self.assertTrue(all(r["success"] for r in results))
+        self.assertLess(elapsed, 1.4)
+
+    def test_session_semaphore_caps_concurrency(self):
+        async def run():
+            active = 0
+            peak = 0
+
+            async def job():
+                nonlocal active, peak
+                async with session_semaphore("/tmp/session_a", limit=2):
+                    active += 1
+                    peak = max(peak, active)
+                    await asyncio.sleep(0.05)
+                    active -= 1
+
+            await asyncio.gather(*[job() for _ in range(6)])
+            same = session_semaphore("/tmp/session_a") is session_semaphore("/tmp/session_a")
+            other = session_semaphore("/tmp/session_a") is session_semaphore("/tmp/session_b")
+            return peak, same, other
+
+        peak, same, other = asyncio.run(run())
+        self.assertEqual(peak, 2)
+        self.assertTrue(same)
+        self.assertFalse(other)
+
+if __name__ == "__main__":
+    unittest.main()
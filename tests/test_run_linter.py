@@ -0,0 +1,144 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools import run_linter as rl
+
+STDERR = """{tb}:7: error: Unknown module type: adder
+{design}:3: syntax error
+{design}:3: error: Invalid module item.
+{tb}:9: warning: Port 2 (b) of adder expects 8 bits, got 4.
+2 error(s) during elaboration.
+"""
+
+class TestBatchLint(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.files = []
+        for name in ("design.v", "tb.v"):
+            path = os.path.join(self.workspace, name)
+            with open(path, "w") as f:
+                f.write(f"// {name}\n")
+            self.files.append(path)
+
+        self.calls = []
+        def fake_run_linter(verilog_files, cwd=None, timeout=30):
+            self.calls.append(list(verilog_files))
+            design, tb = verilog_files
+            return {"success": False, "stdout": "", "stderr": STDERR.format(design=design, tb=tb),
+                    "command": "iverilog -t null -g2012 " + " ".join(verilog_files)}
+        self.saved = rl.run_linter
+        rl.run_linter = fake_run_linter
+        rl._lint_cache.clear()
+
+    def tearDown(self):
+        rl.run_linter = self.saved
+        shutil.rmtree(self.workspace)
+
+    def test_parses_diagnostics_per_file(self):
+        result = rl.lint_files(self.files, cwd=self.workspace, backends=["iverilog"])
+        self.assertFalse(result["success"])
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(result["files"]["design.v"][0],
+                         {"file": "design.v", "line": 3, "severity": "error", "message": "syntax error"})
+        self.assertEqual([d["severity"] for d in result["files"]["tb.v"]], ["error", "warning"])
+        # Summary lines are dropped
+        self.assertEqual(len(result["diagnostics"]), 4)
+
+        text = rl.format_diagnostics(result)
+        self.assertIn("tb.v:\n  line 7: error: Unknown module type: adder", text)
+
+    def test_general_failure_has_no_file_lines(self):
+        result = {"success": False, "files": {"design.v": [], "tb.v": []}, "command": "iverilog",
+                  "diagnostics": [{"file": None, "line": None, "severity": "error",
+                                   "message": "Error: Linter timed out after 30s"}], "cached": False}
+        self.assertEqual(rl.format_diagnostics(result), "Syntax Error:\nerror: Error: Linter timed out after 30s")
+
+    def test_unchanged_set_is_cached(self):
+        rl.lint_files(self.files, cwd=self.workspace, backends=["iverilog"])
+        again = rl.lint_files(list(reversed(self.files)), cwd=self.workspace, backends=["iverilog"])
+        self.assertTrue(again["cached"])
+        self.assertEqual(len(self.calls), 1)
+
+        with open(self.files[0], "a") as f:
+            f.write("module m; endmodule\n")
+        self.assertFalse(rl.lint_files(self.files, cwd=self.workspace, backends=["iverilog"])["cached"])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_async_shares_cache(self):
+        rl.lint_files(self.files, cwd=self.workspace, backends=["iverilog"])
+        result = asyncio.run(rl.alint_files(self.files, cwd=self.workspace, backends=["iverilog"]))
+        self.assertTrue(result["cached"])
+
+    def test_precheck_runs_before_any_backend(self):
+        with open(self.files[0], "w") as f:
+            f.write("module m;\ninitial begin\nendmodule\n")
+        result = rl.lint_files(self.files, cwd=self.workspace, backends=["iverilog"])
+        self.assertEqual(result["command"], "precheck")
+        self.assertEqual(result["files"]["design.v"][0]["line"], 2)
+        self.assertEqual(self.calls, [])
+
+    def test_stops_at_first_failing_backend(self):
+        ran = []
+        class Clean(rl.LintBackend):
+            name = "clean"
+            required = True
+            def run(self, verilog_files, cwd, timeout):
+                ran.append(self.name)
+                return {"success": True, "stdout": "", "stderr": "", "command": "clean"}
+            async def arun(self, verilog_files, cwd, timeout):
+                return self.run(verilog_files, cwd, timeout)
+            def parse(self, text, name_map):
+                return []
+        rl.BACKENDS["clean"] = Clean()
+        try:
+            result = rl.lint_files(self.files, cwd=self.workspace, backends=["clean", "iverilog", "clean"])
+        finally:
+            del rl.BACKENDS["clean"]
+        self.assertEqual(ran, ["clean"])
+        self.assertEqual(len(self.calls), 1)
+        self.assertFalse(result["success"])
+        self.assertEqual(result["command"].split(" && ")[0], "clean")
+
+    def test_parses_verilator_output(self):
+        text = ("%Warning-WIDTH: tb.v:9:12: Operator ASSIGN expects 8 bits\n"
+                "                        : ... note: In instance 'tb'\n"
+                "%Error: design.v:3:1: syntax error, unexpected endmodule\n"
+                "%Error: Exiting due to 1 error(s)\n")
+        diags = rl.parse_verilator_diagnostics(text)
+        self.assertEqual([(d["file"], d["line"], d["severity"]) for d in diags],
+                         [("tb.v", 9, "warning"), ("design.v", 3, "error")])
+        self.assertTrue(diags[0]["message"].startswith("[WIDTH]"))
+
+    def test_backend_must_implement_interface(self):
+        class RunOnly(rl.LintBackend):
+            name = "run_only"
+            def run(self, verilog_files, cwd, timeout):
+                return {}
+        with self.assertRaises(TypeError):
+            RunOnly()
+
+    def test_optional_backend_skipped_when_missing(self):
+        saved = rl.VerilatorBackend.available
+        rl.VerilatorBackend.available = lambda self: False
+        try:
+            self.assertEqual([b.name for b in rl.get_backends(["iverilog", "verilator"])], ["iverilog"])
+        finally:
+            rl.VerilatorBackend.available = saved
+
+    def test_tool_failure_not_cached(self):
+        rl.run_linter = lambda verilog_files, cwd=None, timeout=30: {
+            "success": False, "stdout": "", "stderr": "Error: Linting timed out.", "command": "iverilog"}
+        result = rl.lint_files(self.files, cwd=self.workspace, backends=["iverilog"])
+        self.assertFalse(result["success"])
+        self.assertEqual(result["diagnostics"][0]["file"], None)
+        self.assertEqual(len(rl._lint_cache), 0)
+
+if __name__ == "__main__":
+    unittest.main()
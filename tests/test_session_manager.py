@@ -0,0 +1,109 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.session_manager import SessionManager
+
+class TestSessionManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.manager = SessionManager(base_dir=os.path.join(self.tmp, "workspace"),
+                                      db_path=os.path.join(self.tmp, "state.db"))
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.tmp)
+
+    def test_wal_mode_and_connection_reuse(self):
+        conn = self.manager._connect()
+        self.assertIs(conn, self.manager._connect())
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        # synchronous=NORMAL is 1
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+
+    def test_connection_per_thread(self):
+        main_conn = self.manager._connect()
+        other = []
+        t = threading.Thread(target=lambda: other.append(self.manager._connect()))
+        t.start(); t.join()
+        self.assertIsNot(other[0], main_conn)
+
+    def test_update_stats_and_batch(self):
+        a = self.manager.create_session(tag="a", model_name="gemini-2.5-flash")
+        b = self.manager.create_session(tag="b", model_name="gemini-2.5-flash")
+        self.manager.update_session_stats(a, 10, 5, 2, 0.5)
+        meta = self.manager.get_session_metadata(a)
+        self.assertEqual(meta["total_tokens"], 17)
+
+        self.manager.update_many_session_stats([(a, 20, 10, 0, 1.0), (b, 1, 1, 1, 0.1)])
+        self.assertEqual(self.manager.get_session_metadata(a)["total_tokens"], 30)
+        self.assertEqual(self.manager.get_session_metadata(b)["total_cost"], 0.1)
+
+    def test_transaction_rolls_back(self):
+        a = self.manager.create_session(tag="a")
+        with self.assertRaises(RuntimeError):
+            with self.manager.transaction():
+                self.manager.update_session_stats(a, 100, 100, 0, 9.0)
+                raise RuntimeError("boom")
+        self.assertEqual(self.manager.get_session_metadata(a)["total_tokens"], 0)
+
+    def test_clear_all_keeps_manager_usable(self):
+        self.manager.create_session(tag="a")
+        self.manager.clear_all_sessions()
+        b = self.manager.create_session(tag="b")
+        self.assertIsNotNone(self.manager.get_session_metadata(b))
+
+    def test_list_sessions_sort_filter_paginate(self):
+        for n in range(5):
+            sid = self.manager.create_session(tag=f"design_{n}")
+            self.manager.update_session_stats(sid, 1, 1, 0, float(n % 3))
+        self.manager.create_session(tag="other")
+
+        rows, total = self.manager.list_sessions(limit=2, offset=0)
+        self.assertEqual(total, 6)
+        self.assertEqual([r["session_id"] for r in rows], ["other", "design_4"])
+
+        rows, _ = self.manager.list_sessions(limit=10, sort_by="cost")
+        self.assertEqual(rows[0]["total_cost"], 2.0)
+
+        rows, total = self.manager.list_sessions(limit=2, offset=2, name_filter="DESIGN")
+        self.assertEqual(total, 5)
+        self.assertEqual([r["session_id"] for r in rows], ["design_2", "design_1"])
+
+        # LIKE wildcards in the filter are literal
+        _, total = self.manager.list_sessions(name_filter="n_%")
+        self.assertEqual(total, 0)
+
+    def test_reconcile_sessions(self):
+        kept = self.manager.create_session(tag="kept")
+        os.makedirs(os.path.join(self.manager.base_dir, "restored"))
+        gone = self.manager.create_session(tag="gone")
+        shutil.rmtree(self.manager.get_workspace_path(gone))
+
+        self.assertEqual(self.manager.reconcile_sessions(), (1, 1))
+        ids = {r["session_id"] for r in self.manager.list_sessions()[0]}
+        self.assertEqual(ids, {kept, "restored"})
+
+    def test_reconcile_skips_vanished_dir(self):
+        os.makedirs(os.path.join(self.manager.base_dir, "vanishing"))
+        os.makedirs(os.path.join(self.manager.base_dir, "restored"))
+        original = os.path.getctime
+        def getctime(path):
+            if os.path.basename(path) == "vanishing":
+                raise FileNotFoundError(path)
+            return original(path)
+        os.path.getctime = getctime
+        try:
+            self.assertEqual(self.manager.reconcile_sessions(), (1, 0))
+        finally:
+            os.path.getctime = original
+        self.assertEqual([r["session_id"] for r in self.manager.list_sessions()[0]], ["restored"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.tool_cache import memoize_tool, get_tool_cache, tool_cache_stats
+
+class TestToolCache(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.test_dir, "design.v")
+        with open(self.source, "w") as f:
+            f.write("module a; endmodule")
+        get_tool_cache().clear()
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        get_tool_cache().clear()
+
+    def make_tool(self, name="fake_tool", outputs=None):
+        @memoize_tool(name, inputs=lambda a: [os.path.join(self.test_dir, a["filename"])], outputs=outputs)
+        def fake_tool(filename: str, bypass_cache: bool = False) -> str:
+            self.calls += 1
+            with open(os.path.join(self.test_dir, filename)) as f:
+                return f.read()
+        return fake_tool
+
+    def test_hit_on_unchanged_file(self):
+        fake_tool = self.make_tool()
+        self.assertEqual(fake_tool("design.v"), "module a; endmodule")
+        self.assertEqual(fake_tool("design.v"), "module a; endmodule")
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(tool_cache_stats()["fake_tool"], {"hits": 1, "misses": 1, "bypassed": 0})
+
+    def test_miss_after_edit(self):
+        fake_tool = self.make_tool()
+        fake_tool("design.v")
+        with open(self.source, "w") as f:
+            f.write("module bb; endmodule")
+
+        self.assertEqual(fake_tool("design.v"), "module bb; endmodule")
+        self.assertEqual(self.calls, 2)
+
+    def test_bypass(self):
+        fake_tool = self.make_tool()
+        fake_tool("design.v")
+        fake_tool("design.v", bypass_cache=True)
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(tool_cache_stats()["fake_tool"]["bypassed"], 1)
+
+    def test_missing_output_forces_rerun(self):
+        artifact = os.path.join(self.test_dir, "out.svg")
+        fake_tool = self.make_tool(outputs=lambda a: [artifact])
+        fake_tool("design.v")
+        fake_tool("design.v")
+        self.assertEqual(self.calls, 2)
+
+        with open(artifact, "w") as f:
+            f.write("<svg/>")
+        fake_tool("design.v")
+        self.assertEqual(self.calls, 2)
+
+    def test_hash_mode_ignores_touch(self):
+        cache = get_tool_cache()
+        cache.mode = "hash"
+        try:
+            before = cache.fingerprint([self.source])
+            os.utime(self.source, (0, 0))
+            self.assertEqual(before, cache.fingerprint([self.source]))
+        finally:
+            cache.mode = "stat"
+
+    def test_async_shares_entries(self):
+        fake_tool = self.make_tool()
+
+        @memoize_tool("fake_tool", inputs=lambda a: [os.path.join(self.test_dir, a["filename"])])
+        async def afake_tool(filename: str, bypass_cache: bool = False) -> str:
+            self.calls += 1
+            return "async"
+
+        fake_tool("design.v")
+        self.assertEqual(asyncio.run(afake_tool("design.v")), "module a; endmodule")
+        self.assertEqual(self.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools import tool_output
+from src.tools.tool_output import spill_output, read_output_page, SPILL_DIR
+
+class TestToolOutput(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.text = "\n".join(f"line {i}: " + "x" * 40 for i in range(1, 2001))
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_small_output_passes_through(self):
+        self.assertEqual(spill_output("Syntax OK.", "linter_tool", self.workspace, token_limit=100), "Syntax OK.")
+        self.assertFalse(os.path.exists(os.path.join(self.workspace, SPILL_DIR)))
+
+    def test_large_output_is_capped_and_spilled(self):
+        result = spill_output(self.text, "simulation_tool", self.workspace, token_limit=500)
+
+        self.assertLess(len(result), 500 * 4 + 400)
+        self.assertTrue(result.startswith("line 1:"))
+        self.assertIn("line 2000:", result)
+        self.assertIn("lines omitted", result)
+
+        handle = result.split("saved as '")[1].split("'")[0]
+        with open(os.path.join(self.workspace, handle)) as f:
+            self.assertEqual(f.read(), self.text)
+
+    def test_paging(self):
+        result = spill_output(self.text, "simulation_tool", self.workspace, token_limit=500)
+        handle = result.split("saved as '")[1].split("'")[0]
+
+        page = read_output_page(handle, self.workspace, start_line=1000, num_lines=3)
+        self.assertTrue(page.startswith("line 1000:"))
+        self.assertIn("[Lines 1000-1002 of 2000]", page)
+        self.assertIn("Next page: start_line=1003", page)
+
+    def test_spill_dir_is_capped(self):
+        saved = tool_output.TOOL_OUTPUT_MAX_FILES
+        tool_output.TOOL_OUTPUT_MAX_FILES = 3
+        try:
+            handles = []
+            for i in range(5):
+                result = spill_output(f"run {i}\n" + self.text, "simulation_tool", self.workspace, token_limit=500)
+                handles.append(result.split("saved as '")[1].split("'")[0])
+                # Distinct mtimes, oldest first
+                os.utime(os.path.join(self.workspace, handles[-1]), (time.time() + i, time.time() + i))
+        finally:
+            tool_output.TOOL_OUTPUT_MAX_FILES = saved
+        kept = sorted(os.listdir(os.path.join(self.workspace, SPILL_DIR)))
+        self.assertEqual(kept, sorted(os.path.basename(h) for h in handles[2:]))
+
+    def test_rejects_paths_outside_spill_dir(self):
+        with open(os.path.join(self.workspace, "design.v"), "w") as f:
+            f.write("module a; endmodule")
+        result = read_output_page("../design.v", self.workspace)
+        self.assertTrue(result.startswith("Error"))
+        result = read_output_page(f"{SPILL_DIR}/../design.v", self.workspace)
+        self.assertTrue(result.startswith("Error"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.tools import tool
+
+from src.tools.tool_cache import get_tool_cache, memoize_tool
+from src.utils.tracing import TraceStore, TracingCallbackHandler, to_chrome_trace
+
+@tool
+@memoize_tool("traced_tool", inputs=lambda a: [])
+def traced_tool(x: int) -> str:
+    """Doubles x."""
+    return str(x * 2)
+
+@tool
+def failing_tool(x: int) -> str:
+    """Always fails."""
+    raise ValueError("boom")
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.store = TraceStore(os.path.join(self.tmp, "state.db"))
+        get_tool_cache().clear()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp)
+
+    def test_tool_spans_with_cache_hit(self):
+        tracer = TracingCallbackHandler("s1", self.store)
+        traced_tool.invoke({"x": 21}, config={"callbacks": [tracer]})
+        traced_tool.invoke({"x": 21}, config={"callbacks": [tracer]})
+        with self.assertRaises(ValueError):
+            failing_tool.invoke({"x": 1}, config={"callbacks": [tracer]})
+        tracer.flush()
+
+        spans = self.store.get_spans(session_id="s1")
+        self.assertEqual([s["name"] for s in spans], ["traced_tool", "traced_tool", "failing_tool"])
+        self.assertEqual([s["cache_hit"] for s in spans], [0, 1, None])
+        self.assertEqual([s["success"] for s in spans], [1, 1, 0])
+        self.assertEqual(spans[0]["output_size"], 2)
+        self.assertTrue(all(s["end_ts"] >= s["start_ts"] for s in spans))
+
+    def test_chrome_trace_export(self):
+        tracer = TracingCallbackHandler("s1", self.store)
+        traced_tool.invoke({"x": 1}, config={"callbacks": [tracer]})
+        trace = to_chrome_trace(tracer.flush())
+        (event,) = trace["traceEvents"]
+        self.assertEqual((event["ph"], event["name"], event["cat"]), ("X", "traced_tool", "tool"))
+        self.assertGreaterEqual(event["dur"], 0)
+        json.dumps(trace)
+
+if __name__ == "__main__":
+    unittest.main()
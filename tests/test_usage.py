@@ -0,0 +1,94 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.session_manager import SessionManager
+from src.utils.usage import UsageBuffer, extract_usage
+
+class TestUsage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.manager = SessionManager(base_dir=os.path.join(self.tmp, "workspace"),
+                                      db_path=os.path.join(self.tmp, "state.db"))
+        self.session = self.manager.create_session(tag="usage")
+        self.writes = []
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.tmp)
+
+    def record(self, deltas):
+        deltas = list(deltas)
+        self.writes.append(deltas)
+        self.manager.add_session_stats(deltas)
+
+    def test_extract_usage(self):
+        usage = {"input_tokens": 10, "output_tokens": 4, "total_tokens": 14,
+                 "input_token_details": {"cache_read": 3}}
+        self.assertEqual(extract_usage(usage), (10, 4, 14, 3))
+
+    def test_deltas_coalesce_until_flush(self):
+        buffer = UsageBuffer(self.record, interval=0, max_pending=100)
+        for _ in range(5):
+            buffer.add(self.session, 10, 2, 1, 0.01)
+        self.assertEqual(self.writes, [])
+        self.assertEqual(buffer.pending(self.session)[:3], (50, 10, 5))
+
+        buffer.flush()
+        buffer.close()
+        self.assertEqual(len(self.writes), 1)
+        meta = self.manager.get_session_metadata(self.session)
+        self.assertEqual((meta["input_tokens"], meta["output_tokens"], meta["total_tokens"]), (50, 10, 65))
+        self.assertAlmostEqual(meta["total_cost"], 0.05)
+
+    def wait_for_writes(self, count=1):
+        deadline = time.time() + 2
+        while len(self.writes) < count and time.time() < deadline:
+            time.sleep(0.02)
+
+    def test_size_threshold_flushes(self):
+        buffer = UsageBuffer(self.record, interval=0, max_pending=3)
+        for _ in range(3):
+            buffer.add(self.session, 1, 1, 0, 0.0)
+        self.wait_for_writes()
+        buffer.close()
+        self.assertEqual(len(self.writes), 1)
+
+    def test_size_threshold_never_raises_in_add(self):
+        def failing(deltas):
+            self.writes.append(list(deltas))
+            raise RuntimeError("database is locked")
+        buffer = UsageBuffer(failing, interval=0, max_pending=2)
+        for _ in range(2):
+            buffer.add(self.session, 5, 0, 0, 0.0)
+        self.wait_for_writes()
+        self.assertEqual(buffer.pending(self.session)[0], 10)
+        buffer.discard()
+        buffer.close()
+
+    def test_timer_flushes(self):
+        buffer = UsageBuffer(self.record, interval=0.05, max_pending=100)
+        buffer.add(self.session, 1, 1, 0, 0.0)
+        self.wait_for_writes()
+        buffer.close()
+        self.assertEqual(len(self.writes), 1)
+
+    def test_failed_write_keeps_deltas(self):
+        def failing(deltas):
+            raise RuntimeError("db locked")
+        buffer = UsageBuffer(failing, interval=0, max_pending=100)
+        buffer.add(self.session, 7, 0, 0, 0.0)
+        with self.assertRaises(RuntimeError):
+            buffer.flush()
+        self.assertEqual(buffer.pending(self.session)[0], 7)
+        buffer.discard()
+        buffer.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.verilog_index import VerilogIndex, parse_modules
+
+DESIGN = """
+// 'module fake' in a comment is ignored
+module adder #(parameter W = 8) (input [W-1:0] a, b, output reg [W:0] sum);
+    always @(*) sum = a + b;
+endmodule
+
+module alu(clk, x, y);
+    input clk;
+    input [7:0] x;
+    output [8:0] y;
+    parameter MODE = 1;
+    adder #(.W(8)) u_add (.a(x), .b(x), .sum(y));
+    always @(posedge clk) begin if (x) begin end else if (y) begin end end
+endmodule
+"""
+
+TB = """
+module tb;
+    reg clk = 0;
+    alu dut(clk, 8'd1, );
+    initial begin $display("module x(y);"); end
+endmodule
+"""
+
+class TestVerilogIndex(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.write("design.v", DESIGN)
+        self.write("tb.v", TB)
+        # Synthesized netlists are not sources
+        self.write(os.path.join("orfs_results", "1_1_yosys.v"), "module alu(); endmodule\n")
+        self.index = VerilogIndex(self.workspace).refresh()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def write(self, name, text):
+        path = os.path.join(self.workspace, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_parse_ports_parameters_instances(self):
+        adder, alu = parse_modules(DESIGN, "design.v")
+        self.assertEqual(adder["ports"], [
+            {"name": "a", "direction": "input", "width": "[W-1:0]"},
+            {"name": "b", "direction": "input", "width": "[W-1:0]"},
+            {"name": "sum", "direction": "output", "width": "[W:0]"},
+        ])
+        self.assertEqual(adder["parameters"], [{"name": "W", "default": "8"}])
+        self.assertEqual([p["name"] for p in alu["ports"]], ["clk", "x", "y"])
+        self.assertEqual(alu["ports"][2]["direction"], "output")
+        self.assertEqual(alu["parameters"], [{"name": "MODE", "default": "1"}])
+        self.assertEqual(alu["instances"], [{"module": "adder", "name": "u_add"}])
+        self.assertEqual(alu["line"], 7)
+
+    def test_gate_primitives_are_not_instances(self):
+        src = ("module gates(input a, b, en, output y);\n  wire n1, n2;\n  nand g1(n1, a, b);\n"
+               "  xor g2(n2, n1, a);\n  bufif1 g3(y, n2, en);\n  adder u_add(.a(a));\nendmodule\n")
+        (mod,) = parse_modules(src, "gates.v")
+        self.assertEqual(mod["instances"], [{"module": "adder", "name": "u_add"}])
+
+    def test_hierarchy_and_tops(self):
+        self.assertEqual(sorted(self.index.modules()), ["adder", "alu", "tb"])
+        self.assertEqual(self.index.modules()["alu"]["file"], "design.v")
+        self.assertEqual(self.index.top_modules(), ["tb"])
+        self.assertEqual(self.index.hierarchy("tb"), ["tb", "alu", "adder"])
+        self.assertEqual(self.index.instantiated_by("adder"), ["alu"])
+        # The testbench has no ports: the design top is the root of design.v
+        self.assertEqual(self.index.design_top(), "alu")
+        self.assertEqual(self.index.design_top(files=["design.v"]), "alu")
+
+    def test_incremental_update(self):
+        self.write("design.v", DESIGN + "module wrapper(input a); alu core(.clk(a)); endmodule\n")
+        self.index.update("design.v")
+        self.assertEqual(self.index.design_top(files=["design.v"]), "wrapper")
+        os.remove(os.path.join(self.workspace, "tb.v"))
+        self.index.refresh()
+        self.assertNotIn("tb", self.index.modules())
+
+    def test_files_for_top(self):
+        self.write("rtl/mult.v", "module mult(input a, output y); endmodule\n")
+        self.write("old_design.v", "module alu_old(input a); endmodule\n")
+        self.write("design.v", DESIGN.replace("endmodule\n\nmodule alu", "endmodule\n\nmodule alu")
+                   .replace("u_add (.a(x), .b(x), .sum(y));", "u_add (.a(x), .b(x), .sum(y));\n    mult m0(.a(clk));"))
+        self.index.refresh()
+        self.assertEqual(self.index.files_for("tb"), ["tb.v", "design.v", os.path.join("rtl", "mult.v")])
+        self.assertEqual(self.index.files_for("alu"), ["design.v", os.path.join("rtl", "mult.v")])
+        self.assertEqual(self.index.files_for("missing"), [])
+
+    def test_describe(self):
+        text = self.index.describe("alu")
+        self.assertIn("module alu (design.v:7)", text)
+        self.assertIn("  output [8:0] y", text)
+        self.assertIn("Instantiates: adder u_add", text)
+        self.assertIn("Instantiated by: tb", text)
+        self.assertIn("Known modules: adder, alu, tb", self.index.describe("nope"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add src to python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools import wrappers
+
+class TestOrfsFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.saved_env = os.environ.get("RTL_WORKSPACE")
+        os.environ["RTL_WORKSPACE"] = self.workspace
+        base = os.path.join(self.workspace, "orfs_results", "sky130hd", "top", "base")
+        os.makedirs(os.path.join(base, ".gds_tiles", "6_final.gds", "abc"))
+        for name in ("6_final.gds", "1_1_yosys.v", ".gds_tiles/6_final.gds/abc/v2_z0_0_0_512_x.png"):
+            open(os.path.join(base, name), "w").close()
+        os.makedirs(os.path.join(self.workspace, "orfs_reports"))
+        open(os.path.join(self.workspace, "orfs_reports", "synth_stat.rpt"), "w").close()
+
+    def tearDown(self):
+        if self.saved_env is None:
+            os.environ.pop("RTL_WORKSPACE", None)
+        else:
+            os.environ["RTL_WORKSPACE"] = self.saved_env
+        shutil.rmtree(self.workspace)
+
+    def test_only_report_files_are_fingerprinted(self):
+        files = {os.path.relpath(p, self.workspace) for p in wrappers._orfs_files()
+                 if os.path.isfile(p)}
+        self.assertEqual(files, {os.path.join("orfs_results", "sky130hd", "top", "base", "1_1_yosys.v"),
+                                 os.path.join("orfs_reports", "synth_stat.rpt")})
+
+if __name__ == "__main__":
+    unittest.main()